@@ -1,4 +1,6 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import Body, FastAPI, Header, HTTPException, Query, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from typing import List, Dict, Any, Optional
 import json
@@ -6,19 +8,34 @@ from datetime import datetime
 import uuid
 import os
 import sys
+import time
 
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from models.application import Application, ApplicationCreate, ApplicationUpdate
-from models.deployment import Deployment, DeploymentCreate, DeploymentUpdate
-from models.gitops import Repository, RepositoryCreate, RepositoryUpdate, GitOpsDeployment, GitOpsDeploymentCreate, GitOpsDeploymentUpdate
+from models.deployment import Deployment, DeploymentCreate, DeploymentUpdate, RolloutPlanRequest
+from models.gitops import Repository, RepositoryCreate, RepositoryUpdate, GitOpsDeployment, GitOpsDeploymentCreate, GitOpsDeploymentUpdate, DeploymentFilter
 from models.cluster import Cluster, ClusterCreate, ClusterUpdate, ClusterMetrics
 from models.logs import LogEntry, LogEntryCreate, LogFilter
+from models.release import Release, ReleaseCreate
 from services.application_service import ApplicationService
-from services.deployment_service import DeploymentService
+from services.deployment_service import DEPLOYMENT_TRANSITIONS, DeploymentService, TERMINAL_STATUSES
+from services.deployment_executor import DeploymentExecutor
+from services.deployment_scheduler import PriorityFairQueue
 from services.gitops_service import GitOpsService
+from services.git_reader import GitError, GitRepositoryReader
+from services.manifest_diff import ManifestDiffer
+from services.gitops_sync_scheduler import SyncScheduler
+from services.gitops_webhooks import WebhookIntake
 from services.cluster_service import ClusterService
 from services.logs_service import LogsService
+from services.health_prober import HealthProber
+from services.release_service import ReleaseService
+from services.scanner_service import ScannerService
+from config.scheduler_config import get_scheduler_config
+from utils.byte_range import parse_byte_range
+from utils.idempotency import IdempotencyCache, IdempotencyConflict, request_fingerprint
+from utils.revisions import RevisionConflictError, etag, parse_if_match
 from utils.seed_data import seed_initial_data
 
 app = FastAPI(title="Cloud Native App Orchestrator API", version="1.0.0")
@@ -29,17 +46,85 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Total-Count", "X-Next-Cursor", "Idempotent-Replayed", "ETag", "Content-Range", "Accept-Ranges"],
 )
 
 application_service = ApplicationService()
-deployment_service = DeploymentService()
-gitops_service = GitOpsService()
 cluster_service = ClusterService()
+deployment_service = DeploymentService(cluster_service)
+scheduler_config = get_scheduler_config()
+deployment_executor = DeploymentExecutor(
+    deployment_service,
+    max_workers=scheduler_config["max_workers"],
+    cluster_limit=scheduler_config["cluster_limit"],
+    environment_limits=scheduler_config["environment_limits"],
+    default_environment_limit=scheduler_config["default_environment_limit"],
+    queue=PriorityFairQueue(
+        team_of=lambda deployment: (application_service.applications.get(deployment.get("application_id")) or {}).get("team"),
+        team_weights=scheduler_config["team_weights"],
+        default_weight=scheduler_config["default_team_weight"]
+    )
+)
+release_service = ReleaseService(deployment_service, deployment_executor)
+git_reader = GitRepositoryReader()
+gitops_service = GitOpsService(source=git_reader, differ=ManifestDiffer(git_reader))
+sync_scheduler = SyncScheduler(gitops_service)
+webhook_intake = WebhookIntake(gitops_service)
 logs_service = LogsService()
+health_prober = HealthProber(application_service)
+scanner_service = ScannerService(application_service)
+idempotency_cache = IdempotencyCache()
 
 @app.on_event("startup")
 async def startup_event():
-    await seed_initial_data()
+    seed_initial_data()
+    # Counters are maintained on every write; this only repairs drift from edited data files
+    drifted = cluster_service.verify_deployment_counts(deployment_service.deployments.values(), repair=True)
+    drifted += gitops_service.verify_deployment_counts(repair=True)
+    if drifted:
+        print(f"Repaired deployment counters for {len(drifted)} clusters/repositories")
+    health_prober.start()
+    await deployment_executor.start()
+    await release_service.start()
+    await sync_scheduler.start()
+    await webhook_intake.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await health_prober.stop()
+    await sync_scheduler.stop()
+    await webhook_intake.stop()
+    await release_service.stop()
+    await deployment_executor.stop()
+    deployment_service.flush()
+
+async def _run_idempotent(idempotency_key: Optional[str], scope: str, payload: Any, handler):
+    """Run a write once per Idempotency-Key, replaying the stored response on retries"""
+    if not idempotency_key:
+        return await handler()
+    cache_key = f"{scope} {idempotency_key}"
+    fingerprint = request_fingerprint(payload)
+    try:
+        replay = idempotency_cache.begin(cache_key, fingerprint)
+    except IdempotencyConflict as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    if replay is not None:
+        status_code, body = replay
+        return JSONResponse(content=body, status_code=status_code, headers={"Idempotent-Replayed": "true"})
+    try:
+        result = await handler()
+    except Exception:
+        # Failed requests are not remembered so the client can retry them
+        idempotency_cache.release(cache_key)
+        raise
+    idempotency_cache.complete(cache_key, fingerprint, 200, jsonable_encoder(result))
+    return result
+
+def _expected_revision(if_match: Optional[str]) -> Optional[int]:
+    try:
+        return parse_if_match(if_match)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @app.get("/")
 def read_root():
@@ -49,20 +134,52 @@ def read_root():
 async def health_check():
     return {"status": "healthy", "service": "Cloud Native App Orchestrator API"}
 
+def _split_query_values(values: Optional[List[str]]) -> Optional[List[str]]:
+    if not values:
+        return None
+    return [item.strip() for value in values for item in value.split(",") if item.strip()] or None
+
 @app.get("/api/applications", response_model=List[Application])
-async def get_applications():
+async def get_applications(
+    response: Response,
+    environment: Optional[List[str]] = Query(None),
+    status: Optional[List[str]] = Query(None),
+    team: Optional[List[str]] = Query(None),
+    tags: Optional[List[str]] = Query(None),
+    search: Optional[str] = None,
+    sort: str = "name",
+    offset: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = None
+):
     try:
-        applications = await application_service.get_all_applications()
+        applications, total, next_cursor = await application_service.query_applications(
+            environment=_split_query_values(environment),
+            status=_split_query_values(status),
+            team=_split_query_values(team),
+            tags=_split_query_values(tags),
+            search=search,
+            sort=sort,
+            offset=offset,
+            limit=limit,
+            cursor=cursor
+        )
+        response.headers["X-Total-Count"] = str(total)
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
         return applications
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching applications: {str(e)}")
 
 @app.get("/api/applications/{app_id}", response_model=Application)
-async def get_application(app_id: str):
+async def get_application(app_id: str, response: Response):
     try:
         application = await application_service.get_application_by_id(app_id)
         if not application:
             raise HTTPException(status_code=404, detail="Application not found")
+        response.headers["ETag"] = etag(application.revision)
         return application
     except HTTPException:
         raise
@@ -70,38 +187,87 @@ async def get_application(app_id: str):
         raise HTTPException(status_code=500, detail=f"Error fetching application: {str(e)}")
 
 @app.post("/api/applications", response_model=Application)
-async def create_application(app_data: ApplicationCreate):
-    try:
-        application = await application_service.create_application(app_data)
-        if not application:
-            raise HTTPException(status_code=500, detail="Failed to create application")
-        return application
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error creating application: {str(e)}")
+async def create_application(
+    app_data: ApplicationCreate,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
+):
+    async def create():
+        try:
+            application = await application_service.create_application(app_data)
+            if not application:
+                raise HTTPException(status_code=500, detail="Failed to create application")
+            return application
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error creating application: {str(e)}")
+
+    return await _run_idempotent(idempotency_key, "POST /api/applications", app_data.dict(), create)
 
 @app.put("/api/applications/{app_id}", response_model=Application)
-async def update_application(app_id: str, app_data: ApplicationUpdate):
+async def update_application(
+    app_id: str,
+    app_data: ApplicationUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None, alias="If-Match")
+):
     try:
-        application = await application_service.update_application(app_id, app_data)
+        application = await application_service.update_application(app_id, app_data, expected_revision=_expected_revision(if_match))
         if not application:
             raise HTTPException(status_code=404, detail="Application not found")
+        # Only a changed image or version invalidates this application's scan
+        if await scanner_service.sync_application(app_id):
+            application = await application_service.get_application_by_id(app_id)
+        response.headers["ETag"] = etag(application.revision)
         return application
     except HTTPException:
         raise
+    except RevisionConflictError as e:
+        raise HTTPException(status_code=412, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error updating application: {str(e)}")
 
+@app.patch("/api/applications/{app_id}")
+async def patch_application(
+    app_id: str,
+    patch: Dict[str, Any] = Body(...),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    if_match: Optional[str] = Header(None, alias="If-Match")
+):
+    async def apply():
+        try:
+            result = await application_service.patch_application(app_id, patch, expected_revision=_expected_revision(if_match))
+            if result is None:
+                raise HTTPException(status_code=404, detail="Application not found")
+            if "image" in result["changes"] or "version" in result["changes"]:
+                await scanner_service.sync_application(app_id)
+            return result
+        except HTTPException:
+            raise
+        except RevisionConflictError as e:
+            raise HTTPException(status_code=412, detail=str(e))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error patching application: {str(e)}")
+
+    return await _run_idempotent(idempotency_key, f"PATCH /api/applications/{app_id}", patch, apply)
+
 @app.delete("/api/applications/{app_id}")
-async def delete_application(app_id: str):
+async def delete_application(
+    app_id: str,
+    if_match: Optional[str] = Header(None, alias="If-Match")
+):
     try:
-        success = await application_service.delete_application(app_id)
+        success = await application_service.delete_application(app_id, expected_revision=_expected_revision(if_match))
         if not success:
             raise HTTPException(status_code=404, detail="Application not found")
+        scanner_service.forget_application(app_id)
         return {"message": "Application deleted successfully"}
     except HTTPException:
         raise
+    except RevisionConflictError as e:
+        raise HTTPException(status_code=412, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error deleting application: {str(e)}")
 
@@ -114,9 +280,81 @@ async def update_application_metrics(app_id: str, metrics: dict):
         return {"message": "Application metrics updated successfully"}
     except HTTPException:
         raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error updating application metrics: {str(e)}")
+
+def _normalize_batch(payload: Any, field: str) -> Dict[str, Any]:
+    """Accept either {app_id: value} or [{"id": app_id, field: value}, ...]"""
+    if isinstance(payload, dict):
+        return payload
+    if isinstance(payload, list):
+        updates = {}
+        for item in payload:
+            app_id = item.get("id") or item.get("application_id") if isinstance(item, dict) else None
+            if not app_id:
+                raise ValueError(f"Each batch item needs an id and a {field} object")
+            updates[app_id] = item.get(field)
+        return updates
+    raise ValueError("Batch payload must be an object or an array")
+
+def _batch_response(results: Dict[str, str]) -> Dict[str, Any]:
+    updated = sum(1 for status in results.values() if status == "updated")
+    return {"results": results, "updated": updated, "failed": len(results) - updated}
+
+@app.post("/api/applications/metrics/batch")
+async def update_application_metrics_batch(payload: Any = Body(...)):
+    try:
+        results = await application_service.update_metrics_batch(_normalize_batch(payload, "metrics"))
+        return _batch_response(results)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error updating application metrics: {str(e)}")
 
+@app.post("/api/applications/health/batch")
+async def update_application_health_batch(payload: Any = Body(...)):
+    try:
+        results = await application_service.update_health_batch(_normalize_batch(payload, "health"))
+        return _batch_response(results)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error updating application health: {str(e)}")
+
+def _parse_timestamp(value: Optional[str], default: float) -> float:
+    if value is None or value == "":
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+
+@app.get("/api/applications/{app_id}/metrics/range")
+async def get_application_metrics_range(
+    app_id: str,
+    series: Optional[List[str]] = Query(None),
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    step: int = Query(60, ge=1)
+):
+    try:
+        end_ts = _parse_timestamp(end, time.time())
+        start_ts = _parse_timestamp(start, end_ts - 3600)
+        result = await application_service.get_application_metrics_range(
+            app_id, _split_query_values(series), start_ts, end_ts, step
+        )
+        if result is None:
+            raise HTTPException(status_code=404, detail="Application not found")
+        return {"application_id": app_id, "step": step, "series": result}
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching application metrics: {str(e)}")
+
 @app.put("/api/applications/{app_id}/health")
 async def update_application_health(app_id: str, health: dict):
     try:
@@ -129,6 +367,25 @@ async def update_application_health(app_id: str, health: dict):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error updating application health: {str(e)}")
 
+@app.get("/api/applications/{app_id}/health/latency")
+async def get_application_latency(
+    app_id: str,
+    window: int = Query(3600, ge=60, le=86400),
+    q: Optional[List[float]] = Query(None)
+):
+    try:
+        quantiles = q or [0.5, 0.9, 0.99]
+        if any(not 0 <= value <= 1 for value in quantiles):
+            raise HTTPException(status_code=400, detail="Quantiles must be between 0 and 1")
+        summary = await application_service.get_application_latency(app_id, window, quantiles)
+        if summary is None:
+            raise HTTPException(status_code=404, detail="Application not found")
+        return {"application_id": app_id, **summary}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching application latency: {str(e)}")
+
 @app.post("/api/applications/{app_id}/logs")
 async def add_application_log(app_id: str, log_data: dict):
     try:
@@ -153,74 +410,470 @@ async def add_application_vulnerability(app_id: str, vulnerability_data: dict):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error adding vulnerability: {str(e)}")
 
+@app.post("/api/applications/{app_id}/scan")
+async def scan_application(app_id: str, sbom: Any = Body(...)):
+    try:
+        result = await scanner_service.scan_application(app_id, sbom)
+        if result is None:
+            raise HTTPException(status_code=404, detail="Application not found")
+        return result
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error scanning application: {str(e)}")
+
+@app.get("/api/scanner/status")
+async def get_scanner_status():
+    return scanner_service.get_status()
+
+@app.post("/api/scanner/advisories")
+async def ingest_scanner_advisories(payload: Any = Body(...)):
+    try:
+        if not isinstance(payload, (dict, list)):
+            raise HTTPException(status_code=400, detail="Expected an OSV advisory object or array")
+        records = payload if isinstance(payload, list) else payload.get("vulns") or [payload]
+        if not isinstance(records, list) or not all(isinstance(record, dict) for record in records):
+            raise HTTPException(status_code=400, detail="Expected OSV advisory objects")
+        return await scanner_service.ingest_advisories(records)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error ingesting advisories: {str(e)}")
+
+@app.post("/api/scanner/rescan")
+async def rescan_stale_applications():
+    try:
+        return await scanner_service.rescan_stale()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error rescanning applications: {str(e)}")
+
+@app.post("/api/scanner/reload")
+async def reload_scanner_advisories():
+    try:
+        return await scanner_service.reload_advisories()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error reloading advisories: {str(e)}")
+
+@app.get("/api/vulnerabilities")
+async def get_vulnerabilities(
+    response: Response,
+    severity: Optional[List[str]] = Query(None),
+    package: Optional[str] = None,
+    team: Optional[str] = None,
+    application_id: Optional[str] = None,
+    offset: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1, le=1000)
+):
+    try:
+        vulnerabilities = await application_service.query_vulnerabilities(
+            severity=_split_query_values(severity),
+            package=package,
+            team=team,
+            application_id=application_id
+        )
+        response.headers["X-Total-Count"] = str(len(vulnerabilities))
+        end = offset + limit if limit else None
+        return vulnerabilities[offset:end]
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching vulnerabilities: {str(e)}")
+
+@app.get("/api/vulnerabilities/summary")
+async def get_vulnerability_summary():
+    try:
+        return await application_service.get_vulnerability_summary()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching vulnerability summary: {str(e)}")
+
+@app.get("/api/vulnerabilities/{cve}")
+async def get_vulnerability(cve: str):
+    try:
+        vulnerability = await application_service.get_vulnerability(cve)
+        if not vulnerability:
+            raise HTTPException(status_code=404, detail="Vulnerability not found")
+        return vulnerability
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching vulnerability: {str(e)}")
+
 @app.get("/api/deployments", response_model=List[Deployment])
-async def get_deployments():
+async def get_deployments(
+    response: Response,
+    application_id: Optional[List[str]] = Query(None),
+    cluster_id: Optional[List[str]] = Query(None),
+    environment: Optional[List[str]] = Query(None),
+    status: Optional[List[str]] = Query(None),
+    sort: str = "-created",
+    offset: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = None
+):
     try:
-        deployments = await deployment_service.get_all_deployments()
+        deployments, total, next_cursor = await deployment_service.query_deployments(
+            application_id=_split_query_values(application_id),
+            cluster_id=_split_query_values(cluster_id),
+            environment=_split_query_values(environment),
+            status=_split_query_values(status),
+            sort=sort,
+            offset=offset,
+            limit=limit,
+            cursor=cursor
+        )
+        response.headers["X-Total-Count"] = str(total)
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
         return deployments
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching deployments: {str(e)}")
 
-@app.get("/api/deployments/{deployment_id}", response_model=Deployment)
-async def get_deployment(deployment_id: str):
+@app.get("/api/deployments/application/{application_id}", response_model=List[Deployment])
+async def get_deployments_by_application(application_id: str):
+    """Get all deployments for a specific application"""
     try:
-        deployment = await deployment_service.get_deployment_by_id(deployment_id)
-        if not deployment:
+        return await deployment_service.get_deployments_by_application(application_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching application deployments: {str(e)}")
+
+@app.get("/api/deployments/cluster/{cluster_id}", response_model=List[Deployment])
+async def get_deployments_by_cluster(cluster_id: str):
+    """Get all deployments for a specific cluster"""
+    try:
+        return await deployment_service.get_deployments_by_cluster(cluster_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching cluster deployments: {str(e)}")
+
+@app.get("/api/deployments/history/{application_id}", response_model=List[Deployment])
+async def get_deployment_history(
+    application_id: str,
+    response: Response,
+    environment: str = Query(...),
+    offset: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1, le=1000)
+):
+    """Successful deployments of an application to one environment, newest first"""
+    try:
+        deployments, total = await deployment_service.get_release_history(application_id, environment, offset, limit)
+        response.headers["X-Total-Count"] = str(total)
+        return deployments
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching deployment history: {str(e)}")
+
+@app.post("/api/deployments/plan")
+async def plan_rollout(plan_request: RolloutPlanRequest):
+    """Preview the batches and estimated duration of a rollout strategy"""
+    try:
+        return deployment_executor.rollout_engine.plan(plan_request.dict(), plan_request.replica_seconds)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error planning rollout: {str(e)}")
+
+@app.get("/api/deployments/{deployment_id}/events")
+async def get_deployment_events(
+    deployment_id: str,
+    response: Response,
+    start: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1, le=1000)
+):
+    """A range of a deployment's timeline events, oldest first"""
+    try:
+        timeline = await deployment_service.get_timeline(deployment_id, start, limit)
+        if timeline is None:
             raise HTTPException(status_code=404, detail="Deployment not found")
-        return deployment
+        events, total = timeline
+        response.headers["X-Total-Count"] = str(total)
+        return events
     except HTTPException:
         raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error fetching deployment: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error fetching deployment events: {str(e)}")
 
-@app.post("/api/deployments", response_model=Deployment)
-async def create_deployment(deployment_data: DeploymentCreate):
+@app.get("/api/deployments/{deployment_id}/logs")
+async def get_deployment_logs(
+    deployment_id: str,
+    follow: bool = False,
+    range_header: Optional[str] = Header(None, alias="Range")
+):
+    """Rollout output as text; honours single byte ranges and tails the log with follow=true"""
+    try:
+        if deployment_id not in deployment_service.deployments:
+            raise HTTPException(status_code=404, detail="Deployment not found")
+        logs = deployment_executor.logs
+        size = logs.size(deployment_id)
+        try:
+            byte_range = parse_byte_range(range_header, size)
+        except ValueError:
+            return Response(status_code=416, headers={"Content-Range": f"bytes */{size}"})
+        media_type = "text/plain; charset=utf-8"
+        if follow:
+            def is_finished():
+                deployment = deployment_service.deployments.get(deployment_id)
+                # Only a queued or running rollout can still write to the log
+                return (
+                    deployment is None
+                    or deployment.get("status") not in DEPLOYMENT_TRANSITIONS
+                    or not deployment_executor.is_active(deployment_id)
+                )
+
+            start = byte_range[0] if byte_range else 0
+            return StreamingResponse(logs.follow(deployment_id, start, is_finished), media_type=media_type)
+        if byte_range is None:
+            return StreamingResponse(
+                logs.iter_range(deployment_id, 0, size),
+                media_type=media_type,
+                headers={"Accept-Ranges": "bytes", "Content-Length": str(size)}
+            )
+        start, end = byte_range
+        return StreamingResponse(
+            logs.iter_range(deployment_id, start, end + 1),
+            status_code=206,
+            media_type=media_type,
+            headers={
+                "Accept-Ranges": "bytes",
+                "Content-Range": f"bytes {start}-{end}/{size}",
+                "Content-Length": str(end - start + 1)
+            }
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching deployment logs: {str(e)}")
+
+@app.get("/api/deployments/{deployment_id}/plan")
+async def get_deployment_plan(deployment_id: str, replica_seconds: Optional[float] = Query(None, gt=0)):
     try:
-        deployment = await deployment_service.create_deployment(deployment_data)
+        deployment = deployment_service.deployments.get(deployment_id)
+        if deployment is None:
+            raise HTTPException(status_code=404, detail="Deployment not found")
+        return deployment_executor.rollout_engine.plan(deployment, replica_seconds)
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error planning rollout: {str(e)}")
+
+@app.get("/api/deployments/analytics")
+async def get_deployment_analytics(
+    application_id: Optional[str] = None,
+    environment: Optional[str] = None,
+    days: int = Query(30, ge=1, le=366),
+    until: Optional[str] = None,
+    group_by: Optional[str] = None
+):
+    """Success rate, deploy frequency, MTTR and duration percentiles from incremental rollups"""
+    try:
+        return deployment_service.analytics.query(application_id, environment, days, until, group_by)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching deployment analytics: {str(e)}")
+
+@app.get("/api/deployments/queue")
+async def get_deployment_queue():
+    try:
+        return {
+            **deployment_executor.queue.get_metrics(),
+            "executor": deployment_executor.get_status()
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching deployment queue: {str(e)}")
+
+@app.get("/api/deployments/executor/status")
+async def get_deployment_executor_status():
+    return deployment_executor.get_status()
+
+@app.get("/api/deployments/{deployment_id}", response_model=Deployment)
+async def get_deployment(deployment_id: str, response: Response):
+    try:
+        deployment = await deployment_service.get_deployment_by_id(deployment_id)
         if not deployment:
-            raise HTTPException(status_code=500, detail="Failed to create deployment")
+            raise HTTPException(status_code=404, detail="Deployment not found")
+        response.headers["ETag"] = etag(deployment.revision)
         return deployment
     except HTTPException:
         raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error creating deployment: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error fetching deployment: {str(e)}")
+
+@app.post("/api/deployments", response_model=Deployment)
+async def create_deployment(
+    deployment_data: DeploymentCreate,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
+):
+    async def create():
+        try:
+            deployment_executor.rollout_engine.plan(deployment_data.dict())
+            deployment = await deployment_service.create_deployment(deployment_data)
+            if not deployment:
+                raise HTTPException(status_code=500, detail="Failed to create deployment")
+            deployment_executor.submit(deployment.id)
+            return deployment
+        except HTTPException:
+            raise
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error creating deployment: {str(e)}")
+
+    return await _run_idempotent(idempotency_key, "POST /api/deployments", deployment_data.dict(), create)
 
 @app.put("/api/deployments/{deployment_id}", response_model=Deployment)
-async def update_deployment(deployment_id: str, deployment_data: DeploymentUpdate):
+async def update_deployment(
+    deployment_id: str,
+    deployment_data: DeploymentUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None, alias="If-Match")
+):
     try:
-        deployment = await deployment_service.update_deployment(deployment_id, deployment_data)
+        deployment = await deployment_service.update_deployment(deployment_id, deployment_data, expected_revision=_expected_revision(if_match))
         if not deployment:
             raise HTTPException(status_code=404, detail="Deployment not found")
+        response.headers["ETag"] = etag(deployment.revision)
         return deployment
     except HTTPException:
         raise
+    except RevisionConflictError as e:
+        raise HTTPException(status_code=412, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error updating deployment: {str(e)}")
 
+@app.patch("/api/deployments/{deployment_id}")
+async def patch_deployment(
+    deployment_id: str,
+    patch: Dict[str, Any] = Body(...),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    if_match: Optional[str] = Header(None, alias="If-Match")
+):
+    async def apply():
+        try:
+            result = await deployment_service.patch_deployment(deployment_id, patch, expected_revision=_expected_revision(if_match))
+            if result is None:
+                raise HTTPException(status_code=404, detail="Deployment not found")
+            return result
+        except HTTPException:
+            raise
+        except RevisionConflictError as e:
+            raise HTTPException(status_code=412, detail=str(e))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error patching deployment: {str(e)}")
+
+    return await _run_idempotent(idempotency_key, f"PATCH /api/deployments/{deployment_id}", patch, apply)
+
 @app.delete("/api/deployments/{deployment_id}")
-async def delete_deployment(deployment_id: str):
+async def delete_deployment(
+    deployment_id: str,
+    if_match: Optional[str] = Header(None, alias="If-Match")
+):
     try:
-        success = await deployment_service.delete_deployment(deployment_id)
+        success = await deployment_service.delete_deployment(deployment_id, expected_revision=_expected_revision(if_match))
         if not success:
             raise HTTPException(status_code=404, detail="Deployment not found")
+        deployment_executor.logs.delete(deployment_id)
         return {"message": "Deployment deleted successfully"}
     except HTTPException:
         raise
+    except RevisionConflictError as e:
+        raise HTTPException(status_code=412, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error deleting deployment: {str(e)}")
 
 @app.post("/api/deployments/{deployment_id}/rollback")
-async def rollback_deployment(deployment_id: str):
+async def rollback_deployment(deployment_id: str, steps: int = Query(1, ge=1)):
     try:
-        success = await deployment_service.rollback_deployment(deployment_id)
-        if not success:
+        rollback = await deployment_service.rollback_deployment(deployment_id, steps)
+        if not rollback:
             raise HTTPException(status_code=404, detail="Deployment not found")
-        return {"message": "Deployment rollback initiated successfully"}
+        deployment_executor.submit(rollback.id)
+        return {
+            "message": "Deployment rollback initiated successfully",
+            "deployment_id": rollback.id,
+            "version": rollback.version,
+            "rollback_to": rollback.rollback_to
+        }
     except HTTPException:
         raise
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error rolling back deployment: {str(e)}")
 
+@app.post("/api/deployments/{deployment_id}/cancel")
+async def cancel_deployment(deployment_id: str):
+    try:
+        deployment = deployment_service.deployments.get(deployment_id)
+        if deployment is None:
+            raise HTTPException(status_code=404, detail="Deployment not found")
+        if deployment.get("status") in TERMINAL_STATUSES:
+            raise HTTPException(status_code=409, detail=f"Deployment already finished with status {deployment.get('status')}")
+        status = await deployment_executor.cancel(deployment_id)
+        return {"message": "Deployment cancelled", "status": status}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error cancelling deployment: {str(e)}")
+
+@app.get("/api/releases", response_model=List[Release])
+async def get_releases():
+    try:
+        return await release_service.get_all_releases()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching releases: {str(e)}")
+
+@app.get("/api/releases/{release_id}", response_model=Release)
+async def get_release(release_id: str):
+    try:
+        release = await release_service.get_release_by_id(release_id)
+        if not release:
+            raise HTTPException(status_code=404, detail="Release not found")
+        return release
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching release: {str(e)}")
+
+@app.post("/api/releases/plan")
+async def plan_release(release_data: ReleaseCreate):
+    try:
+        return release_service.plan_release(release_data)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error planning release: {str(e)}")
+
+@app.post("/api/releases", response_model=Release)
+async def create_release(
+    release_data: ReleaseCreate,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
+):
+    async def create():
+        try:
+            return await release_service.create_release(release_data)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error creating release: {str(e)}")
+
+    return await _run_idempotent(idempotency_key, "POST /api/releases", release_data.dict(), create)
+
+@app.post("/api/releases/{release_id}/cancel", response_model=Release)
+async def cancel_release(release_id: str):
+    try:
+        release = await release_service.cancel_release(release_id)
+        if not release:
+            raise HTTPException(status_code=404, detail="Release not found")
+        return release
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error cancelling release: {str(e)}")
+
 @app.get("/api/gitops/repositories", response_model=List[Repository])
 async def get_gitops_repositories():
     try:
@@ -230,11 +883,12 @@ async def get_gitops_repositories():
         raise HTTPException(status_code=500, detail=f"Error fetching GitOps repositories: {str(e)}")
 
 @app.get("/api/gitops/repositories/{repo_id}", response_model=Repository)
-async def get_gitops_repository(repo_id: str):
+async def get_gitops_repository(repo_id: str, response: Response):
     try:
         repository = await gitops_service.get_repository_by_id(repo_id)
         if not repository:
             raise HTTPException(status_code=404, detail="GitOps repository not found")
+        response.headers["ETag"] = etag(repository.revision)
         return repository
     except HTTPException:
         raise
@@ -247,6 +901,7 @@ async def create_gitops_repository(repo_data: RepositoryCreate):
         repository = await gitops_service.create_repository(repo_data)
         if not repository:
             raise HTTPException(status_code=500, detail="Failed to create GitOps repository")
+        sync_scheduler.repository_changed(repository.id)
         return repository
     except HTTPException:
         raise
@@ -254,29 +909,132 @@ async def create_gitops_repository(repo_data: RepositoryCreate):
         raise HTTPException(status_code=500, detail=f"Error creating GitOps repository: {str(e)}")
 
 @app.put("/api/gitops/repositories/{repo_id}", response_model=Repository)
-async def update_gitops_repository(repo_id: str, repo_data: RepositoryUpdate):
+async def update_gitops_repository(
+    repo_id: str,
+    repo_data: RepositoryUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None, alias="If-Match")
+):
     try:
-        repository = await gitops_service.update_repository(repo_id, repo_data)
+        repository = await gitops_service.update_repository(repo_id, repo_data, expected_revision=_expected_revision(if_match))
         if not repository:
             raise HTTPException(status_code=404, detail="GitOps repository not found")
+        if repo_data.syncInterval is not None or repo_data.status is not None:
+            sync_scheduler.repository_changed(repo_id)
+        response.headers["ETag"] = etag(repository.revision)
         return repository
     except HTTPException:
         raise
+    except RevisionConflictError as e:
+        raise HTTPException(status_code=412, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error updating GitOps repository: {str(e)}")
 
 @app.delete("/api/gitops/repositories/{repo_id}")
-async def delete_gitops_repository(repo_id: str):
+async def delete_gitops_repository(
+    repo_id: str,
+    if_match: Optional[str] = Header(None, alias="If-Match")
+):
     try:
-        success = await gitops_service.delete_repository(repo_id)
+        success = await gitops_service.delete_repository(repo_id, expected_revision=_expected_revision(if_match))
         if not success:
             raise HTTPException(status_code=404, detail="GitOps repository not found")
+        sync_scheduler.repository_changed(repo_id)
         return {"message": "GitOps repository deleted successfully"}
     except HTTPException:
         raise
+    except RevisionConflictError as e:
+        raise HTTPException(status_code=412, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error deleting GitOps repository: {str(e)}")
 
+@app.post("/api/gitops/repositories/{repo_id}/sync")
+async def sync_gitops_repository(repo_id: str):
+    """Sync a repository now instead of waiting for its interval"""
+    try:
+        result = await sync_scheduler.sync_now(repo_id)
+        if result is None:
+            raise HTTPException(status_code=404, detail="GitOps repository not found")
+        return result
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"Error syncing GitOps repository: {str(e)}")
+
+@app.get("/api/gitops/repositories/{repo_id}/manifests")
+async def get_gitops_repository_manifests(repo_id: str, commit: Optional[str] = None):
+    """Manifests under the repository's path at a commit, defaulting to the branch head"""
+    try:
+        repository = gitops_service.repositories.get(repo_id)
+        if repository is None:
+            raise HTTPException(status_code=404, detail="GitOps repository not found")
+        return await git_reader.load_manifests(repository, commit)
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except GitError as e:
+        raise HTTPException(status_code=502, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error reading GitOps manifests: {str(e)}")
+
+@app.get("/api/gitops/repositories/{repo_id}/diff")
+async def diff_gitops_repository(repo_id: str, from_commit: str = Query(..., alias="from"), to_commit: Optional[str] = Query(None, alias="to")):
+    """Resources added, modified and removed between two commits; 'to' defaults to the branch head"""
+    try:
+        repository = gitops_service.repositories.get(repo_id)
+        if repository is None:
+            raise HTTPException(status_code=404, detail="GitOps repository not found")
+        return await gitops_service.differ.diff_commits(repository, from_commit, to_commit)
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except GitError as e:
+        raise HTTPException(status_code=502, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error diffing GitOps repository: {str(e)}")
+
+@app.post("/api/gitops/webhook", status_code=202)
+async def git_webhook(webhook_data: Dict[str, Any] = Body(...)):
+    """Queue a push webhook; pushes to one repository and branch within the debounce window deploy once"""
+    try:
+        return webhook_intake.submit(webhook_data)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error processing webhook: {str(e)}")
+
+@app.get("/api/gitops/webhook/status")
+async def get_gitops_webhook_status():
+    return webhook_intake.get_status()
+
+@app.get("/api/gitops/repositories/{repo_id}/deployments", response_model=List[GitOpsDeployment])
+async def get_gitops_repository_deployments(
+    repo_id: str,
+    response: Response,
+    limit: int = Query(50, ge=1, le=1000),
+    cursor: Optional[str] = None
+):
+    try:
+        if repo_id not in gitops_service.repositories:
+            raise HTTPException(status_code=404, detail="GitOps repository not found")
+        deployments, total, next_cursor = await gitops_service.get_repository_deployments(repo_id, limit, cursor)
+        response.headers["X-Total-Count"] = str(total)
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        return deployments
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching repository deployments: {str(e)}")
+
+@app.get("/api/gitops/sync/status")
+async def get_gitops_sync_status():
+    return {**sync_scheduler.get_status(), "reader": git_reader.get_stats()}
+
 @app.get("/api/gitops/deployments", response_model=List[GitOpsDeployment])
 async def get_gitops_deployments():
     try:
@@ -285,12 +1043,44 @@ async def get_gitops_deployments():
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching GitOps deployments: {str(e)}")
 
+@app.get("/api/gitops/deployments/history", response_model=List[GitOpsDeployment])
+async def get_gitops_deployment_history(
+    response: Response,
+    repository_id: Optional[str] = None,
+    status: Optional[str] = None,
+    environment: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=1000),
+    cursor: Optional[str] = None
+):
+    """Newest-first GitOps deployment history; follow X-Next-Cursor for older pages"""
+    try:
+        deployments, total, next_cursor = await gitops_service.get_deployment_history(DeploymentFilter(
+            repository_id=repository_id,
+            status=status,
+            environment=environment,
+            start_date=start_date,
+            end_date=end_date,
+            limit=limit,
+            cursor=cursor
+        ))
+        response.headers["X-Total-Count"] = str(total)
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        return deployments
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching GitOps deployment history: {str(e)}")
+
 @app.get("/api/gitops/deployments/{deployment_id}", response_model=GitOpsDeployment)
-async def get_gitops_deployment(deployment_id: str):
+async def get_gitops_deployment(deployment_id: str, response: Response):
     try:
         deployment = await gitops_service.get_gitops_deployment_by_id(deployment_id)
         if not deployment:
             raise HTTPException(status_code=404, detail="GitOps deployment not found")
+        response.headers["ETag"] = etag(deployment.revision)
         return deployment
     except HTTPException:
         raise
@@ -310,26 +1100,39 @@ async def create_gitops_deployment(deployment_data: GitOpsDeploymentCreate):
         raise HTTPException(status_code=500, detail=f"Error creating GitOps deployment: {str(e)}")
 
 @app.put("/api/gitops/deployments/{deployment_id}", response_model=GitOpsDeployment)
-async def update_gitops_deployment(deployment_id: str, deployment_data: GitOpsDeploymentUpdate):
+async def update_gitops_deployment(
+    deployment_id: str,
+    deployment_data: GitOpsDeploymentUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None, alias="If-Match")
+):
     try:
-        deployment = await gitops_service.update_gitops_deployment(deployment_id, deployment_data)
+        deployment = await gitops_service.update_gitops_deployment(deployment_id, deployment_data, expected_revision=_expected_revision(if_match))
         if not deployment:
             raise HTTPException(status_code=404, detail="GitOps deployment not found")
+        response.headers["ETag"] = etag(deployment.revision)
         return deployment
     except HTTPException:
         raise
+    except RevisionConflictError as e:
+        raise HTTPException(status_code=412, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error updating GitOps deployment: {str(e)}")
 
 @app.delete("/api/gitops/deployments/{deployment_id}")
-async def delete_gitops_deployment(deployment_id: str):
+async def delete_gitops_deployment(
+    deployment_id: str,
+    if_match: Optional[str] = Header(None, alias="If-Match")
+):
     try:
-        success = await gitops_service.delete_gitops_deployment(deployment_id)
+        success = await gitops_service.delete_gitops_deployment(deployment_id, expected_revision=_expected_revision(if_match))
         if not success:
             raise HTTPException(status_code=404, detail="GitOps deployment not found")
         return {"message": "GitOps deployment deleted successfully"}
     except HTTPException:
         raise
+    except RevisionConflictError as e:
+        raise HTTPException(status_code=412, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error deleting GitOps deployment: {str(e)}")
 
@@ -342,11 +1145,12 @@ async def get_clusters():
         raise HTTPException(status_code=500, detail=f"Error fetching clusters: {str(e)}")
 
 @app.get("/api/clusters/{cluster_id}", response_model=Cluster)
-async def get_cluster(cluster_id: str):
+async def get_cluster(cluster_id: str, response: Response):
     try:
         cluster = await cluster_service.get_cluster_by_id(cluster_id)
         if not cluster:
             raise HTTPException(status_code=404, detail="Cluster not found")
+        response.headers["ETag"] = etag(cluster.revision)
         return cluster
     except HTTPException:
         raise
@@ -354,38 +1158,81 @@ async def get_cluster(cluster_id: str):
         raise HTTPException(status_code=500, detail=f"Error fetching cluster: {str(e)}")
 
 @app.post("/api/clusters", response_model=Cluster)
-async def create_cluster(cluster_data: ClusterCreate):
-    try:
-        cluster = await cluster_service.create_cluster(cluster_data)
-        if not cluster:
-            raise HTTPException(status_code=500, detail="Failed to create cluster")
-        return cluster
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error creating cluster: {str(e)}")
+async def create_cluster(
+    cluster_data: ClusterCreate,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
+):
+    async def create():
+        try:
+            cluster = await cluster_service.create_cluster(cluster_data)
+            if not cluster:
+                raise HTTPException(status_code=500, detail="Failed to create cluster")
+            return cluster
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error creating cluster: {str(e)}")
+
+    return await _run_idempotent(idempotency_key, "POST /api/clusters", cluster_data.dict(), create)
 
 @app.put("/api/clusters/{cluster_id}", response_model=Cluster)
-async def update_cluster(cluster_id: str, cluster_data: ClusterUpdate):
+async def update_cluster(
+    cluster_id: str,
+    cluster_data: ClusterUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None, alias="If-Match")
+):
     try:
-        cluster = await cluster_service.update_cluster(cluster_id, cluster_data)
+        cluster = await cluster_service.update_cluster(cluster_id, cluster_data, expected_revision=_expected_revision(if_match))
         if not cluster:
             raise HTTPException(status_code=404, detail="Cluster not found")
+        response.headers["ETag"] = etag(cluster.revision)
         return cluster
     except HTTPException:
         raise
+    except RevisionConflictError as e:
+        raise HTTPException(status_code=412, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error updating cluster: {str(e)}")
 
+@app.patch("/api/clusters/{cluster_id}")
+async def patch_cluster(
+    cluster_id: str,
+    patch: Dict[str, Any] = Body(...),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    if_match: Optional[str] = Header(None, alias="If-Match")
+):
+    async def apply():
+        try:
+            result = await cluster_service.patch_cluster(cluster_id, patch, expected_revision=_expected_revision(if_match))
+            if result is None:
+                raise HTTPException(status_code=404, detail="Cluster not found")
+            return result
+        except HTTPException:
+            raise
+        except RevisionConflictError as e:
+            raise HTTPException(status_code=412, detail=str(e))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error patching cluster: {str(e)}")
+
+    return await _run_idempotent(idempotency_key, f"PATCH /api/clusters/{cluster_id}", patch, apply)
+
 @app.delete("/api/clusters/{cluster_id}")
-async def delete_cluster(cluster_id: str):
+async def delete_cluster(
+    cluster_id: str,
+    if_match: Optional[str] = Header(None, alias="If-Match")
+):
     try:
-        success = await cluster_service.delete_cluster(cluster_id)
+        success = await cluster_service.delete_cluster(cluster_id, expected_revision=_expected_revision(if_match))
         if not success:
             raise HTTPException(status_code=404, detail="Cluster not found")
         return {"message": "Cluster deleted successfully"}
     except HTTPException:
         raise
+    except RevisionConflictError as e:
+        raise HTTPException(status_code=412, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error deleting cluster: {str(e)}")
 
@@ -401,6 +1248,26 @@ async def update_cluster_metrics(cluster_id: str, metrics: ClusterMetrics):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error updating cluster metrics: {str(e)}")
 
+@app.get("/api/consistency/deployment-counts")
+async def verify_deployment_counts():
+    """Compare the maintained deployment counters with a full tally"""
+    try:
+        clusters = cluster_service.verify_deployment_counts(deployment_service.deployments.values())
+        repositories = gitops_service.verify_deployment_counts()
+        return {"consistent": not clusters and not repositories, "clusters": clusters, "repositories": repositories}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error verifying deployment counts: {str(e)}")
+
+@app.post("/api/consistency/deployment-counts/repair")
+async def repair_deployment_counts():
+    """Overwrite drifted deployment counters with a full tally"""
+    try:
+        clusters = cluster_service.verify_deployment_counts(deployment_service.deployments.values(), repair=True)
+        repositories = gitops_service.verify_deployment_counts(repair=True)
+        return {"repaired": len(clusters) + len(repositories), "clusters": clusters, "repositories": repositories}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error repairing deployment counts: {str(e)}")
+
 @app.get("/api/logs", response_model=List[LogEntry])
 async def get_logs(
     level: Optional[str] = None,
@@ -426,11 +1293,12 @@ async def get_logs(
         raise HTTPException(status_code=500, detail=f"Error fetching logs: {str(e)}")
 
 @app.get("/api/logs/{log_id}", response_model=LogEntry)
-async def get_log(log_id: str):
+async def get_log(log_id: str, response: Response):
     try:
         log = await logs_service.get_log_by_id(log_id)
         if not log:
             raise HTTPException(status_code=404, detail="Log entry not found")
+        response.headers["ETag"] = etag(log.revision)
         return log
     except HTTPException:
         raise
@@ -450,14 +1318,19 @@ async def create_log(log_data: LogEntryCreate):
         raise HTTPException(status_code=500, detail=f"Error creating log entry: {str(e)}")
 
 @app.delete("/api/logs/{log_id}")
-async def delete_log(log_id: str):
+async def delete_log(
+    log_id: str,
+    if_match: Optional[str] = Header(None, alias="If-Match")
+):
     try:
-        success = await logs_service.delete_log(log_id)
+        success = await logs_service.delete_log(log_id, expected_revision=_expected_revision(if_match))
         if not success:
             raise HTTPException(status_code=404, detail="Log entry not found")
         return {"message": "Log entry deleted successfully"}
     except HTTPException:
         raise
+    except RevisionConflictError as e:
+        raise HTTPException(status_code=412, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error deleting log entry: {str(e)}")
 
@@ -51,20 +51,6 @@ async def startup_event():
     try:
         await seed_initial_data()
         
-        # Recalculate deployment counts for clusters
-        try:
-            await cluster_service.recalculate_deployment_counts()
-            print("✅ Deployment counts recalculated")
-        except Exception as e:
-            print(f"⚠️ Error recalculating deployment counts: {e}")
-        
-        # Sync GitOps with main deployments
-        try:
-            await gitops_service.sync_with_main_deployments()
-            print("✅ GitOps synchronized with main deployments")
-        except Exception as e:
-            print(f"⚠️ Error syncing GitOps: {e}")
-        
         print("✅ Application started successfully")
     except Exception as e:
         print(f"❌ Error during startup: {e}")
@@ -772,16 +758,6 @@ async def get_logs_by_deployment(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching deployment logs: {str(e)}")
 
-# Endpoint to recalculate deployment counts in clusters
-@app.post("/api/clusters/recalculate-deployment-counts")
-async def recalculate_cluster_deployment_counts():
-    """Recalculate deployment counts for all clusters"""
-    try:
-        await cluster_service.recalculate_deployment_counts()
-        return {"message": "Deployment counts recalculated successfully"}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error recalculating deployment counts: {str(e)}")
-
 # Enhanced cluster endpoint to include deployment information
 @app.get("/api/clusters/{cluster_id}/with-deployments")
 async def get_cluster_with_deployments(cluster_id: str):
@@ -831,25 +807,6 @@ async def get_application_with_logs(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching application with logs: {str(e)}")
 
-# GitOps synchronization endpoints
-@app.post("/api/gitops/sync-deployment-counts")
-async def sync_gitops_deployment_counts():
-    """Sync GitOps deployment counts with main deployments"""
-    try:
-        await gitops_service.sync_with_main_deployments()
-        return {"message": "GitOps deployment counts synchronized successfully"}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error syncing GitOps deployment counts: {str(e)}")
-
-@app.post("/api/gitops/recalculate-deployment-counts")
-async def recalculate_gitops_deployment_counts():
-    """Recalculate GitOps deployment counts"""
-    try:
-        await gitops_service.recalculate_deployment_counts()
-        return {"message": "GitOps deployment counts recalculated successfully"}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error recalculating GitOps deployment counts: {str(e)}")
-
 @app.get("/api/gitops/deployment-counts")
 async def get_gitops_deployment_counts():
     """Get current GitOps deployment counts for all repositories"""
@@ -0,0 +1,87 @@
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.application_service import ApplicationService
+from services.health_prober import HealthProber
+
+TARGETS = 1000
+INTERVAL = 2.0
+DURATION = 10.0
+CONCURRENCY = 200
+
+
+async def handle_stub_request(reader, writer):
+    try:
+        await reader.readuntil(b"\r\n\r\n")
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\nConnection: close\r\n\r\nok")
+        await writer.drain()
+    except Exception:
+        pass
+    finally:
+        writer.close()
+
+
+async def bench_health_prober():
+    server = await asyncio.start_server(handle_stub_request, "127.0.0.1", 0, backlog=4096)
+    port = server.sockets[0].getsockname()[1]
+
+    service = ApplicationService()
+    service.data_file = os.path.join(tempfile.mkdtemp(), "applications.json")
+    service.applications = {
+        f"bench-{i}": {
+            "id": f"bench-{i}",
+            "name": f"bench-{i}",
+            "health": {},
+            "healthCheck": {
+                "type": "http" if i % 2 else "tcp",
+                "url": f"http://127.0.0.1:{port}/healthz/{i}",
+                "host": "127.0.0.1",
+                "port": port,
+                "interval": INTERVAL,
+                "timeout": 1.0
+            }
+        }
+        for i in range(TARGETS)
+    }
+
+    flushes = 0
+    batch_update = service.update_health_batch
+
+    async def counting_batch_update(updates, **kwargs):
+        nonlocal flushes
+        flushes += 1
+        return await batch_update(updates, **kwargs)
+
+    service.update_health_batch = counting_batch_update
+
+    prober = HealthProber(service, max_concurrency=CONCURRENCY)
+    started = time.perf_counter()
+    prober.start()
+    await asyncio.sleep(DURATION)
+    await prober.stop()
+    elapsed = time.perf_counter() - started
+    server.close()
+    await server.wait_closed()
+
+    checked = [app["health"] for app in service.applications.values() if app["health"]]
+    healthy = sum(1 for health in checked if health["status"] == "Healthy")
+    response_times = sorted(health["responseTime"] for health in checked)
+    expected = TARGETS * DURATION / INTERVAL
+
+    print(f"Targets:            {TARGETS} (interval {INTERVAL}s, concurrency {CONCURRENCY})")
+    print(f"Probes run:         {prober.probes_run} in {elapsed:.1f}s ({prober.probes_run / elapsed:.0f}/s, ~{expected:.0f} scheduled)")
+    print(f"Targets reported:   {len(checked)} ({healthy} healthy)")
+    print(f"Batch flushes:      {flushes}")
+    if response_times:
+        print(f"Rolling resp. time: p50={response_times[len(response_times) // 2]}ms max={response_times[-1]}ms")
+    latency = service.latency_store.summary("bench-1")
+    print(f"Probe latency:      {latency['quantiles']} over {latency['count']} samples")
+
+
+if __name__ == "__main__":
+    asyncio.run(bench_health_prober())
@@ -0,0 +1,68 @@
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.scanner_service import ScannerService
+
+ADVISORIES = 200_000
+PACKAGES = 20_000
+SBOM_SIZE = 2_000
+
+
+def write_advisories(path: str, rng: random.Random):
+    with open(path, "w") as f:
+        for i in range(ADVISORIES):
+            major, minor = rng.randint(0, 5), rng.randint(0, 20)
+            record = {
+                "id": f"GHSA-bench-{i}",
+                "aliases": [f"CVE-2024-{i}"],
+                "summary": f"Benchmark advisory {i}",
+                "database_specific": {"severity": rng.choice(["LOW", "MODERATE", "HIGH", "CRITICAL"])},
+                "affected": [{
+                    "package": {"ecosystem": "npm", "name": f"pkg-{rng.randrange(PACKAGES)}"},
+                    "ranges": [{
+                        "type": "SEMVER",
+                        "events": [{"introduced": f"{major}.{minor}.0"}, {"fixed": f"{major}.{minor + rng.randint(1, 3)}.0"}]
+                    }]
+                }]
+            }
+            f.write(json.dumps(record) + "\n")
+
+
+def bench_scanner():
+    rng = random.Random(42)
+    path = os.path.join(tempfile.mkdtemp(), "advisories.ndjson")
+    write_advisories(path, rng)
+
+    started = time.perf_counter()
+    scanner = ScannerService(
+        application_service=None,
+        advisories_file=path,
+        inventory_file=os.path.join(os.path.dirname(path), "sboms.json")
+    )
+    load_s = time.perf_counter() - started
+
+    sbom = [
+        (f"pkg-{rng.randrange(PACKAGES)}", f"{rng.randint(0, 5)}.{rng.randint(0, 22)}.{rng.randint(0, 9)}")
+        for _ in range(SBOM_SIZE)
+    ]
+
+    runs = 20
+    started = time.perf_counter()
+    for _ in range(runs):
+        findings = scanner.match_packages(sbom)
+    match_ms = (time.perf_counter() - started) * 1000 / runs
+
+    print(f"Advisories loaded:  {len(scanner.advisories)} for {len(scanner.packages)} packages in {load_s:.2f}s")
+    print(f"SBOM packages:      {SBOM_SIZE}")
+    print(f"Findings:           {len(findings)}")
+    print(f"Match time:         {match_ms:.2f}ms per SBOM (avg of {runs})")
+
+
+if __name__ == "__main__":
+    bench_scanner()
@@ -0,0 +1,26 @@
+import json
+import os
+
+
+def _json_env(name, default):
+    value = os.getenv(name)
+    if not value:
+        return default
+    try:
+        return json.loads(value)
+    except ValueError:
+        print(f"Ignoring invalid JSON in {name}")
+        return default
+
+
+def get_scheduler_config():
+    """Deployment executor limits and fair-share weights, overridable through the environment"""
+    return {
+        "max_workers": int(os.getenv('DEPLOY_MAX_WORKERS', '8')),
+        "cluster_limit": int(os.getenv('DEPLOY_CLUSTER_LIMIT', '2')),
+        "environment_limits": _json_env('DEPLOY_ENVIRONMENT_LIMITS', {"production": 2}),
+        "default_environment_limit": int(os.getenv('DEPLOY_DEFAULT_ENVIRONMENT_LIMIT', '4')),
+        # team -> relative share of each priority level, e.g. {"payments": 2, "web": 1}
+        "team_weights": _json_env('DEPLOY_TEAM_WEIGHTS', {}),
+        "default_team_weight": float(os.getenv('DEPLOY_DEFAULT_TEAM_WEIGHT', '1.0'))
+    }
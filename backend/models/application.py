@@ -9,6 +9,14 @@ class HealthStatus(BaseModel):
     uptime: int
     errorRate: float
 
+class HealthCheckConfig(BaseModel):
+    type: str = "http"
+    url: Optional[str] = None
+    host: Optional[str] = None
+    port: Optional[int] = None
+    interval: int = 30
+    timeout: float = 5.0
+
 class CPUMetrics(BaseModel):
     current: float
     limit: float
@@ -70,6 +78,7 @@ class Vulnerability(BaseModel):
     fixedIn: str
     discovered: str
     status: str
+    source: Optional[str] = None
 
 class Application(BaseModel):
     id: str
@@ -91,6 +100,8 @@ class Application(BaseModel):
     tags: List[str]
     owner: str
     team: str
+    healthCheck: Optional[HealthCheckConfig] = None
+    revision: int = 0
 
 class ApplicationCreate(BaseModel):
     name: str
@@ -104,6 +115,7 @@ class ApplicationCreate(BaseModel):
     tags: List[str]
     owner: str
     team: str
+    healthCheck: Optional[HealthCheckConfig] = None
 
 class ApplicationUpdate(BaseModel):
     name: Optional[str] = None
@@ -114,4 +126,6 @@ class ApplicationUpdate(BaseModel):
     environment: Optional[str] = None
     tags: Optional[List[str]] = None
     owner: Optional[str] = None
-    team: Optional[str] = None 
\ No newline at end of file
+    team: Optional[str] = None
+    image: Optional[str] = None
+    healthCheck: Optional[HealthCheckConfig] = None 
\ No newline at end of file
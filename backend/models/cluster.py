@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Optional, List, Dict, Any
 from datetime import datetime
 
 class Cluster(BaseModel):
@@ -9,11 +9,18 @@ class Cluster(BaseModel):
     region: str
     environment: str
     version: str
-    node_count: int
+    node_count: int = 0
     deployment_count: int = 0
+    deployment_status_counts: Dict[str, int] = {}
     status: str = "Active"
-    created_at: datetime
-    updated_at: datetime
+    description: str = ""
+    created: str
+    updated: str
+    last_health_check: Optional[str] = None
+    metrics: Optional[Dict[str, Any]] = None
+    pod_count: int = 0
+    namespace_count: int = 0
+    revision: int = 0
 
 class ClusterCreate(BaseModel):
     name: str
@@ -22,6 +29,7 @@ class ClusterCreate(BaseModel):
     environment: str
     version: str
     node_count: int
+    description: Optional[str] = ""
 
 class ClusterUpdate(BaseModel):
     name: Optional[str] = None
@@ -31,12 +39,14 @@ class ClusterUpdate(BaseModel):
     version: Optional[str] = None
     node_count: Optional[int] = None
     status: Optional[str] = None
+    description: Optional[str] = None
 
 class ClusterMetrics(BaseModel):
     cpu_usage: float
     memory_usage: float
-    disk_usage: float
-    network_io: float
+    disk_usage: float = 0.0
+    network_io: float = 0.0
     pod_count: int
     node_count: int
-    deployment_count: int 
\ No newline at end of file
+    namespace_count: int = 0
+    deployment_count: int = 0 
\ No newline at end of file
@@ -8,12 +8,14 @@ class DeploymentResources(BaseModel):
 
 class DeploymentCreate(BaseModel):
     application_id: str
+    cluster_id: Optional[str] = None
     version: str
     environment: str
     commit_hash: str
     description: Optional[str] = ""
     triggered_by: Optional[str] = "admin@company.com"
     deployment_strategy: Optional[str] = "rolling"
+    strategy_options: Optional[Dict[str, Any]] = None
     replicas: Optional[int] = 1
     resources: Optional[DeploymentResources] = None
 
@@ -22,12 +24,14 @@ class DeploymentUpdate(BaseModel):
     status: Optional[str] = None
     description: Optional[str] = None
     deployment_strategy: Optional[str] = None
+    strategy_options: Optional[Dict[str, Any]] = None
     replicas: Optional[int] = None
     resources: Optional[DeploymentResources] = None
 
 class Deployment(BaseModel):
     id: str
     application_id: str
+    cluster_id: Optional[str] = None
     version: str
     status: str
     commit_hash: str
@@ -40,7 +44,20 @@ class Deployment(BaseModel):
     description: str
     triggered_by: str
     rollback_version: str
+    rollback_of: Optional[str] = None
+    rollback_to: Optional[str] = None
     deployment_strategy: str
+    strategy_options: Optional[Dict[str, Any]] = None
+    estimated_duration: Optional[float] = None
+    finished_at: Optional[str] = None
     replicas: int
     resources: DeploymentResources
-    application: Optional[Dict[str, Any]] = None 
\ No newline at end of file
+    application: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    revision: int = 0
+
+class RolloutPlanRequest(BaseModel):
+    deployment_strategy: str = "rolling"
+    strategy_options: Optional[Dict[str, Any]] = None
+    replicas: int = 1
+    replica_seconds: Optional[float] = None
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Optional, List, Dict, Any
 from datetime import datetime
 
 class Repository(BaseModel):
@@ -13,10 +13,17 @@ class Repository(BaseModel):
     autoDeploy: bool
     syncInterval: int = 300
     deploymentCount: int = 0
-    lastSync: Optional[datetime] = None
+    deploymentStatusCounts: Dict[str, int] = {}
+    commitCount: int = 0
+    lastSync: Optional[str] = None
+    lastCommit: Optional[str] = None
+    syncStatus: Optional[str] = None
+    lastSyncError: Optional[str] = None
+    lastDeployed: Optional[str] = None
     status: str = "Active"
-    created_at: datetime
-    updated_at: datetime
+    created: Optional[str] = None
+    updated: Optional[str] = None
+    revision: int = 0
 
 class RepositoryCreate(BaseModel):
     name: str
@@ -47,11 +54,15 @@ class GitOpsDeployment(BaseModel):
     environment: str
     description: str
     triggered_by: str
-    author: str
+    author: str = ""
     status: str
     duration: Optional[int] = None
-    created_at: datetime
-    updated_at: datetime
+    deployed_at: Optional[str] = None
+    logs_url: Optional[str] = None
+    changes: Optional[Dict[str, Any]] = None
+    created: str
+    updated: str
+    revision: int = 0
 
 class GitOpsDeploymentCreate(BaseModel):
     repository_id: str
@@ -61,6 +72,7 @@ class GitOpsDeploymentCreate(BaseModel):
     description: str
     triggered_by: str
     author: str
+    changes: Optional[Dict[str, Any]] = None
 
 class GitOpsDeploymentUpdate(BaseModel):
     commit_hash: Optional[str] = None
@@ -68,4 +80,13 @@ class GitOpsDeploymentUpdate(BaseModel):
     environment: Optional[str] = None
     description: Optional[str] = None
     status: Optional[str] = None
-    duration: Optional[int] = None 
\ No newline at end of file
+    duration: Optional[int] = None 
+
+class DeploymentFilter(BaseModel):
+    repository_id: Optional[str] = None
+    status: Optional[str] = None
+    environment: Optional[str] = None
+    start_date: Optional[str] = None
+    end_date: Optional[str] = None
+    limit: Optional[int] = 50
+    cursor: Optional[str] = None
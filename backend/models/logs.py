@@ -11,6 +11,8 @@ class LogEntry(BaseModel):
     deployment_id: Optional[str] = None
     timestamp: datetime
     metadata: Optional[dict] = None
+    details: Optional[dict] = None
+    revision: int = 0
 
 class LogEntryCreate(BaseModel):
     level: str
@@ -19,6 +21,7 @@ class LogEntryCreate(BaseModel):
     application_id: Optional[str] = None
     deployment_id: Optional[str] = None
     metadata: Optional[dict] = None
+    details: Optional[dict] = None
 
 class LogFilter(BaseModel):
     level: Optional[str] = None
@@ -0,0 +1,42 @@
+from pydantic import BaseModel
+from typing import Optional, List
+from models.deployment import DeploymentCreate
+
+class ReleaseStepCreate(BaseModel):
+    name: str
+    deployment: DeploymentCreate
+    depends_on: List[str] = []
+
+class ReleaseCreate(BaseModel):
+    name: str
+    description: Optional[str] = ""
+    triggered_by: Optional[str] = "admin@company.com"
+    steps: List[ReleaseStepCreate]
+
+class ReleaseStep(BaseModel):
+    name: str
+    deployment: DeploymentCreate
+    depends_on: List[str] = []
+    wave: int
+    status: str
+    deployment_id: Optional[str] = None
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    duration: Optional[float] = None
+    reason: Optional[str] = None
+
+class Release(BaseModel):
+    id: str
+    name: str
+    description: str
+    triggered_by: str
+    status: str
+    steps: List[ReleaseStep]
+    waves: List[List[str]]
+    critical_path: List[str] = []
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    duration: Optional[float] = None
+    created: str
+    updated: str
+    revision: int = 0
@@ -1,14 +1,69 @@
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Set, Tuple
 from datetime import datetime
+import asyncio
 import uuid
 import json
 import os
 from models.application import Application, ApplicationCreate, ApplicationUpdate
+from services.metrics_store import MetricsStore
+from services.latency_store import LatencyStore
+from services.vulnerability_index import VulnerabilityIndex
+from utils.indexing import SecondaryIndex, TextIndex, decode_cursor, encode_cursor, paginate_sorted
+from utils.merge_patch import apply_model_patch, value_at
+from utils.revisions import RevisionConflictError, bump_revision, check_revision
+
+SORTABLE_FIELDS = {
+    "name": lambda app: (app.get("name") or "").lower(),
+    "created": lambda app: app.get("created") or "",
+    "updated": lambda app: app.get("updated") or "",
+    "status": lambda app: app.get("status") or "",
+    "environment": lambda app: app.get("environment") or "",
+    "team": lambda app: app.get("team") or "",
+    "replicas": lambda app: app.get("replicas") or 0,
+}
+
+DEFAULT_METRICS = {
+    "cpu": {"current": 0.0, "limit": 2.0, "unit": "cores"},
+    "memory": {"current": 0, "limit": 1024, "unit": "Mi"},
+    "network": {"bytesIn": 0, "bytesOut": 0},
+    "requests": {"total": 0, "perSecond": 0.0, "errors": 0}
+}
+# Configuration rather than samples; everything else comes from the metrics store
+PERSISTED_METRIC_FIELDS = {"limit", "unit"}
+
+
+def _valid_metric_value(field: str, value: Any) -> bool:
+    if field == "unit":
+        return isinstance(value, str)
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def validate_metrics(metrics: Any):
+    """Raise ValueError unless every known metrics group in a sample is an object of well-typed fields"""
+    if not isinstance(metrics, dict):
+        raise ValueError("Metrics must be an object")
+    for group, defaults in DEFAULT_METRICS.items():
+        if group not in metrics:
+            continue
+        values = metrics[group]
+        if not isinstance(values, dict):
+            raise ValueError(f"Metrics group '{group}' must be an object")
+        for field, value in values.items():
+            if field in defaults and not _valid_metric_value(field, value):
+                raise ValueError(f"Invalid value for metrics field '{group}.{field}'")
 
 class ApplicationService:
     def __init__(self):
         self.applications = {}
         self.data_file = "data/applications.json"
+        self._index = SecondaryIndex(["environment", "status", "team", "tags"], multi_valued=["tags"])
+        self._name_index = TextIndex()
+        self.vulnerability_index = VulnerabilityIndex()
+        self.metrics_store = MetricsStore()
+        self.latency_store = LatencyStore()
+        self._lock = asyncio.Lock()
+        # Probed health is applied in memory and the file rewritten lazily
+        self._dirty = False
         self._load_data()
 
     def _load_data(self):
@@ -25,16 +80,59 @@ class ApplicationService:
         except Exception as e:
             print(f"Error loading data: {e}")
             self.applications = {}
+        self._rebuild_indexes()
+
+    def _rebuild_indexes(self):
+        """Rebuild the secondary indexes from the loaded applications"""
+        self._index.clear()
+        self._name_index.clear()
+        self.vulnerability_index = VulnerabilityIndex()
+        for app_id, app in self.applications.items():
+            self._index_application(app_id, app)
+            for vulnerability in app.get('vulnerabilities') or []:
+                if vulnerability.get('id'):
+                    self.vulnerability_index.add(app_id, app.get('team', ''), vulnerability)
+
+    def _index_application(self, app_id: str, app: Dict[str, Any]):
+        self._index.add(app_id, app)
+        self._name_index.add(app_id, app.get("name"))
+
+    def _unindex_application(self, app_id: str, app: Dict[str, Any]):
+        self._index.remove(app_id, app)
+        self._name_index.remove(app_id, app.get("name"))
+
+    def _persisted_metrics(self, metrics: Dict[str, Any]) -> Dict[str, Any]:
+        """Metrics as written to disk: configured limits and units kept, samples reset to their defaults"""
+        persisted = {}
+        for group, defaults in DEFAULT_METRICS.items():
+            values = metrics.get(group) if isinstance(metrics, dict) else None
+            values = values if isinstance(values, dict) else {}
+            persisted[group] = {
+                field: values[field] if field in PERSISTED_METRIC_FIELDS and _valid_metric_value(field, values.get(field)) else default
+                for field, default in defaults.items()
+            }
+        return persisted
 
     def _save_data(self):
         """Save applications to JSON file"""
         try:
             os.makedirs(os.path.dirname(self.data_file), exist_ok=True)
+            # Metric samples are volatile and live in the metrics store only
+            documents = [
+                {**app, "metrics": self._persisted_metrics(app.get("metrics") or {})}
+                for app in self.applications.values()
+            ]
             with open(self.data_file, 'w') as f:
-                json.dump(list(self.applications.values()), f, indent=2)
+                json.dump(documents, f, indent=2)
+            self._dirty = False
         except Exception as e:
             print(f"Error saving data: {e}")
 
+    def flush(self):
+        """Write the applications file if health updates have only been applied in memory so far"""
+        if self._dirty:
+            self._save_data()
+
     async def get_all_applications(self) -> List[Application]:
         """Get all applications"""
         try:
@@ -43,6 +141,55 @@ class ApplicationService:
             print(f"Error fetching applications: {e}")
             return []
 
+    async def query_applications(
+        self,
+        environment: Optional[List[str]] = None,
+        status: Optional[List[str]] = None,
+        team: Optional[List[str]] = None,
+        tags: Optional[List[str]] = None,
+        search: Optional[str] = None,
+        sort: str = "name",
+        offset: int = 0,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Application], int, Optional[str]]:
+        """Filter, sort and paginate applications using the secondary indexes.
+
+        Values within one field are OR-ed, fields are AND-ed and tags must all
+        be present. Returns the page, the total match count and the cursor for
+        the next page.
+        """
+        descending = sort.startswith("-")
+        sort_field = sort.lstrip("-")
+        if sort_field not in SORTABLE_FIELDS:
+            raise ValueError(f"Unsupported sort field: {sort_field}")
+
+        candidates: List[Set[str]] = []
+        for field, values in (("environment", environment), ("status", status), ("team", team)):
+            if values:
+                candidates.append(self._index.lookup_any(field, values))
+        if tags:
+            candidates.append(self._index.lookup_all("tags", tags))
+        if search and search.strip():
+            candidates.append(self._name_index.search(search))
+
+        if candidates:
+            candidates.sort(key=len)
+            matched = set(candidates[0])
+            for ids in candidates[1:]:
+                matched &= ids
+        else:
+            matched = set(self.applications)
+
+        sort_key = SORTABLE_FIELDS[sort_field]
+        keyed = sorted((sort_key(self.applications[app_id]), app_id) for app_id in matched)
+        position = decode_cursor(cursor) if cursor else None
+        page_ids, next_position = paginate_sorted(keyed, descending, offset, limit, position)
+
+        page = [Application(**self.applications[app_id]) for app_id in page_ids]
+        next_cursor = encode_cursor(*next_position) if next_position else None
+        return page, len(keyed), next_cursor
+
     async def get_application_by_id(self, app_id: str) -> Optional[Application]:
         """Get a specific application by ID"""
         try:
@@ -110,13 +257,16 @@ class ApplicationService:
                 "resources": app_data.resources.dict() if hasattr(app_data.resources, 'dict') else {},
                 "logs": [],
                 "vulnerabilities": [],
+                "revision": 1,
                 "tags": app_data.tags,
                 "owner": app_data.owner,
-                "team": app_data.team
+                "team": app_data.team,
+                "healthCheck": app_data.healthCheck.dict() if app_data.healthCheck else None
             }
             
             # Save to memory and file
             self.applications[app_id] = application_doc
+            self._index_application(app_id, application_doc)
             self._save_data()
             
             return Application(**application_doc)
@@ -124,64 +274,200 @@ class ApplicationService:
             print(f"Error creating application: {e}")
             return None
 
-    async def update_application(self, app_id: str, app_data: ApplicationUpdate) -> Optional[Application]:
+    async def update_application(
+        self,
+        app_id: str,
+        app_data: ApplicationUpdate,
+        expected_revision: Optional[int] = None
+    ) -> Optional[Application]:
         """Update an existing application"""
         try:
             if app_id not in self.applications:
                 return None
             
             current_app = self.applications[app_id]
+            check_revision(current_app, expected_revision)
             current_time = datetime.now().isoformat()
             
             # Update fields
             update_data = app_data.dict(exclude_unset=True)
+            self._unindex_application(app_id, current_app)
             for key, value in update_data.items():
                 current_app[key] = value
             
             current_app['updated'] = current_time
+            bump_revision(current_app)
+            self._index_application(app_id, current_app)
+            self.vulnerability_index.set_team(app_id, current_app.get('team', ''))
             
             # Save to file
             self._save_data()
             
             return Application(**current_app)
+        except RevisionConflictError:
+            raise
         except Exception as e:
             print(f"Error updating application {app_id}: {e}")
             return None
 
-    async def delete_application(self, app_id: str) -> bool:
+    async def patch_application(
+        self,
+        app_id: str,
+        patch: Dict[str, Any],
+        expected_revision: Optional[int] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Apply a JSON merge patch, writing only when something changed"""
+        try:
+            if app_id not in self.applications:
+                return None
+            current_app = self.applications[app_id]
+            check_revision(current_app, expected_revision)
+            merged, changed = apply_model_patch(current_app, patch, ApplicationUpdate, Application)
+            if changed:
+                self._unindex_application(app_id, current_app)
+                for key in patch:
+                    if key in merged:
+                        current_app[key] = merged[key]
+                    else:
+                        current_app.pop(key, None)
+                current_app['updated'] = datetime.now().isoformat()
+                bump_revision(current_app)
+                self._index_application(app_id, current_app)
+                self.vulnerability_index.set_team(app_id, current_app.get('team', ''))
+                self._save_data()
+            return {
+                "id": app_id,
+                "updated": current_app.get('updated'),
+                "revision": current_app.get('revision', 0),
+                "changes": {path: value_at(current_app, path) for path in changed}
+            }
+        except (ValueError, RevisionConflictError):
+            raise
+        except Exception as e:
+            print(f"Error patching application {app_id}: {e}")
+            return None
+
+    async def delete_application(self, app_id: str, expected_revision: Optional[int] = None) -> bool:
         """Delete an application"""
         try:
             if app_id in self.applications:
-                del self.applications[app_id]
+                check_revision(self.applications[app_id], expected_revision)
+                self._unindex_application(app_id, self.applications.pop(app_id))
+                self.metrics_store.drop(app_id)
+                self.latency_store.drop(app_id)
+                self.vulnerability_index.remove_application(app_id)
                 self._save_data()
                 return True
             return False
+        except RevisionConflictError:
+            raise
         except Exception as e:
             print(f"Error deleting application {app_id}: {e}")
             return False
 
     async def update_application_metrics(self, app_id: str, metrics: Dict[str, Any]) -> bool:
-        """Update application metrics"""
+        """Record an application metrics sample; raises ValueError for a malformed sample"""
         try:
-            if app_id in self.applications:
-                self.applications[app_id]['metrics'] = metrics
-                self.applications[app_id]['updated'] = datetime.now().isoformat()
-                self._save_data()
-                return True
-            return False
+            async with self._lock:
+                return self._apply_metrics(app_id, metrics, datetime.now().isoformat())
+        except ValueError:
+            raise
         except Exception as e:
             print(f"Error updating metrics for {app_id}: {e}")
             return False
 
+    def _apply_metrics(self, app_id: str, metrics: Dict[str, Any], current_time: str) -> bool:
+        validate_metrics(metrics)
+        if app_id not in self.applications:
+            return False
+        self.metrics_store.record(app_id, metrics)
+        # Merge per group so partial samples from collectors keep the other fields
+        current_metrics = self.applications[app_id].setdefault('metrics', {})
+        for group, values in metrics.items():
+            if isinstance(values, dict) and isinstance(current_metrics.get(group), dict):
+                current_metrics[group] = {**current_metrics[group], **values}
+            else:
+                current_metrics[group] = values
+        self.applications[app_id]['updated'] = current_time
+        return True
+
+    def _apply_health(self, app_id: str, health: Dict[str, Any], current_time: str, record_latency: bool = True) -> bool:
+        if app_id not in self.applications:
+            return False
+        response_time = health.get('responseTime')
+        if record_latency and isinstance(response_time, (int, float)) and not isinstance(response_time, bool):
+            self.latency_store.record(app_id, response_time)
+        self.applications[app_id]['health'] = health
+        self.applications[app_id]['updated'] = current_time
+        return True
+
+    async def _apply_batch(self, updates: Dict[str, Any], apply, persist: bool) -> Dict[str, str]:
+        """Apply per-application updates under one lock with at most one save"""
+        results = {}
+        async with self._lock:
+            current_time = datetime.now().isoformat()
+            for app_id, payload in updates.items():
+                if not isinstance(payload, dict):
+                    results[app_id] = "invalid"
+                    continue
+                try:
+                    results[app_id] = "updated" if apply(app_id, payload, current_time) else "not_found"
+                except ValueError:
+                    results[app_id] = "invalid"
+                except Exception as e:
+                    print(f"Error applying batch update for {app_id}: {e}")
+                    results[app_id] = "error"
+            if persist and "updated" in results.values():
+                self._save_data()
+        return results
+
+    async def update_metrics_batch(self, updates: Dict[str, Dict[str, Any]]) -> Dict[str, str]:
+        """Record metrics samples for many applications at once"""
+        return await self._apply_batch(updates, self._apply_metrics, persist=False)
+
+    async def update_health_batch(
+        self,
+        updates: Dict[str, Dict[str, Any]],
+        record_latency: bool = True,
+        save: bool = True
+    ) -> Dict[str, str]:
+        """Update health status for many applications with a single save.
+
+        Callers that feed raw latencies to the latency store themselves (the
+        health prober) pass record_latency=False so samples are not counted twice.
+        With save=False the changes stay in memory until the next flush().
+        """
+        def apply(app_id: str, health: Dict[str, Any], current_time: str) -> bool:
+            return self._apply_health(app_id, health, current_time, record_latency)
+        results = await self._apply_batch(updates, apply, persist=save)
+        if not save and "updated" in results.values():
+            self._dirty = True
+        return results
+
+    async def get_application_latency(self, app_id: str, window: int, quantiles: List[float]) -> Optional[Dict[str, Any]]:
+        """Get response-time percentiles for an application over the last window seconds"""
+        if app_id not in self.applications:
+            return None
+        return self.latency_store.summary(app_id, window, quantiles)
+
+    async def get_application_metrics_range(
+        self,
+        app_id: str,
+        series: Optional[List[str]],
+        start: float,
+        end: float,
+        step: int
+    ) -> Optional[Dict[str, List[Dict[str, Any]]]]:
+        """Get metric samples for an application aggregated into step-second buckets"""
+        if app_id not in self.applications:
+            return None
+        return self.metrics_store.query(app_id, series, start, end, step)
+
     async def update_application_health(self, app_id: str, health: Dict[str, Any]) -> bool:
         """Update application health status"""
         try:
-            if app_id in self.applications:
-                self.applications[app_id]['health'] = health
-                self.applications[app_id]['updated'] = datetime.now().isoformat()
-                self._save_data()
-                return True
-            return False
+            results = await self.update_health_batch({app_id: health})
+            return results[app_id] == "updated"
         except Exception as e:
             print(f"Error updating health for {app_id}: {e}")
             return False
@@ -211,30 +497,115 @@ class ApplicationService:
             print(f"Error adding log for {app_id}: {e}")
             return False
 
+    def _vulnerability_identity(self, vulnerability: Dict[str, Any]) -> Tuple[str, str, str]:
+        # The same CVE in the same package version is one finding
+        return (
+            self.vulnerability_index.finding_key(vulnerability),
+            vulnerability.get("package", ""),
+            vulnerability.get("version", "")
+        )
+
+    def _add_vulnerability(self, app_id: str, vulnerability_data: Dict[str, Any], current_time: str, seen: Set[Tuple[str, str, str]]) -> bool:
+        """Append a vulnerability entry unless an identical finding exists"""
+        vulnerability_entry = {
+            "id": str(uuid.uuid4()),
+            "timestamp": current_time,
+            "severity": vulnerability_data.get("severity", "medium"),
+            "title": vulnerability_data.get("title", ""),
+            "description": vulnerability_data.get("description", ""),
+            "cve": vulnerability_data.get("cve", ""),
+            "cvss": float(vulnerability_data.get("cvss") or 0.0),
+            "package": vulnerability_data.get("package", ""),
+            "version": vulnerability_data.get("version", ""),
+            "fixedIn": vulnerability_data.get("fixedIn", ""),
+            "discovered": vulnerability_data.get("discovered") or current_time,
+            "status": vulnerability_data.get("status", "open"),
+            "source": vulnerability_data.get("source", "manual")
+        }
+        identity = self._vulnerability_identity(vulnerability_entry)
+        if identity in seen:
+            return False
+        seen.add(identity)
+        self.applications[app_id].setdefault('vulnerabilities', []).append(vulnerability_entry)
+        self.vulnerability_index.add(app_id, self.applications[app_id].get('team', ''), vulnerability_entry)
+        return True
+
     async def add_application_vulnerability(self, app_id: str, vulnerability_data: Dict[str, Any]) -> bool:
         """Add a vulnerability to an application"""
         try:
             if app_id in self.applications:
-                if 'vulnerabilities' not in self.applications[app_id]:
-                    self.applications[app_id]['vulnerabilities'] = []
-                
-                vulnerability_entry = {
-                    "id": str(uuid.uuid4()),
-                    "timestamp": datetime.now().isoformat(),
-                    "severity": vulnerability_data.get("severity", "medium"),
-                    "title": vulnerability_data.get("title", ""),
-                    "description": vulnerability_data.get("description", ""),
-                    "cve": vulnerability_data.get("cve", ""),
-                    "package": vulnerability_data.get("package", ""),
-                    "version": vulnerability_data.get("version", ""),
-                    "status": vulnerability_data.get("status", "open")
-                }
-                
-                self.applications[app_id]['vulnerabilities'].append(vulnerability_entry)
-                self.applications[app_id]['updated'] = datetime.now().isoformat()
-                self._save_data()
-                return True
+                added = await self.add_application_vulnerabilities(app_id, [vulnerability_data])
+                return added is not None
             return False
         except Exception as e:
             print(f"Error adding vulnerability for {app_id}: {e}")
-            return False 
\ No newline at end of file
+            return False
+
+    async def add_application_vulnerabilities(self, app_id: str, vulnerabilities: List[Dict[str, Any]]) -> Optional[int]:
+        """Add many vulnerabilities to an application with a single save, returning how many were new"""
+        try:
+            if app_id not in self.applications:
+                return None
+            current_time = datetime.now().isoformat()
+            seen = {self._vulnerability_identity(v) for v in self.applications[app_id].get('vulnerabilities') or []}
+            added = sum(1 for data in vulnerabilities if self._add_vulnerability(app_id, data, current_time, seen))
+            if added:
+                self.applications[app_id]['updated'] = current_time
+                self._save_data()
+            return added
+        except Exception as e:
+            print(f"Error adding vulnerabilities for {app_id}: {e}")
+            return None
+
+    async def replace_application_vulnerabilities(
+        self,
+        app_id: str,
+        vulnerabilities: List[Dict[str, Any]],
+        source: str
+    ) -> Optional[Dict[str, int]]:
+        """Replace the findings reported by one source, keeping unchanged entries and saving once"""
+        try:
+            if app_id not in self.applications:
+                return None
+            app = self.applications[app_id]
+            current_time = datetime.now().isoformat()
+            incoming = {self._vulnerability_identity(v) for v in vulnerabilities}
+            kept = []
+            removed = 0
+            for vulnerability in app.get('vulnerabilities') or []:
+                if vulnerability.get('source') == source and self._vulnerability_identity(vulnerability) not in incoming:
+                    self.vulnerability_index.remove(vulnerability.get('id'))
+                    removed += 1
+                else:
+                    kept.append(vulnerability)
+            app['vulnerabilities'] = kept
+            seen = {self._vulnerability_identity(v) for v in kept}
+            added = sum(
+                1 for data in vulnerabilities
+                if self._add_vulnerability(app_id, {**data, "source": source}, current_time, seen)
+            )
+            if added or removed:
+                app['updated'] = current_time
+                self._save_data()
+            return {"added": added, "removed": removed}
+        except Exception as e:
+            print(f"Error replacing vulnerabilities for {app_id}: {e}")
+            return None
+
+    async def query_vulnerabilities(
+        self,
+        severity: Optional[List[str]] = None,
+        package: Optional[str] = None,
+        team: Optional[str] = None,
+        application_id: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Get fleet-wide vulnerabilities deduplicated by CVE"""
+        return self.vulnerability_index.query(severity=severity, package=package, team=team, application_id=application_id)
+
+    async def get_vulnerability(self, cve: str) -> Optional[Dict[str, Any]]:
+        """Get a CVE and the applications it affects"""
+        return self.vulnerability_index.get_cve(cve)
+
+    async def get_vulnerability_summary(self) -> Dict[str, Any]:
+        """Get vulnerability counts by severity and by team"""
+        return self.vulnerability_index.summary()
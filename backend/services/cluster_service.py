@@ -1,13 +1,18 @@
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterable
 from datetime import datetime
 import uuid
 import json
 import os
 from models.cluster import Cluster, ClusterCreate, ClusterUpdate, ClusterMetrics
+from utils.counters import CountKey, apply_count_change, tally, verify_counts
+from utils.merge_patch import apply_model_patch, value_at
+from utils.revisions import RevisionConflictError, bump_revision, check_revision
 
 class ClusterService:
     def __init__(self):
         self.clusters = {}
+        # Counter changes are saved with the deployments snapshot, not per deployment write
+        self._dirty = False
         self.data_file = "data/clusters.json"
         self._load_data()
 
@@ -31,9 +36,15 @@ class ClusterService:
             os.makedirs(os.path.dirname(self.data_file), exist_ok=True)
             with open(self.data_file, 'w') as f:
                 json.dump(list(self.clusters.values()), f, indent=2)
+            self._dirty = False
         except Exception as e:
             print(f"Error saving cluster data: {e}")
 
+    def flush(self):
+        """Write clusters if deployment counters changed since the last save"""
+        if self._dirty:
+            self._save_data()
+
     async def get_all_clusters(self) -> List[Cluster]:
         """Get all clusters"""
         try:
@@ -82,7 +93,10 @@ class ClusterService:
                 "metrics": metrics.dict(),
                 "node_count": 0,
                 "pod_count": 0,
-                "namespace_count": 0
+                "namespace_count": 0,
+                "deployment_count": 0,
+                "deployment_status_counts": {},
+                "revision": 1
             }
             
             self.clusters[cluster_id] = cluster_doc
@@ -93,13 +107,19 @@ class ClusterService:
             print(f"Error creating cluster: {e}")
             return None
 
-    async def update_cluster(self, cluster_id: str, cluster_data: ClusterUpdate) -> Optional[Cluster]:
+    async def update_cluster(
+        self,
+        cluster_id: str,
+        cluster_data: ClusterUpdate,
+        expected_revision: Optional[int] = None
+    ) -> Optional[Cluster]:
         """Update an existing cluster"""
         try:
             if cluster_id not in self.clusters:
                 return None
             
             current_cluster = self.clusters[cluster_id]
+            check_revision(current_cluster, expected_revision)
             current_time = datetime.now().isoformat()
             
             update_data = cluster_data.dict(exclude_unset=True)
@@ -107,26 +127,80 @@ class ClusterService:
                 current_cluster[key] = value
             
             current_cluster['updated'] = current_time
+            bump_revision(current_cluster)
             
             self._save_data()
             
             return Cluster(**current_cluster)
+        except RevisionConflictError:
+            raise
         except Exception as e:
             print(f"Error updating cluster {cluster_id}: {e}")
             return None
 
-    async def delete_cluster(self, cluster_id: str) -> bool:
+    async def patch_cluster(
+        self,
+        cluster_id: str,
+        patch: Dict[str, Any],
+        expected_revision: Optional[int] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Apply a JSON merge patch, writing only when something changed"""
+        try:
+            if cluster_id not in self.clusters:
+                return None
+            current_cluster = self.clusters[cluster_id]
+            check_revision(current_cluster, expected_revision)
+            merged, changed = apply_model_patch(current_cluster, patch, ClusterUpdate, Cluster)
+            if changed:
+                for key in patch:
+                    if key in merged:
+                        current_cluster[key] = merged[key]
+                    else:
+                        current_cluster.pop(key, None)
+                current_cluster['updated'] = datetime.now().isoformat()
+                bump_revision(current_cluster)
+                self._save_data()
+            return {
+                "id": cluster_id,
+                "updated": current_cluster.get('updated'),
+                "revision": current_cluster.get('revision', 0),
+                "changes": {path: value_at(current_cluster, path) for path in changed}
+            }
+        except (ValueError, RevisionConflictError):
+            raise
+        except Exception as e:
+            print(f"Error patching cluster {cluster_id}: {e}")
+            return None
+
+    async def delete_cluster(self, cluster_id: str, expected_revision: Optional[int] = None) -> bool:
         """Delete a cluster"""
         try:
             if cluster_id in self.clusters:
+                check_revision(self.clusters[cluster_id], expected_revision)
                 del self.clusters[cluster_id]
                 self._save_data()
                 return True
             return False
+        except RevisionConflictError:
+            raise
         except Exception as e:
             print(f"Error deleting cluster {cluster_id}: {e}")
             return False
 
+    def record_deployment_change(self, before: CountKey, after: CountKey):
+        """Move one deployment's contribution between cluster counters; saved by the next flush()"""
+        if apply_count_change(self.clusters, before, after, "deployment_count", "deployment_status_counts"):
+            self._dirty = True
+
+    def verify_deployment_counts(self, deployments: Iterable[Dict[str, Any]], repair: bool = False) -> List[Dict[str, Any]]:
+        """Check cluster deployment counters against the deployments, optionally repairing them"""
+        mismatches = verify_counts(
+            self.clusters, tally(deployments, "cluster_id"), "deployment_count", "deployment_status_counts", repair
+        )
+        if repair and mismatches:
+            self._save_data()
+        return mismatches
+
     async def update_cluster_metrics(self, cluster_id: str, metrics: ClusterMetrics) -> bool:
         """Update cluster metrics"""
         try:
@@ -0,0 +1,189 @@
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from utils.sketch import DDSketch
+
+SUCCESSFUL = {"Succeeded", "Success"}
+FAILED = {"Failed"}
+
+
+def _day(timestamp: Optional[str]) -> Optional[str]:
+    return timestamp[:10] if timestamp else None
+
+
+def _finished_at(deployment: Dict[str, Any]) -> Optional[str]:
+    return deployment.get("finished_at") or deployment.get("deployed_at") or deployment.get("updated")
+
+
+class _Bucket:
+    """Counters and a duration sketch for one application, environment and day, or a sum of those"""
+
+    __slots__ = ("created", "statuses", "durations", "recoveries", "recovery_seconds")
+
+    def __init__(self):
+        self.created = 0
+        self.statuses: Dict[str, int] = {}
+        self.durations = DDSketch()
+        self.recoveries = 0
+        self.recovery_seconds = 0.0
+
+    def count_status(self, status: Optional[str], delta: int):
+        if status is None:
+            return
+        self.statuses[status] = self.statuses.get(status, 0) + delta
+        if not self.statuses[status]:
+            del self.statuses[status]
+
+    def add(self, bucket: "_Bucket"):
+        self.created += bucket.created
+        for status, count in bucket.statuses.items():
+            self.statuses[status] = self.statuses.get(status, 0) + count
+        self.durations.merge(bucket.durations)
+        self.recoveries += bucket.recoveries
+        self.recovery_seconds += bucket.recovery_seconds
+
+    def summary(self, days: int) -> Dict[str, Any]:
+        succeeded = sum(self.statuses.get(status, 0) for status in SUCCESSFUL)
+        failed = sum(self.statuses.get(status, 0) for status in FAILED)
+        p50, p95 = self.durations.quantiles([0.5, 0.95])
+        return {
+            "deployments": self.created,
+            "by_status": dict(self.statuses),
+            "success_rate": round(succeeded / (succeeded + failed), 4) if succeeded + failed else None,
+            "deploys_per_day": round(self.created / days, 3),
+            "mttr_seconds": round(self.recovery_seconds / self.recoveries, 1) if self.recoveries else None,
+            "recoveries": self.recoveries,
+            "duration_seconds": {
+                "count": self.durations.count,
+                "p50": round(p50, 1) if p50 is not None else None,
+                "p95": round(p95, 1) if p95 is not None else None,
+                "mean": round(self.durations.mean, 1) if self.durations.mean is not None else None
+            }
+        }
+
+
+class DeploymentAnalytics:
+    """Daily rollups of deployment outcomes, maintained as deployments change status.
+
+    Deployments are counted on the day they were created. Durations go into
+    a DDSketch when a deployment succeeds or fails, and a recovery is
+    recorded when an application/environment that last failed succeeds
+    again, timed from the first failure to the success. Queries merge the
+    day buckets of the requested window, so their cost depends on the
+    number of days and groups, not on the number of deployments.
+
+    Sketches cannot forget values: a deployment that leaves a finished
+    status again (a manual status edit) keeps its duration in the sketch.
+    """
+
+    def __init__(self):
+        # (application_id, environment) -> day -> bucket
+        self._buckets: Dict[Tuple[str, str], Dict[str, _Bucket]] = {}
+        # (application_id, environment) -> time of the failure not yet followed by a success
+        self._open_failures: Dict[Tuple[str, str], str] = {}
+
+    @staticmethod
+    def _key(deployment: Dict[str, Any]) -> Tuple[str, str]:
+        return deployment.get("application_id"), deployment.get("environment")
+
+    def _bucket(self, deployment: Dict[str, Any], day: Optional[str] = None) -> _Bucket:
+        day = day or _day(deployment.get("created")) or date.today().isoformat()
+        return self._buckets.setdefault(self._key(deployment), {}).setdefault(day, _Bucket())
+
+    def rebuild(self, deployments: Iterable[Dict[str, Any]]):
+        """Recompute every rollup, replaying outcomes in the order they finished"""
+        self._buckets = {}
+        self._open_failures = {}
+        deployments = list(deployments)
+        for deployment in deployments:
+            bucket = self._bucket(deployment)
+            bucket.created += 1
+            bucket.count_status(deployment.get("status"), 1)
+        finished = sorted(
+            (d for d in deployments if d.get("status") in SUCCESSFUL | FAILED),
+            key=lambda d: _finished_at(d) or ""
+        )
+        for deployment in finished:
+            self._record_outcome(deployment, deployment.get("status"))
+
+    def _record_outcome(self, deployment: Dict[str, Any], status: str, count_duration: bool = True):
+        bucket = self._bucket(deployment)
+        if count_duration and deployment.get("duration") is not None:
+            bucket.durations.add(float(deployment["duration"]))
+        key = self._key(deployment)
+        finished_at = _finished_at(deployment) or datetime.now().isoformat()
+        if status in FAILED:
+            self._open_failures.setdefault(key, finished_at)
+            return
+        failed_at = self._open_failures.pop(key, None)
+        if failed_at is not None:
+            recovered = self._bucket(deployment, _day(finished_at))
+            recovered.recoveries += 1
+            recovered.recovery_seconds += max(
+                (datetime.fromisoformat(finished_at) - datetime.fromisoformat(failed_at)).total_seconds(), 0.0
+            )
+
+    def record(self, deployment: Dict[str, Any], previous: Optional[str], status: Optional[str]):
+        """Apply one status change; previous is None for a new deployment and status is None for a deleted one"""
+        bucket = self._bucket(deployment)
+        if previous is None:
+            bucket.created += 1
+        if status is None:
+            bucket.created -= 1
+        bucket.count_status(previous, -1)
+        bucket.count_status(status, 1)
+        if status in SUCCESSFUL | FAILED and status != previous:
+            self._record_outcome(deployment, status, count_duration=previous not in SUCCESSFUL | FAILED)
+
+    def query(
+        self,
+        application_id: Optional[str] = None,
+        environment: Optional[str] = None,
+        days: int = 30,
+        until: Optional[str] = None,
+        group_by: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Success rate, deploy frequency, MTTR and duration percentiles over a window of days"""
+        if days < 1:
+            raise ValueError("days must be at least 1")
+        if group_by not in (None, "application", "environment"):
+            raise ValueError(f"Unsupported group_by: {group_by}")
+        end = date.fromisoformat(until[:10]) if until else date.today()
+        start = end - timedelta(days=days - 1)
+        first, last = start.isoformat(), end.isoformat()
+
+        totals = _Bucket()
+        groups: Dict[str, _Bucket] = {}
+        series: Dict[str, Dict[str, int]] = {}
+        for (app_id, env), by_day in self._buckets.items():
+            if application_id is not None and app_id != application_id:
+                continue
+            if environment is not None and env != environment:
+                continue
+            group = None
+            if group_by is not None:
+                group = groups.setdefault(app_id if group_by == "application" else env, _Bucket())
+            for day, bucket in by_day.items():
+                if not first <= day <= last:
+                    continue
+                totals.add(bucket)
+                if group is not None:
+                    group.add(bucket)
+                point = series.setdefault(day, {"deployments": 0, "succeeded": 0, "failed": 0})
+                point["deployments"] += bucket.created
+                point["succeeded"] += sum(bucket.statuses.get(status, 0) for status in SUCCESSFUL)
+                point["failed"] += sum(bucket.statuses.get(status, 0) for status in FAILED)
+
+        result = {
+            "window": {"start": first, "end": last, "days": days},
+            "filters": {"application_id": application_id, "environment": environment},
+            **totals.summary(days),
+            "series": [{"date": day, **series[day]} for day in sorted(series)]
+        }
+        if group_by is not None:
+            result["group_by"] = group_by
+            result["groups"] = [
+                {"key": key, **rollup.summary(days)} for key, rollup in sorted(groups.items(), key=lambda item: str(item[0]))
+            ]
+        return result
+
@@ -0,0 +1,82 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+import json
+import os
+
+
+class DeploymentEventStore:
+    """Append-only event stream per deployment, one compact NDJSON file each.
+
+    Events are numbered from 0 in append order. The byte offset of every
+    event is indexed the first time a stream is touched, so a range read
+    seeks straight to its first event instead of parsing the stream from
+    the start. A torn last line left by a crash is ignored and overwritten
+    by the next append.
+    """
+
+    def __init__(self, directory: str = "data/deployment_events"):
+        self.directory = directory
+        # deployment id -> byte offsets of its events, plus the end offset
+        self._offsets: Dict[str, List[int]] = {}
+
+    def _path(self, deployment_id: str) -> str:
+        if not deployment_id or os.sep in deployment_id or deployment_id.startswith("."):
+            raise ValueError(f"Invalid deployment id: {deployment_id!r}")
+        return os.path.join(self.directory, f"{deployment_id}.ndjson")
+
+    def _index(self, deployment_id: str) -> List[int]:
+        offsets = self._offsets.get(deployment_id)
+        if offsets is not None:
+            return offsets
+        offsets = [0]
+        path = self._path(deployment_id)
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break
+                    offsets.append(offsets[-1] + len(line))
+        self._offsets[deployment_id] = offsets
+        return offsets
+
+    def append(self, deployment_id: str, event_type: str, **data: Any) -> Dict[str, Any]:
+        """Append one event and return it with its sequence number"""
+        offsets = self._index(deployment_id)
+        event = {"seq": len(offsets) - 1, "ts": datetime.now().isoformat(), "type": event_type, **data}
+        line = (json.dumps(event, separators=(",", ":"), default=str) + "\n").encode()
+        path = self._path(deployment_id)
+        os.makedirs(self.directory, exist_ok=True)
+        with open(path, 'r+b' if os.path.exists(path) else 'wb') as f:
+            f.seek(offsets[-1])
+            f.write(line)
+            f.truncate()
+        offsets.append(offsets[-1] + len(line))
+        return event
+
+    def count(self, deployment_id: str) -> int:
+        return len(self._index(deployment_id)) - 1
+
+    def read(self, deployment_id: str, start: int = 0, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Events start, start + 1, ... up to limit of them"""
+        offsets = self._index(deployment_id)
+        total = len(offsets) - 1
+        start = max(start, 0)
+        end = total if limit is None else min(start + max(limit, 0), total)
+        if start >= end:
+            return []
+        with open(self._path(deployment_id), 'rb') as f:
+            f.seek(offsets[start])
+            raw = f.read(offsets[end] - offsets[start])
+        return [json.loads(line) for line in raw.splitlines()]
+
+    def delete(self, deployment_id: str):
+        self._offsets.pop(deployment_id, None)
+        path = self._path(deployment_id)
+        if os.path.exists(path):
+            os.remove(path)
+
+    def deployment_ids(self) -> List[str]:
+        """Ids of all deployments with a stored stream"""
+        if not os.path.isdir(self.directory):
+            return []
+        return [name[:-len(".ndjson")] for name in os.listdir(self.directory) if name.endswith(".ndjson")]
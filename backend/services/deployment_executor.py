@@ -0,0 +1,287 @@
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+import asyncio
+import random
+import time
+
+from services.deployment_logs import DeploymentLogStore
+from services.deployment_scheduler import PriorityFairQueue
+from services.deployment_service import TERMINAL_STATUSES
+from services.deployment_strategies import RolloutEngine
+
+
+class DeploymentDriver(ABC):
+    """Replica-level operations on a deployment target; the rollout engine decides the order.
+
+    start_replica must be implemented; the other operations default to
+    no-ops for targets without traffic control or cleanup.
+    """
+
+    @abstractmethod
+    async def start_replica(self, deployment: Dict[str, Any], track: str, index: int) -> None:
+        """Start one replica of the new version and return once it is ready; raise on failure"""
+
+    async def stop_replicas(self, deployment: Dict[str, Any], track: str, count: int) -> None:
+        """Stop ``count`` replicas of the "old" or "new" track"""
+
+    async def shift_traffic(self, deployment: Dict[str, Any], percent: int) -> None:
+        """Send ``percent`` of traffic to the new version"""
+
+    async def cancel(self, deployment: Dict[str, Any]) -> None:
+        """Called after a running rollout was cancelled, to stop work on the target"""
+
+
+class SimulatedDriver(DeploymentDriver):
+    """Local stand-in for a cluster: replicas take replica_seconds (with jitter) to start and fail at a set rate"""
+
+    def __init__(
+        self,
+        replica_seconds: float = 1.0,
+        jitter: float = 0.2,
+        failure_rate: float = 0.0,
+        seed: Optional[int] = None
+    ):
+        self.replica_seconds = replica_seconds
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self._random = random.Random(seed)
+
+    async def start_replica(self, deployment: Dict[str, Any], track: str, index: int) -> None:
+        await asyncio.sleep(self.replica_seconds * (1 + self._random.uniform(-self.jitter, self.jitter)))
+        if self._random.random() < self.failure_rate:
+            raise RuntimeError(f"Simulated failure starting replica {index}")
+
+
+class DeploymentExecutor:
+    """Runs Pending deployments through Pending -> InProgress -> Succeeded/Failed/Cancelled.
+
+    A dispatcher task starts queued deployments while fewer than
+    ``max_workers`` are running and the deployment's cluster and environment
+    are under their concurrency limits. Deployments blocked by a limit stay
+    queued without holding a worker, so one busy cluster cannot stall the
+    rest of the queue.
+    """
+
+    def __init__(
+        self,
+        deployment_service,
+        driver: Optional[DeploymentDriver] = None,
+        max_workers: int = 8,
+        cluster_limit: int = 2,
+        environment_limits: Optional[Dict[str, int]] = None,
+        default_environment_limit: int = 4,
+        queue=None,
+        rollout_engine: Optional[RolloutEngine] = None,
+        log_store: Optional[DeploymentLogStore] = None
+    ):
+        self.deployment_service = deployment_service
+        self.driver = driver or SimulatedDriver()
+        self.rollout_engine = rollout_engine or RolloutEngine()
+        self.logs = log_store or DeploymentLogStore()
+        self.max_workers = max_workers
+        self.cluster_limit = cluster_limit
+        self.environment_limits = environment_limits or {"production": 2}
+        self.default_environment_limit = default_environment_limit
+        self.queue = queue if queue is not None else PriorityFairQueue()
+        self.running: Dict[str, asyncio.Task] = {}
+        self._running_by_cluster: Dict[str, int] = {}
+        self._running_by_environment: Dict[str, int] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+    def _environment_limit(self, environment: Optional[str]) -> int:
+        return self.environment_limits.get(environment or "", self.default_environment_limit)
+
+    def _has_capacity(self, deployment_id: str) -> bool:
+        deployment = self.deployment_service.deployments.get(deployment_id)
+        if deployment is None:
+            return True
+        cluster_id = deployment.get("cluster_id")
+        if cluster_id and self._running_by_cluster.get(cluster_id, 0) >= self.cluster_limit:
+            return False
+        environment = deployment.get("environment") or ""
+        return self._running_by_environment.get(environment, 0) < self._environment_limit(environment)
+
+    def _slot_of(self, deployment_id: str) -> Tuple[Optional[str], str]:
+        """The (cluster, environment) capacity a deployment waits for in the queue"""
+        deployment = self.deployment_service.deployments.get(deployment_id) or {}
+        return deployment.get("cluster_id"), deployment.get("environment") or ""
+
+    def _wake(self):
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def submit(self, deployment_id: str) -> bool:
+        """Queue a Pending deployment for execution"""
+        deployment = self.deployment_service.deployments.get(deployment_id)
+        if deployment is None or deployment.get("status") != "Pending" or deployment_id in self.running:
+            return False
+        self.queue.push(deployment)
+        self._wake()
+        return True
+
+    def is_active(self, deployment_id: str) -> bool:
+        """Whether a deployment is queued or running here"""
+        return deployment_id in self.running or deployment_id in self.queue
+
+    async def cancel(self, deployment_id: str) -> Optional[str]:
+        """Cancel a queued or running deployment, returning its status afterwards"""
+        deployment = self.deployment_service.deployments.get(deployment_id)
+        if deployment is None:
+            return None
+        if deployment.get("status") in TERMINAL_STATUSES:
+            return deployment.get("status")
+        task = self.running.get(deployment_id)
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        # Still Pending if it was queued, or its task was cancelled before the rollout began
+        if self.deployment_service.deployments.get(deployment_id, {}).get("status") == "Pending":
+            self.queue.remove(deployment_id)
+            await self.deployment_service.transition_deployment(deployment_id, "Cancelled")
+        return self.deployment_service.deployments[deployment_id].get("status")
+
+    def _start(self, deployment_id: str):
+        deployment = self.deployment_service.deployments[deployment_id]
+        cluster_id = deployment.get("cluster_id")
+        environment = deployment.get("environment") or ""
+        if cluster_id:
+            self._running_by_cluster[cluster_id] = self._running_by_cluster.get(cluster_id, 0) + 1
+        self._running_by_environment[environment] = self._running_by_environment.get(environment, 0) + 1
+        task = asyncio.create_task(self._execute(deployment_id))
+        self.running[deployment_id] = task
+        # A done callback also runs for a task cancelled before its coroutine started
+        task.add_done_callback(lambda done: self._release(deployment_id, cluster_id, environment, done))
+
+    def _release(self, deployment_id: str, cluster_id: Optional[str], environment: str, task: asyncio.Task):
+        if self.running.get(deployment_id) is task:
+            del self.running[deployment_id]
+        if cluster_id:
+            self._running_by_cluster[cluster_id] -= 1
+            if not self._running_by_cluster[cluster_id]:
+                del self._running_by_cluster[cluster_id]
+        self._running_by_environment[environment] -= 1
+        if not self._running_by_environment[environment]:
+            del self._running_by_environment[environment]
+        self.queue.release(cluster_id, environment)
+        self._wake()
+
+    async def _execute(self, deployment_id: str):
+        started = time.monotonic()
+        service = self.deployment_service
+
+        def log(message: str):
+            self.logs.write_line(deployment_id, message)
+
+        def on_batch(batch: Dict[str, Any]):
+            service.record_event(deployment_id, "step", **batch)
+            traffic = f", traffic {batch['traffic_percent']}%" if batch["traffic_percent"] is not None else ""
+            log(f"Batch {batch['step']}/{len(plan['batches'])}: started {batch['start']} new, "
+                f"stopped {batch['stop']} old ({batch['new_replicas']} new / {batch['old_replicas']} old){traffic}")
+
+        try:
+            plan, plan_error = None, None
+            try:
+                plan = self.rollout_engine.plan(service.deployments[deployment_id])
+            except ValueError as e:
+                plan_error = str(e)
+            deployment = await service.transition_deployment(
+                deployment_id, "InProgress",
+                estimated_duration=plan["estimated_seconds"] if plan else None
+            )
+            if deployment is None:
+                return
+            try:
+                if plan_error:
+                    raise ValueError(plan_error)
+                log(f"Starting {plan['strategy']} rollout of {deployment.get('version')} to "
+                    f"{deployment.get('environment')}: {plan['replicas']} replicas in {len(plan['batches'])} batches, "
+                    f"estimated {plan['estimated_seconds']}s")
+                await self.rollout_engine.execute(dict(deployment), self.driver, plan, on_batch=on_batch)
+            except asyncio.CancelledError:
+                if self._stopping:
+                    # Shutdown, not a user cancel: leave it InProgress so the next start re-queues it
+                    raise
+                await self.driver.cancel(dict(deployment))
+                log("Rollout cancelled")
+                await service.transition_deployment(
+                    deployment_id, "Cancelled", duration=int(round(time.monotonic() - started))
+                )
+                return
+            except Exception as e:
+                log(f"Rollout failed: {e}")
+                await service.transition_deployment(
+                    deployment_id, "Failed",
+                    duration=int(round(time.monotonic() - started)),
+                    error=str(e)
+                )
+                return
+            log(f"Rollout succeeded in {time.monotonic() - started:.1f}s")
+            await service.transition_deployment(
+                deployment_id, "Succeeded",
+                duration=int(round(time.monotonic() - started)),
+                deployed_at=datetime.now().isoformat()
+            )
+        except asyncio.CancelledError:
+            if not self._stopping:
+                raise
+        except Exception as e:
+            print(f"Error executing deployment {deployment_id}: {e}")
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            while len(self.running) < self.max_workers:
+                deployment_id = self.queue.pop_eligible(self._has_capacity, self._slot_of)
+                if deployment_id is None:
+                    break
+                deployment = self.deployment_service.deployments.get(deployment_id)
+                if deployment is None or deployment.get("status") != "Pending":
+                    continue
+                self._start(deployment_id)
+            await self._wakeup.wait()
+
+    async def recover(self):
+        """Re-queue deployments left Pending or interrupted InProgress by a previous run"""
+        pending = sorted(
+            (d for d in self.deployment_service.deployments.values() if d.get("status") in ("Pending", "InProgress")),
+            key=lambda d: d.get("created") or ""
+        )
+        for deployment in pending:
+            if deployment.get("status") == "InProgress":
+                await self.deployment_service.transition_deployment(deployment["id"], "Pending")
+            self.submit(deployment["id"])
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "running": sorted(self.running),
+            "queued": len(self.queue),
+            "running_by_cluster": dict(self._running_by_cluster),
+            "running_by_environment": dict(self._running_by_environment),
+            "limits": {
+                "max_workers": self.max_workers,
+                "per_cluster": self.cluster_limit,
+                "per_environment": dict(self.environment_limits),
+                "default_per_environment": self.default_environment_limit
+            }
+        }
+
+    async def start(self):
+        if self._task is None:
+            self._stopping = False
+            self._wakeup = asyncio.Event()
+            await self.recover()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._stopping = True
+        self._task.cancel()
+        tasks = list(self.running.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(self._task, *tasks, return_exceptions=True)
+        self._task = None
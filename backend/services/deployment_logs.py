@@ -0,0 +1,134 @@
+from bisect import bisect_right
+from datetime import datetime
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Set
+import asyncio
+import os
+import shutil
+
+
+class DeploymentLogStore:
+    """Rollout output per deployment, kept in append-only chunk files.
+
+    A deployment's log is one byte stream split into files of at most
+    ``chunk_size`` bytes, each named after the stream offset it starts at.
+    Reads of any byte range open only the chunks that overlap it and copy
+    ``block_size`` bytes at a time, so serving or tailing a large log never
+    holds more than one block in memory.
+    """
+
+    def __init__(self, directory: str = "data/deployment_logs", chunk_size: int = 1024 * 1024, block_size: int = 64 * 1024):
+        self.directory = directory
+        self.chunk_size = chunk_size
+        self.block_size = block_size
+        # deployment id -> start offsets of its chunks; sizes are the stream length
+        self._chunks: Dict[str, List[int]] = {}
+        self._sizes: Dict[str, int] = {}
+        self._waiters: Dict[str, Set[asyncio.Event]] = {}
+
+    def _dir(self, deployment_id: str) -> str:
+        if not deployment_id or os.sep in deployment_id or deployment_id.startswith("."):
+            raise ValueError(f"Invalid deployment id: {deployment_id!r}")
+        return os.path.join(self.directory, deployment_id)
+
+    def _chunk_path(self, deployment_id: str, start: int) -> str:
+        return os.path.join(self._dir(deployment_id), f"{start:020d}.log")
+
+    def _load(self, deployment_id: str) -> List[int]:
+        chunks = self._chunks.get(deployment_id)
+        if chunks is not None:
+            return chunks
+        chunks, size = [], 0
+        directory = self._dir(deployment_id)
+        if os.path.isdir(directory):
+            chunks = sorted(int(name[:-4]) for name in os.listdir(directory) if name.endswith(".log"))
+            if chunks:
+                size = chunks[-1] + os.path.getsize(self._chunk_path(deployment_id, chunks[-1]))
+        self._chunks[deployment_id] = chunks
+        self._sizes[deployment_id] = size
+        return chunks
+
+    def size(self, deployment_id: str) -> int:
+        self._load(deployment_id)
+        return self._sizes[deployment_id]
+
+    def append(self, deployment_id: str, text: str):
+        """Append raw text, starting a new chunk once the current one is full"""
+        data = text.encode()
+        chunks = self._load(deployment_id)
+        os.makedirs(self._dir(deployment_id), exist_ok=True)
+        while data:
+            size = self._sizes[deployment_id]
+            if not chunks or size - chunks[-1] >= self.chunk_size:
+                chunks.append(size)
+            room = self.chunk_size - (size - chunks[-1])
+            piece, data = data[:room], data[room:]
+            with open(self._chunk_path(deployment_id, chunks[-1]), 'ab') as f:
+                f.write(piece)
+            self._sizes[deployment_id] = size + len(piece)
+        for waiter in self._waiters.get(deployment_id, ()):
+            waiter.set()
+
+    def write_line(self, deployment_id: str, message: str):
+        """Append one timestamped line"""
+        try:
+            self.append(deployment_id, f"{datetime.now().isoformat()} {message}\n")
+        except Exception as e:
+            print(f"Error writing log for deployment {deployment_id}: {e}")
+
+    def iter_range(self, deployment_id: str, start: int, end: int) -> Iterator[bytes]:
+        """Yield bytes start..end (exclusive) in blocks"""
+        chunks = self._load(deployment_id)
+        end = min(end, self._sizes[deployment_id])
+        position = start
+        index = bisect_right(chunks, position) - 1
+        while position < end and 0 <= index < len(chunks):
+            chunk_start = chunks[index]
+            chunk_end = chunks[index + 1] if index + 1 < len(chunks) else self._sizes[deployment_id]
+            with open(self._chunk_path(deployment_id, chunk_start), 'rb') as f:
+                f.seek(position - chunk_start)
+                while position < min(end, chunk_end):
+                    block = f.read(min(self.block_size, min(end, chunk_end) - position))
+                    if not block:
+                        break
+                    position += len(block)
+                    yield block
+            index += 1
+
+    async def follow(
+        self,
+        deployment_id: str,
+        start: int,
+        is_finished,
+        poll_seconds: float = 1.0
+    ) -> AsyncIterator[bytes]:
+        """Stream from ``start`` and keep tailing until ``is_finished()`` and everything is sent"""
+        waiter = asyncio.Event()
+        self._waiters.setdefault(deployment_id, set()).add(waiter)
+        position = start
+        try:
+            while True:
+                waiter.clear()
+                finished = is_finished()
+                size = self.size(deployment_id)
+                for block in self.iter_range(deployment_id, position, size):
+                    position += len(block)
+                    yield block
+                if finished:
+                    return
+                try:
+                    await asyncio.wait_for(waiter.wait(), poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            waiters = self._waiters.get(deployment_id)
+            if waiters is not None:
+                waiters.discard(waiter)
+                if not waiters:
+                    del self._waiters[deployment_id]
+
+    def delete(self, deployment_id: str):
+        self._chunks.pop(deployment_id, None)
+        self._sizes.pop(deployment_id, None)
+        directory = self._dir(deployment_id)
+        if os.path.isdir(directory):
+            shutil.rmtree(directory)
@@ -0,0 +1,174 @@
+from typing import Any, Callable, Dict, Hashable, List, Optional, Set, Tuple
+import heapq
+import itertools
+import time
+
+from utils.sketch import DDSketch
+
+# Strict priority levels, most urgent first
+PRIORITY_LEVELS = ["production-rollback", "production", "staging", "other"]
+
+
+def is_rollback(deployment: Dict[str, Any]) -> bool:
+    return bool(deployment.get("rollback_of")) or str(deployment.get("commit_hash", "")).startswith("rollback-")
+
+
+def deployment_priority(deployment: Dict[str, Any]) -> int:
+    """Index into PRIORITY_LEVELS for a deployment"""
+    environment = str(deployment.get("environment") or "").lower()
+    if environment in ("production", "prod"):
+        return 0 if is_rollback(deployment) else 1
+    if environment == "staging":
+        return 2
+    return 3
+
+
+class PriorityFairQueue:
+    """Deployment queue with strict priority levels and weighted fair queueing between teams.
+
+    Levels are served in PRIORITY_LEVELS order. Inside a level each
+    deployment is stamped on arrival with a virtual finish time
+    ``max(level clock, team's last finish) + 1 / weight`` (self-clocked
+    fair queueing) and the smallest stamp goes first, so a team that
+    queues a hundred rollouts only gets its weighted share of starts while
+    other teams have work waiting. Deployments the executor has no
+    capacity for are skipped, not dropped: they are parked by the slot
+    (cluster, environment) they wait for and only considered again once
+    release() frees that slot, so a full cluster with a long backlog costs
+    nothing until one of its rollouts finishes.
+    """
+
+    def __init__(
+        self,
+        team_of: Optional[Callable[[Dict[str, Any]], Optional[str]]] = None,
+        team_weights: Optional[Dict[str, float]] = None,
+        default_weight: float = 1.0
+    ):
+        self.team_of = team_of or (lambda deployment: None)
+        self.team_weights = team_weights or {}
+        self.default_weight = default_weight
+        self._heaps: List[List[Tuple[float, int, str]]] = [[] for _ in PRIORITY_LEVELS]
+        self._clock = [0.0 for _ in PRIORITY_LEVELS]
+        self._last_finish: List[Dict[str, float]] = [{} for _ in PRIORITY_LEVELS]
+        # deployment id -> (level, team, sequence, enqueued at)
+        self._entries: Dict[str, Tuple[int, str, int, float]] = {}
+        self._sequence = itertools.count()
+        self._waits = [DDSketch() for _ in PRIORITY_LEVELS]
+        self._dispatched_by_team: Dict[str, int] = {}
+        # Per level: slot -> heap of entries waiting for capacity on it
+        self._blocked: List[Dict[Hashable, List[Tuple[float, int, str]]]] = [{} for _ in PRIORITY_LEVELS]
+        # Slots released since their entries were parked
+        self._open: Set[Hashable] = set()
+
+    def _weight(self, team: str) -> float:
+        return max(float(self.team_weights.get(team, self.default_weight)), 1e-6)
+
+    def push(self, deployment: Dict[str, Any]):
+        deployment_id = deployment["id"]
+        if deployment_id in self._entries:
+            return
+        level = deployment_priority(deployment)
+        team = self.team_of(deployment) or "unassigned"
+        start = max(self._clock[level], self._last_finish[level].get(team, 0.0))
+        finish = start + 1.0 / self._weight(team)
+        self._last_finish[level][team] = finish
+        sequence = next(self._sequence)
+        self._entries[deployment_id] = (level, team, sequence, time.monotonic())
+        heapq.heappush(self._heaps[level], (finish, sequence, deployment_id))
+
+    def _is_live(self, sequence: int, deployment_id: str) -> bool:
+        entry = self._entries.get(deployment_id)
+        return entry is not None and entry[2] == sequence
+
+    def _next_candidate(self, level: int) -> Optional[Tuple[List[Tuple[float, int, str]], bool, Hashable]]:
+        """(heap, parked, slot) of the smallest live entry among the level's queue and its released slots"""
+        heap = self._heaps[level]
+        while heap and not self._is_live(heap[0][1], heap[0][2]):
+            heapq.heappop(heap)
+        best = (heap, False, None) if heap else None
+        blocked = self._blocked[level]
+        for slot in [slot for slot in self._open if slot in blocked]:
+            parked = blocked[slot]
+            while parked and not self._is_live(parked[0][1], parked[0][2]):
+                heapq.heappop(parked)
+            if not parked:
+                del blocked[slot]
+            elif best is None or parked[0] < best[0][0]:
+                best = (parked, True, slot)
+        return best
+
+    def pop_eligible(
+        self,
+        eligible: Callable[[str], bool],
+        slot_of: Optional[Callable[[str], Hashable]] = None
+    ) -> Optional[str]:
+        """Remove and return the most urgent, fairest deployment the executor has capacity for.
+
+        ``slot_of`` names the capacity slot a deployment waits for; without
+        it every ineligible deployment shares one slot.
+        """
+        for level in range(len(PRIORITY_LEVELS)):
+            blocked = self._blocked[level]
+            while True:
+                candidate = self._next_candidate(level)
+                if candidate is None:
+                    break
+                heap, parked, parked_slot = candidate
+                entry = heapq.heappop(heap)
+                if parked and not heap:
+                    del blocked[parked_slot]
+                finish, _, deployment_id = entry
+                slot = slot_of(deployment_id) if slot_of is not None else None
+                if (slot in self._open or slot not in blocked) and eligible(deployment_id):
+                    _, team, _, enqueued = self._entries.pop(deployment_id)
+                    self._clock[level] = max(self._clock[level], finish)
+                    self._waits[level].add(time.monotonic() - enqueued)
+                    self._dispatched_by_team[team] = self._dispatched_by_team.get(team, 0) + 1
+                    return deployment_id
+                heapq.heappush(blocked.setdefault(slot, []), entry)
+                self._open.discard(slot)
+        return None
+
+    def release(self, cluster_id: Optional[str], environment: str):
+        """Re-admit the deployments parked on slots that share the freed cluster or environment"""
+        for blocked in self._blocked:
+            for slot in blocked:
+                if slot is None or (cluster_id and slot[0] == cluster_id) or slot[1] == environment:
+                    self._open.add(slot)
+
+    def remove(self, deployment_id: str) -> bool:
+        # Heap entries are dropped lazily when popped
+        return self._entries.pop(deployment_id, None) is not None
+
+    def __contains__(self, deployment_id: str) -> bool:
+        return deployment_id in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Queue depth and wait times per priority level and team"""
+        now = time.monotonic()
+        levels = {
+            name: {"depth": 0, "oldest_wait_seconds": 0.0, "wait_seconds": {}}
+            for name in PRIORITY_LEVELS
+        }
+        teams: Dict[str, Dict[str, Any]] = {}
+        for level, team, _, enqueued in self._entries.values():
+            waited = now - enqueued
+            stats = levels[PRIORITY_LEVELS[level]]
+            stats["depth"] += 1
+            stats["oldest_wait_seconds"] = max(stats["oldest_wait_seconds"], round(waited, 3))
+            team_stats = teams.setdefault(team, {"depth": 0, "dispatched": 0, "weight": self._weight(team)})
+            team_stats["depth"] += 1
+        for team, dispatched in self._dispatched_by_team.items():
+            teams.setdefault(team, {"depth": 0, "dispatched": 0, "weight": self._weight(team)})["dispatched"] = dispatched
+        for level, sketch in enumerate(self._waits):
+            p50, p95 = sketch.quantiles([0.5, 0.95])
+            levels[PRIORITY_LEVELS[level]]["wait_seconds"] = {
+                "dispatched": sketch.count,
+                "p50": round(p50, 3) if p50 is not None else None,
+                "p95": round(p95, 3) if p95 is not None else None,
+                "max": round(sketch.max, 3) if sketch.count else None
+            }
+        return {"depth": len(self._entries), "levels": levels, "teams": teams}
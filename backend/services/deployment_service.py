@@ -1,14 +1,41 @@
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from datetime import datetime
 import uuid
 import json
 import os
 from models.deployment import Deployment, DeploymentCreate, DeploymentUpdate, DeploymentResources
+from services.deployment_analytics import DeploymentAnalytics
+from services.deployment_events import DeploymentEventStore
+from utils.counters import CountKey
+from utils.indexing import SortedSecondaryIndex, decode_cursor, encode_cursor, paginate_sorted
+from utils.merge_patch import apply_model_patch, value_at
+from utils.revisions import RevisionConflictError, bump_revision, check_revision
+
+# Status changes the deployment executor may make; "Success" is the legacy spelling of "Succeeded"
+DEPLOYMENT_TRANSITIONS = {
+    "Pending": {"InProgress", "Cancelled"},
+    "InProgress": {"Succeeded", "Failed", "Cancelled", "Pending"},
+}
+SUCCESSFUL_STATUSES = {"Succeeded", "Success"}
+TERMINAL_STATUSES = SUCCESSFUL_STATUSES | {"Failed", "Cancelled"}
 
 class DeploymentService:
-    def __init__(self):
+    def __init__(self, cluster_service=None, event_store: Optional[DeploymentEventStore] = None):
         self.deployments = {}
+        self.cluster_service = cluster_service
+        self.events = event_store or DeploymentEventStore()
+        # Status transitions are journaled as events; the snapshot is rewritten lazily
+        self._dirty = False
+        self._status_listeners = []
+        # (application_id, environment) -> successful deployment ids, oldest first
+        self._history: Dict[Tuple[str, str], List[str]] = {}
+        self._history_position: Dict[str, int] = {}
+        self.analytics = DeploymentAnalytics()
         self.data_file = "data/deployments.json"
+        self._index = SortedSecondaryIndex(
+            ["application_id", "cluster_id", "environment", "status"],
+            sort_key=lambda deployment: deployment.get("created") or ""
+        )
         self._load_data()
 
     def _load_data(self):
@@ -25,6 +52,12 @@ class DeploymentService:
         except Exception as e:
             print(f"Error loading deployment data: {e}")
             self.deployments = {}
+        self._replay_events()
+        self._index.clear()
+        for deployment_id, deployment in self.deployments.items():
+            self._index.add(deployment_id, deployment)
+        self._rebuild_history()
+        self.analytics.rebuild(self.deployments.values())
 
     def _save_data(self):
         """Save deployments to JSON file"""
@@ -32,8 +65,128 @@ class DeploymentService:
             os.makedirs(os.path.dirname(self.data_file), exist_ok=True)
             with open(self.data_file, 'w') as f:
                 json.dump(self.deployments, f, indent=2)
+            self._dirty = False
         except Exception as e:
             print(f"Error saving deployment data: {e}")
+        if self.cluster_service is not None:
+            # Cluster counters derive from deployments and are repaired from this snapshot at startup
+            self.cluster_service.flush()
+
+    def flush(self):
+        """Write the snapshot if status transitions have only been journaled so far"""
+        if self._dirty:
+            self._save_data()
+
+    def _replay_events(self):
+        """Apply status transitions journaled after the snapshot was last written"""
+        for deployment_id in self.events.deployment_ids():
+            deployment = self.deployments.get(deployment_id)
+            if deployment is None:
+                continue
+            try:
+                for event in self.events.read(deployment_id):
+                    if event.get("type") != "status" or event.get("revision", 0) <= deployment.get("revision", 0):
+                        continue
+                    deployment.update(event.get("fields") or {})
+                    deployment['status'] = event["to"]
+                    deployment['updated'] = event["ts"]
+                    deployment['revision'] = event["revision"]
+                    self._dirty = True
+            except Exception as e:
+                print(f"Error replaying events of deployment {deployment_id}: {e}")
+
+    def record_event(self, deployment_id: str, event_type: str, **data: Any) -> Optional[Dict[str, Any]]:
+        """Append an event to the timeline of an existing deployment"""
+        deployment = self.deployments.get(deployment_id)
+        if deployment is None:
+            # Late events of a deleted deployment, e.g. rollout steps, must not recreate its stream
+            return None
+        try:
+            if event_type != "created" and not self.events.count(deployment_id):
+                # A deployment from before the event log keeps its creation in the timeline
+                self.events.append(deployment_id, "created", ts=deployment.get("created"), status="Pending")
+            return self.events.append(deployment_id, event_type, **data)
+        except Exception as e:
+            print(f"Error recording event for deployment {deployment_id}: {e}")
+            return None
+
+    async def get_timeline(self, deployment_id: str, start: int = 0, limit: Optional[int] = None) -> Optional[Tuple[List[Dict[str, Any]], int]]:
+        """A range of a deployment's events and the total number of events"""
+        deployment = self.deployments.get(deployment_id)
+        if deployment is None:
+            return None
+        total = self.events.count(deployment_id)
+        if total:
+            return self.events.read(deployment_id, start, limit), total
+        # Deployments from before the event log only have their timestamps
+        events = [{"seq": 0, "ts": deployment.get("created"), "type": "created", "status": "Pending"}]
+        if deployment.get("updated") and deployment.get("updated") != deployment.get("created"):
+            events.append({"seq": 1, "ts": deployment["updated"], "type": "status", "to": deployment.get("status")})
+        end = len(events) if limit is None else start + limit
+        return events[start:end], len(events)
+
+    @staticmethod
+    def _count_key(deployment: Optional[Dict[str, Any]]) -> CountKey:
+        if not deployment or not deployment.get("cluster_id"):
+            return None
+        return deployment["cluster_id"], deployment.get("status")
+
+    def _record_count_change(self, before: CountKey, after: CountKey):
+        """Keep the owning cluster's deployment counters in step with this write"""
+        if self.cluster_service is not None:
+            self.cluster_service.record_deployment_change(before, after)
+
+    @staticmethod
+    def _history_key(deployment: Dict[str, Any]) -> Tuple[str, str]:
+        return deployment.get("application_id"), deployment.get("environment")
+
+    def _rebuild_history(self):
+        """Order each application/environment's successful deployments by when they went live"""
+        self._history = {}
+        successful = sorted(
+            (d for d in self.deployments.values() if d.get("status") in SUCCESSFUL_STATUSES),
+            key=lambda d: (d.get("deployed_at") or d.get("updated") or "", d["id"])
+        )
+        for deployment in successful:
+            self._history.setdefault(self._history_key(deployment), []).append(deployment["id"])
+        self._history_position = {
+            deployment_id: position
+            for chain in self._history.values()
+            for position, deployment_id in enumerate(chain)
+        }
+
+    def _update_history(self, deployment: Dict[str, Any], previous: Optional[str], status: Optional[str]):
+        was_successful = previous in SUCCESSFUL_STATUSES
+        is_successful = status in SUCCESSFUL_STATUSES
+        if is_successful == was_successful:
+            return
+        chain = self._history.setdefault(self._history_key(deployment), [])
+        if is_successful:
+            self._history_position[deployment["id"]] = len(chain)
+            chain.append(deployment["id"])
+            return
+        position = self._history_position.pop(deployment["id"], None)
+        if position is None:
+            return
+        del chain[position]
+        for index in range(position, len(chain)):
+            self._history_position[chain[index]] = index
+
+    def add_status_listener(self, listener):
+        """Register listener(deployment_id, status), called after a status change; status is None on delete"""
+        self._status_listeners.append(listener)
+
+    def _notify_status(self, deployment: Dict[str, Any], previous: Optional[str], status: Optional[str]):
+        if previous == status:
+            return
+        deployment_id = deployment["id"]
+        self._update_history(deployment, previous, status)
+        self.analytics.record(deployment, previous, status)
+        for listener in self._status_listeners:
+            try:
+                listener(deployment_id, status)
+            except Exception as e:
+                print(f"Error notifying status change of deployment {deployment_id}: {e}")
 
     async def get_all_deployments(self) -> List[Deployment]:
         """Get all deployments"""
@@ -43,6 +196,52 @@ class DeploymentService:
             print(f"Error fetching deployments: {e}")
             return []
 
+    async def query_deployments(
+        self,
+        application_id: Optional[List[str]] = None,
+        cluster_id: Optional[List[str]] = None,
+        environment: Optional[List[str]] = None,
+        status: Optional[List[str]] = None,
+        sort: str = "-created",
+        offset: int = 0,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Deployment], int, Optional[str]]:
+        """Filter and paginate deployments in created order using the secondary indexes.
+
+        Values within one field are OR-ed and fields are AND-ed. Newest first
+        unless sort is "created". Returns the page, the total match count and
+        the cursor for the next page.
+        """
+        if sort not in ("created", "-created"):
+            raise ValueError(f"Unsupported sort field: {sort.lstrip('-')}")
+        keyed = self._index.query({
+            "application_id": application_id,
+            "cluster_id": cluster_id,
+            "environment": environment,
+            "status": status
+        })
+        position = decode_cursor(cursor) if cursor else None
+        page_ids, next_position = paginate_sorted(keyed, sort.startswith("-"), offset, limit, position)
+
+        page = [Deployment(**self.deployments[deployment_id]) for deployment_id in page_ids]
+        next_cursor = encode_cursor(*next_position) if next_position else None
+        return page, len(keyed), next_cursor
+
+    async def get_deployments_by_application(self, application_id: str) -> List[Deployment]:
+        """Get all deployments for an application, newest first"""
+        deployments, _, _ = await self.query_deployments(application_id=[application_id])
+        return deployments
+
+    async def get_deployments_by_cluster(self, cluster_id: str) -> List[Deployment]:
+        """Get all deployments on a cluster, newest first"""
+        deployments, _, _ = await self.query_deployments(cluster_id=[cluster_id])
+        return deployments
+
+    def count_by_cluster(self) -> Dict[Any, int]:
+        """Number of deployments per cluster id"""
+        return self._index.values("cluster_id")
+
     async def get_deployment_by_id(self, deployment_id: str) -> Optional[Deployment]:
         """Get a specific deployment by ID"""
         try:
@@ -70,75 +269,230 @@ class DeploymentService:
             deployment_doc = {
                 "id": deployment_id,
                 "application_id": deployment_data.application_id,
+                "cluster_id": deployment_data.cluster_id,
                 "version": deployment_data.version,
                 "status": "Pending",
                 "commit_hash": deployment_data.commit_hash,
                 "environment": deployment_data.environment,
                 "deployed_at": current_time,
-                "logs_url": f"https://logs.example.com/deployment-{deployment_id}",
+                "logs_url": f"/api/deployments/{deployment_id}/logs",
                 "duration": 0,
                 "created": current_time,
                 "updated": current_time,
                 "description": deployment_data.description,
                 "triggered_by": deployment_data.triggered_by,
-                "rollback_version": "",
+                "rollback_version": self._previous_good_version(deployment_data.application_id, deployment_data.environment),
                 "deployment_strategy": deployment_data.deployment_strategy,
+                "strategy_options": deployment_data.strategy_options,
                 "replicas": deployment_data.replicas,
-                "resources": deployment_data.resources.dict()
+                "resources": deployment_data.resources.dict(),
+                "revision": 1
             }
             
             # Save to memory and file
             self.deployments[deployment_id] = deployment_doc
+            self._index.add(deployment_id, deployment_doc)
+            self._record_count_change(None, self._count_key(deployment_doc))
             self._save_data()
+            self._notify_status(deployment_doc, None, deployment_doc["status"])
+            self.record_event(
+                deployment_id, "created",
+                status=deployment_doc["status"],
+                version=deployment_doc["version"],
+                environment=deployment_doc["environment"],
+                cluster_id=deployment_doc["cluster_id"],
+                triggered_by=deployment_doc["triggered_by"],
+                revision=deployment_doc["revision"]
+            )
             
             return Deployment(**deployment_doc)
         except Exception as e:
             print(f"Error creating deployment: {e}")
             return None
 
-    async def update_deployment(self, deployment_id: str, deployment_data: DeploymentUpdate) -> Optional[Deployment]:
+    async def update_deployment(
+        self,
+        deployment_id: str,
+        deployment_data: DeploymentUpdate,
+        expected_revision: Optional[int] = None
+    ) -> Optional[Deployment]:
         """Update an existing deployment"""
         try:
             if deployment_id not in self.deployments:
                 return None
             
             current_deployment = self.deployments[deployment_id]
+            check_revision(current_deployment, expected_revision)
             current_time = datetime.now().isoformat()
             
             # Update fields
             update_data = deployment_data.dict(exclude_unset=True)
+            before = self._count_key(current_deployment)
+            before_status = current_deployment.get('status')
+            self._index.remove(deployment_id, current_deployment)
+            # dict() has already converted nested models such as resources
             for key, value in update_data.items():
-                if key == "resources" and value:
-                    current_deployment[key] = value.dict()
-                else:
-                    current_deployment[key] = value
+                current_deployment[key] = value
             
             current_deployment['updated'] = current_time
+            bump_revision(current_deployment)
+            self._index.add(deployment_id, current_deployment)
             
             # Save to file
+            self._record_count_change(before, self._count_key(current_deployment))
             self._save_data()
+            self._notify_status(current_deployment, before_status, current_deployment.get('status'))
+            self._record_update(current_deployment, before_status, update_data)
             
             return Deployment(**current_deployment)
+        except RevisionConflictError:
+            raise
         except Exception as e:
             print(f"Error updating deployment {deployment_id}: {e}")
             return None
 
-    async def delete_deployment(self, deployment_id: str) -> bool:
+    async def patch_deployment(
+        self,
+        deployment_id: str,
+        patch: Dict[str, Any],
+        expected_revision: Optional[int] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Apply a JSON merge patch, writing only when something changed"""
+        try:
+            if deployment_id not in self.deployments:
+                return None
+            current_deployment = self.deployments[deployment_id]
+            check_revision(current_deployment, expected_revision)
+            merged, changed = apply_model_patch(current_deployment, patch, DeploymentUpdate, Deployment)
+            if changed:
+                before = self._count_key(current_deployment)
+                before_status = current_deployment.get('status')
+                self._index.remove(deployment_id, current_deployment)
+                for key in patch:
+                    if key in merged:
+                        current_deployment[key] = merged[key]
+                    else:
+                        current_deployment.pop(key, None)
+                current_deployment['updated'] = datetime.now().isoformat()
+                bump_revision(current_deployment)
+                self._index.add(deployment_id, current_deployment)
+                self._record_count_change(before, self._count_key(current_deployment))
+                self._save_data()
+                self._notify_status(current_deployment, before_status, current_deployment.get('status'))
+                self._record_update(
+                    current_deployment, before_status,
+                    {path: value_at(current_deployment, path) for path in changed}
+                )
+            return {
+                "id": deployment_id,
+                "updated": current_deployment.get('updated'),
+                "revision": current_deployment.get('revision', 0),
+                "changes": {path: value_at(current_deployment, path) for path in changed}
+            }
+        except (ValueError, RevisionConflictError):
+            raise
+        except Exception as e:
+            print(f"Error patching deployment {deployment_id}: {e}")
+            return None
+
+    async def delete_deployment(self, deployment_id: str, expected_revision: Optional[int] = None) -> bool:
         """Delete a deployment"""
         try:
             if deployment_id in self.deployments:
-                del self.deployments[deployment_id]
+                check_revision(self.deployments[deployment_id], expected_revision)
+                deployment = self.deployments.pop(deployment_id)
+                self._index.remove(deployment_id, deployment)
+                self._record_count_change(self._count_key(deployment), None)
                 self._save_data()
+                self._notify_status(deployment, deployment.get('status'), None)
+                self.events.delete(deployment_id)
                 return True
             return False
+        except RevisionConflictError:
+            raise
         except Exception as e:
             print(f"Error deleting deployment {deployment_id}: {e}")
             return False
 
-    async def rollback_deployment(self, deployment_id: str) -> Optional[Deployment]:
-        """Rollback a deployment"""
+    def _record_update(self, deployment: Dict[str, Any], before_status: Optional[str], changes: Dict[str, Any]):
+        if deployment.get('status') != before_status:
+            self.record_event(
+                deployment['id'], "status",
+                **{"from": before_status, "to": deployment.get('status'), "revision": deployment['revision']}
+            )
+        changes = {key: value for key, value in changes.items() if key != 'status'}
+        if changes:
+            self.record_event(deployment['id'], "updated", changes=changes, revision=deployment['revision'])
+
+    async def transition_deployment(self, deployment_id: str, status: str, **fields: Any) -> Optional[Dict[str, Any]]:
+        """Move a deployment along the execution state machine, raising ValueError on an illegal change"""
+        deployment = self.deployments.get(deployment_id)
+        if deployment is None:
+            return None
+        current = deployment.get("status")
+        if status not in DEPLOYMENT_TRANSITIONS.get(current, ()):
+            raise ValueError(f"Cannot move deployment {deployment_id} from {current} to {status}")
+        before = self._count_key(deployment)
+        self._index.remove(deployment_id, deployment)
+        deployment.update(fields)
+        deployment['status'] = status
+        deployment['updated'] = datetime.now().isoformat()
+        if status in TERMINAL_STATUSES:
+            deployment['finished_at'] = deployment['updated']
+        bump_revision(deployment)
+        self._index.add(deployment_id, deployment)
+        self.record_event(
+            deployment_id, "status",
+            **{"from": current, "to": status, "revision": deployment['revision'], "fields": fields}
+        )
+        self._dirty = True
+        self._record_count_change(before, self._count_key(deployment))
+        self._notify_status(deployment, current, status)
+        return deployment
+
+    def _previous_good_version(self, application_id: str, environment: str) -> str:
+        chain = self._history.get((application_id, environment))
+        return self.deployments[chain[-1]]["version"] if chain else ""
+
+    def rollback_target(self, deployment_id: str, steps: int = 1) -> Optional[Dict[str, Any]]:
+        """Successful deployment ``steps`` releases before this one, found by position in the history chain.
+
+        A deployment that never succeeded counts as newer than every good
+        release, so rolling it back one step returns the latest good one.
+        Raises ValueError when the history is too short.
+        """
+        deployment = self.deployments.get(deployment_id)
+        if deployment is None:
+            return None
+        if steps < 1:
+            raise ValueError("Rollback steps must be at least 1")
+        chain = self._history.get(self._history_key(deployment), [])
+        position = self._history_position.get(deployment_id, len(chain))
+        if position - steps < 0:
+            raise ValueError(
+                f"No successful {deployment.get('environment')} deployment {steps} release(s) before this one"
+            )
+        return self.deployments[chain[position - steps]]
+
+    async def get_release_history(
+        self,
+        application_id: str,
+        environment: str,
+        offset: int = 0,
+        limit: Optional[int] = None
+    ) -> Tuple[List[Deployment], int]:
+        """Successful deployments of an application to an environment, newest first"""
+        chain = self._history.get((application_id, environment), [])
+        end = max(len(chain) - offset, 0)
+        start = 0 if limit is None else max(end - limit, 0)
+        page = [Deployment(**self.deployments[deployment_id]) for deployment_id in reversed(chain[start:end])]
+        return page, len(chain)
+
+    async def rollback_deployment(self, deployment_id: str, steps: int = 1) -> Optional[Deployment]:
+        """Roll back to the successful deployment ``steps`` releases before this one"""
         try:
-            if deployment_id not in self.deployments:
+            target = self.rollback_target(deployment_id, steps)
+            if target is None:
                 return None
             
             current_deployment = self.deployments[deployment_id]
@@ -150,28 +504,50 @@ class DeploymentService:
             rollback_deployment = {
                 "id": rollback_id,
                 "application_id": current_deployment["application_id"],
-                "version": current_deployment.get("rollback_version", "v1.0.0"),
+                "cluster_id": current_deployment.get("cluster_id"),
+                "version": target["version"],
                 "status": "Pending",
-                "commit_hash": f"rollback-{current_deployment['commit_hash']}",
+                "commit_hash": target["commit_hash"],
                 "environment": current_deployment["environment"],
                 "deployed_at": current_time,
-                "logs_url": f"https://logs.example.com/deployment-{rollback_id}",
+                "logs_url": f"/api/deployments/{rollback_id}/logs",
                 "duration": 0,
                 "created": current_time,
                 "updated": current_time,
-                "description": f"Rollback of {current_deployment['version']}",
+                "description": f"Rollback of {current_deployment['version']} to {target['version']}",
                 "triggered_by": current_deployment["triggered_by"],
                 "rollback_version": current_deployment["version"],
-                "deployment_strategy": current_deployment["deployment_strategy"],
-                "replicas": current_deployment["replicas"],
-                "resources": current_deployment["resources"]
+                "rollback_of": deployment_id,
+                "rollback_to": target["id"],
+                "deployment_strategy": target["deployment_strategy"],
+                "strategy_options": target.get("strategy_options"),
+                "replicas": target["replicas"],
+                "resources": target["resources"],
+                "revision": 1
             }
             
             # Save rollback deployment
             self.deployments[rollback_id] = rollback_deployment
+            self._index.add(rollback_id, rollback_deployment)
+            self._record_count_change(None, self._count_key(rollback_deployment))
             self._save_data()
+            self._notify_status(rollback_deployment, None, rollback_deployment["status"])
+            self.record_event(
+                rollback_id, "created",
+                status=rollback_deployment["status"],
+                version=rollback_deployment["version"],
+                environment=rollback_deployment["environment"],
+                cluster_id=rollback_deployment["cluster_id"],
+                triggered_by=rollback_deployment["triggered_by"],
+                rollback_of=deployment_id,
+                rollback_to=target["id"],
+                revision=rollback_deployment["revision"]
+            )
+            self.record_event(deployment_id, "rollback", rollback_id=rollback_id, version=target["version"])
             
             return Deployment(**rollback_deployment)
+        except ValueError:
+            raise
         except Exception as e:
             print(f"Error rolling back deployment {deployment_id}: {e}")
             return None 
\ No newline at end of file
@@ -0,0 +1,198 @@
+from typing import Any, Callable, Dict, List, Optional, Union
+import asyncio
+import math
+
+STRATEGIES = ("rolling", "blue-green", "canary")
+STRATEGY_ALIASES = {"rollingupdate": "rolling", "bluegreen": "blue-green", "blue_green": "blue-green"}
+
+DEFAULT_OPTIONS = {
+    "max_surge": "25%",
+    "max_unavailable": "25%",
+    "canary_steps": [10, 50, 100],
+    "analysis_seconds": 0.0,
+    "switch_seconds": 0.0
+}
+
+
+def resolve_replica_count(value: Union[int, str], replicas: int, round_up: bool) -> int:
+    """Turn an absolute count or a percentage of replicas into a replica count"""
+    if isinstance(value, str) and value.strip().endswith("%"):
+        try:
+            percent = float(value.strip()[:-1])
+        except ValueError:
+            raise ValueError(f"Invalid percentage: {value}")
+        if percent < 0:
+            raise ValueError(f"Percentage must not be negative: {value}")
+        exact = replicas * percent / 100
+        return math.ceil(exact) if round_up else math.floor(exact)
+    try:
+        count = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Expected a replica count or percentage, got {value!r}")
+    if count < 0:
+        raise ValueError(f"Replica count must not be negative: {value}")
+    return count
+
+
+def _batch(step: int, start: int, stop: int, old: int, new: int, traffic: Optional[int] = None, pause: float = 0.0) -> Dict[str, Any]:
+    return {
+        "step": step,
+        "start": start,
+        "stop": stop,
+        "old_replicas": old,
+        "new_replicas": new,
+        "traffic_percent": traffic,
+        "pause_seconds": pause
+    }
+
+
+def plan_rolling(replicas: int, max_surge: int, max_unavailable: int) -> List[Dict[str, Any]]:
+    """Rolling update batches, Kubernetes style.
+
+    Each batch first retires old replicas down to the availability floor
+    (replicas - max_unavailable), then starts as many new replicas as the
+    surge ceiling (replicas + max_surge) allows. The new replicas of a
+    batch start together, so rollout time grows with the batch count, not
+    the replica count.
+    """
+    batches = []
+    old, new = replicas, 0
+    floor, ceiling = replicas - max_unavailable, replicas + max_surge
+    while new < replicas:
+        stop = max(min(old, old + new - floor), 0)
+        old -= stop
+        start = min(replicas - new, ceiling - (old + new))
+        new += start
+        batches.append(_batch(len(batches) + 1, start, stop, old, new))
+    if old:
+        batches.append(_batch(len(batches) + 1, 0, old, 0, new))
+    return batches
+
+
+def plan_blue_green(replicas: int, switch_seconds: float) -> List[Dict[str, Any]]:
+    """Start a full green copy, switch all traffic to it, then retire blue"""
+    return [
+        _batch(1, replicas, 0, replicas, replicas, traffic=0),
+        _batch(2, 0, replicas, 0, replicas, traffic=100, pause=switch_seconds)
+    ]
+
+
+def plan_canary(replicas: int, steps: List[int], analysis_seconds: float) -> List[Dict[str, Any]]:
+    """Grow the canary through traffic percentages, pausing for analysis before each promotion"""
+    batches = []
+    new = 0
+    for percent in steps:
+        target = replicas if percent >= 100 else max(math.ceil(replicas * percent / 100), 1)
+        start = max(target - new, 0)
+        new += start
+        final = percent >= 100
+        batches.append(_batch(
+            len(batches) + 1, start, replicas if final else 0, 0 if final else replicas, new,
+            traffic=percent, pause=0.0 if final else analysis_seconds
+        ))
+    return batches
+
+
+class RolloutEngine:
+    """Plans and runs rolling, blue-green and canary rollouts against a deployment driver"""
+
+    def __init__(self, replica_seconds: float = 1.0):
+        # Expected time for one replica to become ready, used for up-front estimates
+        self.replica_seconds = replica_seconds
+
+    @staticmethod
+    def options_for(deployment: Dict[str, Any]) -> Dict[str, Any]:
+        return {**DEFAULT_OPTIONS, **(deployment.get("strategy_options") or {})}
+
+    def plan(self, deployment: Dict[str, Any], replica_seconds: Optional[float] = None) -> Dict[str, Any]:
+        """Batches for a deployment's strategy and the time they should take. Raises ValueError on bad options."""
+        strategy = str(deployment.get("deployment_strategy") or "rolling").lower()
+        strategy = STRATEGY_ALIASES.get(strategy, strategy)
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown deployment strategy: {strategy}")
+        replicas = deployment.get("replicas")
+        replicas = 1 if replicas is None else int(replicas)
+        if replicas < 1:
+            raise ValueError("replicas must be at least 1")
+        options = self.options_for(deployment)
+        unknown = sorted(set(options) - set(DEFAULT_OPTIONS))
+        if unknown:
+            raise ValueError(f"Unknown strategy options: {', '.join(unknown)}")
+        replica_seconds = self.replica_seconds if replica_seconds is None else replica_seconds
+
+        max_surge = resolve_replica_count(options["max_surge"], replicas, round_up=True)
+        max_unavailable = resolve_replica_count(options["max_unavailable"], replicas, round_up=False)
+        if strategy == "rolling":
+            if max_surge == 0 and max_unavailable == 0:
+                # Same rule as Kubernetes: the rollout must be able to make progress
+                max_unavailable = 1
+            max_unavailable = min(max_unavailable, replicas)
+            batches = plan_rolling(replicas, max_surge, max_unavailable)
+            min_available, max_total = replicas - max_unavailable, replicas + max_surge
+        elif strategy == "blue-green":
+            batches = plan_blue_green(replicas, float(options["switch_seconds"]))
+            min_available, max_total = replicas, 2 * replicas
+        else:
+            steps = [int(step) for step in options["canary_steps"]]
+            if not steps or any(step <= 0 for step in steps) or steps != sorted(set(steps)):
+                raise ValueError("canary_steps must be increasing positive percentages")
+            if steps[-1] < 100:
+                steps.append(100)
+            batches = plan_canary(replicas, steps, float(options["analysis_seconds"]))
+            # Old replicas keep serving until the canary is promoted to 100%
+            min_available, max_total = replicas, 2 * replicas
+
+        estimate = sum(
+            (replica_seconds if batch["start"] else 0.0) + batch["pause_seconds"]
+            for batch in batches
+        )
+        return {
+            "strategy": strategy,
+            "replicas": replicas,
+            "max_surge": max_surge if strategy == "rolling" else None,
+            "max_unavailable": max_unavailable if strategy == "rolling" else None,
+            "min_available": min_available,
+            "max_total": max_total,
+            "batches": batches,
+            "estimated_seconds": round(estimate, 3)
+        }
+
+    async def execute(
+        self,
+        deployment: Dict[str, Any],
+        driver,
+        plan: Optional[Dict[str, Any]] = None,
+        on_batch: Optional[Callable[[Dict[str, Any]], Any]] = None
+    ) -> Dict[str, Any]:
+        """Run a rollout batch by batch; replicas within a batch start concurrently.
+
+        Rolling batches retire old replicas before starting new ones (that is
+        what max_unavailable allows); blue-green and canary only retire the
+        old replicas once traffic has moved off them.
+        """
+        plan = plan or self.plan(deployment)
+        stop_first = plan["strategy"] == "rolling"
+        started = 0
+        try:
+            for batch in plan["batches"]:
+                if batch["stop"] and stop_first:
+                    await driver.stop_replicas(deployment, "old", batch["stop"])
+                if batch["start"]:
+                    await asyncio.gather(*(
+                        driver.start_replica(deployment, "new", started + index)
+                        for index in range(batch["start"])
+                    ))
+                    started += batch["start"]
+                if batch["traffic_percent"] is not None:
+                    await driver.shift_traffic(deployment, batch["traffic_percent"])
+                if batch["stop"] and not stop_first:
+                    await driver.stop_replicas(deployment, "old", batch["stop"])
+                if on_batch is not None:
+                    on_batch(batch)
+                if batch["pause_seconds"]:
+                    await asyncio.sleep(batch["pause_seconds"])
+        except Exception:
+            if started:
+                await driver.stop_replicas(deployment, "new", started)
+            raise
+        return plan
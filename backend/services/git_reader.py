@@ -0,0 +1,243 @@
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+import asyncio
+import json
+import os
+
+try:
+    import yaml
+except ImportError:  # PyYAML is optional; without it only JSON manifests are read
+    yaml = None
+
+MANIFEST_SUFFIXES = (".yaml", ".yml", ".json")
+
+
+class GitError(Exception):
+    """Raised when a git command exits with an error"""
+
+
+class LRUCache:
+    """Least recently used mapping holding at most ``max_entries`` values"""
+
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Any:
+        value = self._entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: Hashable, value: Any):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def parse_manifest(name: str, data: bytes) -> Optional[List[Dict[str, Any]]]:
+    """Documents of one manifest file, or None when it cannot be read without PyYAML"""
+    try:
+        if name.endswith(".json"):
+            parsed = json.loads(data)
+            documents = parsed if isinstance(parsed, list) else [parsed]
+        elif yaml is None:
+            return None
+        else:
+            documents = list(yaml.safe_load_all(data))
+    except Exception as e:
+        raise ValueError(f"Invalid manifest {name}: {e}")
+    return [document for document in documents if isinstance(document, dict)]
+
+
+class GitRepositoryReader:
+    """Reads branch heads and manifests from local git repositories with the git CLI.
+
+    At most ``max_processes`` git subprocesses run at once. Git objects are
+    immutable, so tree listings, parsed manifest files and the manifests of
+    whole subtrees are cached by object hash: loading a new commit only
+    lists and parses the trees and files that changed since one already
+    read, and unchanged subtrees are reused without starting git at all.
+    Cached manifests are shared between results and must not be mutated.
+    """
+
+    def __init__(self, max_processes: int = 4, cache_size: int = 4096, timeout: float = 30.0, git: str = "git"):
+        self.max_processes = max_processes
+        self.timeout = timeout
+        self.git = git
+        self.cache = LRUCache(cache_size)
+        self._pool: Optional[asyncio.Semaphore] = None
+
+    @staticmethod
+    def local_path(repository: Dict[str, Any]) -> str:
+        """Directory of a repository whose url is a local path or file:// url"""
+        url = repository.get("url") or ""
+        path = url[len("file://"):] if url.startswith("file://") else url
+        path = os.path.expanduser(path)
+        if "://" in path or not os.path.isdir(path):
+            raise ValueError(f"Repository url is not a local git repository: {url}")
+        return path
+
+    @staticmethod
+    def _revision(repository: Dict[str, Any]) -> str:
+        branch = repository.get("branch") or "HEAD"
+        if branch.startswith("-"):
+            raise ValueError(f"Invalid branch: {branch}")
+        return branch
+
+    async def _git(self, path: str, *args: str, stdin: Optional[bytes] = None) -> bytes:
+        if self._pool is None:
+            self._pool = asyncio.Semaphore(self.max_processes)
+        async with self._pool:
+            process = await asyncio.create_subprocess_exec(
+                self.git, "-C", path, *args,
+                stdin=asyncio.subprocess.PIPE if stdin is not None else asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE
+            )
+            try:
+                stdout, stderr = await asyncio.wait_for(process.communicate(stdin), self.timeout)
+            except BaseException:
+                if process.returncode is None:
+                    process.kill()
+                    await process.wait()
+                raise
+        if process.returncode != 0:
+            raise GitError(f"git {args[0]} failed: {stderr.decode(errors='replace').strip()}")
+        return stdout
+
+    async def resolve_commit(self, repository: Dict[str, Any], revision: Optional[str] = None) -> str:
+        """Full hash of a revision, by default the repository's branch; raises ValueError if it is unknown"""
+        path = self.local_path(repository)
+        revision = revision or self._revision(repository)
+        try:
+            output = await self._git(path, "rev-parse", "--verify", "--end-of-options", f"{revision}^{{commit}}")
+        except GitError:
+            raise ValueError(f"Unknown revision: {revision}")
+        return output.decode().strip()
+
+    async def resolve_head(self, repository: Dict[str, Any]) -> Dict[str, str]:
+        """Commit, author and subject at the tip of the repository's branch"""
+        path = self.local_path(repository)
+        output = await self._git(path, "log", "-1", "--format=%H%x00%an%x00%s", self._revision(repository), "--")
+        commit, author, message = output.decode(errors="replace").rstrip("\n").split("\x00", 2)
+        return {"commit": commit, "author": author, "message": message}
+
+    async def tree_hash(self, path: str, commit: str, subdirectory: str = "") -> Optional[str]:
+        """Hash of the tree at subdirectory in commit, or None if the commit has no such directory"""
+        subdirectory = subdirectory.strip("/")
+        key = ("tree-of", commit, subdirectory)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached or None
+        if subdirectory:
+            output = await self._git(path, "ls-tree", "-z", commit, "--", subdirectory)
+            meta = output.split(b"\t", 1)[0].decode().split(" ")
+            tree = meta[2] if len(meta) == 3 and meta[1] == "tree" else None
+        else:
+            tree = (await self._git(path, "rev-parse", "--verify", f"{commit}^{{tree}}")).decode().strip()
+        self.cache.put(key, tree or "")
+        return tree
+
+    async def list_tree(self, path: str, tree: str) -> List[Tuple[str, str, str]]:
+        """(type, hash, name) of the entries of one tree"""
+        key = ("tree", tree)
+        entries = self.cache.get(key)
+        if entries is None:
+            output = await self._git(path, "ls-tree", "-z", tree)
+            entries = []
+            for record in output.split(b"\x00"):
+                if not record:
+                    continue
+                meta, name = record.split(b"\t", 1)
+                _, kind, object_hash = meta.decode().split(" ")
+                entries.append((kind, object_hash, name.decode(errors="replace")))
+            self.cache.put(key, entries)
+        return entries
+
+    async def _read_blobs(self, path: str, hashes: List[str]) -> Dict[str, bytes]:
+        """Contents of several blobs from one ``git cat-file --batch``"""
+        output = await self._git(path, "cat-file", "--batch", stdin="".join(f"{h}\n" for h in hashes).encode())
+        blobs: Dict[str, bytes] = {}
+        position = 0
+        for object_hash in hashes:
+            header_end = output.index(b"\n", position)
+            header = output[position:header_end].decode().split(" ")
+            if len(header) < 3:
+                raise GitError(f"git cat-file could not read {object_hash}")
+            size = int(header[2])
+            blobs[object_hash] = output[header_end + 1:header_end + 1 + size]
+            position = header_end + 1 + size + 1
+        return blobs
+
+    async def file_manifests(self, path: str, files: List[Tuple[str, str]]) -> Dict[str, Any]:
+        """Parsed documents of (blob hash, file name) pairs by hash; False for files that are skipped"""
+        documents: Dict[str, Any] = {}
+        missing = []
+        for object_hash, name in files:
+            parsed = self.cache.get(("blob", object_hash))
+            if parsed is None:
+                missing.append((object_hash, name))
+            else:
+                documents[object_hash] = parsed
+        if missing:
+            blobs = await self._read_blobs(path, list(dict.fromkeys(object_hash for object_hash, _ in missing)))
+            for object_hash, name in missing:
+                if object_hash not in documents:
+                    parsed = parse_manifest(name, blobs[object_hash])
+                    # False marks a file that could not be parsed, so it is not fetched again
+                    documents[object_hash] = parsed if parsed is not None else False
+                    self.cache.put(("blob", object_hash), documents[object_hash])
+        return documents
+
+    async def tree_manifests(self, path: str, tree: str) -> Dict[str, List[Dict[str, Any]]]:
+        """Manifest documents under a tree, keyed by path relative to it"""
+        key = ("manifests", tree)
+        manifests = self.cache.get(key)
+        if manifests is not None:
+            return manifests
+        entries = await self.list_tree(path, tree)
+        subtrees = [(object_hash, name) for kind, object_hash, name in entries if kind == "tree"]
+        files = [(object_hash, name) for kind, object_hash, name in entries if kind == "blob" and name.endswith(MANIFEST_SUFFIXES)]
+
+        documents = await self.file_manifests(path, files)
+        manifests = {}
+        for object_hash, name in files:
+            if documents[object_hash] is not False:
+                manifests[name] = documents[object_hash]
+        children = await asyncio.gather(*(self.tree_manifests(path, object_hash) for object_hash, _ in subtrees))
+        for (_, directory), child in zip(subtrees, children):
+            for name, docs in child.items():
+                manifests[f"{directory}/{name}"] = docs
+        self.cache.put(key, manifests)
+        return manifests
+
+    async def load_manifests(self, repository: Dict[str, Any], commit: Optional[str] = None) -> Dict[str, Any]:
+        """Manifests under the repository's path at commit, or at the branch head"""
+        path = self.local_path(repository)
+        commit = await self.resolve_commit(repository, commit)
+        tree = await self.tree_hash(path, commit, repository.get("path") or "")
+        return {
+            "commit": commit,
+            "path": repository.get("path") or "",
+            "tree": tree,
+            "manifests": await self.tree_manifests(path, tree) if tree else {}
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "cached_objects": len(self.cache),
+            "max_entries": self.cache.max_entries,
+            "hits": self.cache.hits,
+            "misses": self.cache.misses,
+            "max_processes": self.max_processes
+        }
@@ -1,14 +1,48 @@
-from typing import List, Optional, Dict, Any
+from bisect import bisect_left, bisect_right
+from typing import List, Optional, Dict, Any, Tuple
 from datetime import datetime
+import asyncio
 import uuid
 import json
 import os
-from models.gitops import Repository, RepositoryCreate, RepositoryUpdate, GitOpsDeployment, GitOpsDeploymentCreate, GitOpsDeploymentUpdate
+import re
+from models.gitops import Repository, RepositoryCreate, RepositoryUpdate, GitOpsDeployment, GitOpsDeploymentCreate, GitOpsDeploymentUpdate, DeploymentFilter
+from services.manifest_diff import change_summary
+from utils.counters import CountKey, apply_count_change, tally, verify_counts
+from utils.indexing import SecondaryIndex, SortedSecondaryIndex, decode_cursor, encode_cursor, paginate_sorted
+from utils.revisions import RevisionConflictError, bump_revision, check_revision
+
+_SCHEME_RE = re.compile(r"^[a-z][a-z0-9+.-]*://")
+_SCP_HOST_RE = re.compile(r"^([^/:]+):(?!\d+/)")
+
+
+def normalize_repository_url(url: Optional[str]) -> str:
+    """host/owner/name form of a git url, so https, ssh and scp-style urls of one repository compare equal"""
+    text = (url or "").strip().lower()
+    text = _SCHEME_RE.sub("", text)
+    text = re.sub(r"^[^@/]+@", "", text)
+    text = _SCP_HOST_RE.sub(r"\1/", text)
+    text = text.rstrip("/")
+    return text[:-len(".git")] if text.endswith(".git") else text
+
 
 class GitOpsService:
-    def __init__(self):
+    def __init__(self, source=None, differ=None):
         self.repositories = {}
+        # Resolves a repository's branch head: async resolve_head(repository) -> {"commit", "author", "message"} or None
+        self.source = source
+        # Compares two commits: async diff_commits(repository, from_commit, to_commit) -> ManifestDiffer result
+        self.differ = differ
         self.deployments = {}
+        # Normalized repository names and urls, for matching webhook payloads
+        self._repository_index = SecondaryIndex(["name", "url"])
+        # Serializes the read-diff-deploy-update of lastCommit between scheduled syncs and webhook pushes
+        self._repository_locks: Dict[str, asyncio.Lock] = {}
+        # Deployment postings in created order; the composite fields serve repository history filtered by status and/or environment
+        self._deployment_index = SortedSecondaryIndex(
+            ["repository_id", "status", "environment", "repository_status", "repository_environment", "repository_status_environment"],
+            sort_key=lambda deployment: deployment.get("created") or ""
+        )
         self.repos_file = "data/gitops_repositories.json"
         self.deployments_file = "data/gitops_deployments.json"
         self._load_data()
@@ -37,6 +71,38 @@ class GitOpsService:
             print(f"Error loading GitOps data: {e}")
             self.repositories = {}
             self.deployments = {}
+        self._repository_index.clear()
+        for repo_id, repo in self.repositories.items():
+            self._repository_index.add(repo_id, self._repository_keys(repo))
+        self._deployment_index.clear()
+        for deployment_id, deployment in self.deployments.items():
+            self._deployment_index.add(deployment_id, self._index_fields(deployment))
+
+    @staticmethod
+    def _index_fields(deployment: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "created": deployment.get("created"),
+            "repository_id": deployment.get("repository_id"),
+            "status": deployment.get("status"),
+            "environment": deployment.get("environment"),
+            "repository_status": (deployment.get("repository_id"), deployment.get("status")),
+            "repository_environment": (deployment.get("repository_id"), deployment.get("environment")),
+            "repository_status_environment": (deployment.get("repository_id"), deployment.get("status"), deployment.get("environment"))
+        }
+
+    def _repository_lock(self, repo_id: str) -> asyncio.Lock:
+        return self._repository_locks.setdefault(repo_id, asyncio.Lock())
+
+    @staticmethod
+    def _repository_keys(repo: Dict[str, Any]) -> Dict[str, str]:
+        return {"name": (repo.get("name") or "").strip().lower(), "url": normalize_repository_url(repo.get("url"))}
+
+    def find_repositories(self, names: List[str], urls: List[str]) -> List[str]:
+        """Ids of repositories matching any of the urls, or else any of the names"""
+        ids = self._repository_index.lookup_any("url", {normalize_repository_url(url) for url in urls if url})
+        if not ids:
+            ids = self._repository_index.lookup_any("name", {name.strip().lower() for name in names if name})
+        return sorted(ids)
 
     def _save_repositories(self):
         """Save repositories to JSON file"""
@@ -47,6 +113,10 @@ class GitOpsService:
         except Exception as e:
             print(f"Error saving repositories: {e}")
 
+    def save_repositories(self):
+        """Persist repositories after changes made with save=False"""
+        self._save_repositories()
+
     def _save_deployments(self):
         """Save deployments to JSON file"""
         try:
@@ -95,10 +165,15 @@ class GitOpsService:
                 "syncInterval": repo_data.syncInterval,
                 "lastSync": current_time,
                 "commitCount": 0,
-                "deploymentCount": 0
+                "deploymentCount": 0,
+                "deploymentStatusCounts": {},
+                "created": current_time,
+                "updated": current_time,
+                "revision": 1
             }
             
             self.repositories[repo_id] = repository_doc
+            self._repository_index.add(repo_id, self._repository_keys(repository_doc))
             self._save_repositories()
             
             return Repository(**repository_doc)
@@ -106,40 +181,195 @@ class GitOpsService:
             print(f"Error creating repository: {e}")
             return None
 
-    async def update_repository(self, repo_id: str, repo_data: RepositoryUpdate) -> Optional[Repository]:
+    async def update_repository(
+        self,
+        repo_id: str,
+        repo_data: RepositoryUpdate,
+        expected_revision: Optional[int] = None
+    ) -> Optional[Repository]:
         """Update an existing repository"""
         try:
             if repo_id not in self.repositories:
                 return None
             
             current_repo = self.repositories[repo_id]
+            check_revision(current_repo, expected_revision)
             current_time = datetime.now().isoformat()
             
             update_data = repo_data.dict(exclude_unset=True)
+            self._repository_index.remove(repo_id, self._repository_keys(current_repo))
             for key, value in update_data.items():
                 current_repo[key] = value
+            self._repository_index.add(repo_id, self._repository_keys(current_repo))
             
             current_repo['updated'] = current_time
+            bump_revision(current_repo)
             
             self._save_repositories()
             
             return Repository(**current_repo)
+        except RevisionConflictError:
+            raise
         except Exception as e:
             print(f"Error updating repository {repo_id}: {e}")
             return None
 
-    async def delete_repository(self, repo_id: str) -> bool:
+    async def delete_repository(self, repo_id: str, expected_revision: Optional[int] = None) -> bool:
         """Delete a repository"""
         try:
             if repo_id in self.repositories:
-                del self.repositories[repo_id]
+                check_revision(self.repositories[repo_id], expected_revision)
+                repo = self.repositories.pop(repo_id)
+                self._repository_index.remove(repo_id, self._repository_keys(repo))
+                self._repository_locks.pop(repo_id, None)
                 self._save_repositories()
                 return True
             return False
+        except RevisionConflictError:
+            raise
         except Exception as e:
             print(f"Error deleting repository {repo_id}: {e}")
             return False
 
+    async def sync_repository(self, repo_id: str, save: bool = True) -> Optional[Dict[str, Any]]:
+        """Fetch the branch head, record a new commit and auto-deploy it; raises if the sync fails.
+
+        The first sync of a repository only records its head, so enabling
+        syncing does not redeploy what is already running. With a differ,
+        the deployment carries the resources changed since the last commit
+        and a commit that changes no manifests is not deployed; when the
+        last commit can no longer be diffed the new one is deployed in full. With
+        save=False the caller is responsible for persisting repositories
+        later.
+        """
+        async with self._repository_lock(repo_id):
+            return await self._sync_repository(repo_id, save)
+
+    async def _sync_repository(self, repo_id: str, save: bool) -> Optional[Dict[str, Any]]:
+        repo = self.repositories.get(repo_id)
+        if repo is None:
+            return None
+        current_time = datetime.now().isoformat()
+        try:
+            head = await self.source.resolve_head(repo) if self.source is not None else None
+            previous = repo.get('lastCommit')
+            changed = bool(head) and head["commit"] != previous
+            deployment = None
+            changes = None
+            if changed:
+                if previous and self.differ is not None:
+                    try:
+                        changes = change_summary(await self.differ.diff_commits(repo, previous, head["commit"]))
+                    except Exception as e:
+                        # e.g. lastCommit was force-pushed away: deploy everything rather than stall
+                        print(f"Error diffing repository {repo_id} from {previous}: {e}")
+                        changes = None
+                if previous and repo.get('autoDeploy') and self._has_changes(changes):
+                    deployment = await self.create_gitops_deployment(GitOpsDeploymentCreate(
+                        repository_id=repo_id,
+                        commit_hash=head["commit"],
+                        branch=repo['branch'],
+                        environment=repo['environment'],
+                        description=head.get("message") or f"Sync of {repo['branch']} at {head['commit'][:7]}",
+                        triggered_by="gitops-sync",
+                        author=head.get("author") or "",
+                        changes=changes
+                    ))
+                    repo['lastDeployed'] = current_time
+                repo['lastCommit'] = head["commit"]
+                repo['commitCount'] = repo.get('commitCount', 0) + 1
+        except Exception as e:
+            repo['syncStatus'] = "Failed"
+            repo['lastSyncError'] = str(e)
+            if save:
+                self._save_repositories()
+            raise
+        repo['lastSync'] = current_time
+        repo['syncStatus'] = "Synced"
+        repo['lastSyncError'] = None
+        if save:
+            self._save_repositories()
+        return {
+            "repository_id": repo_id,
+            "commit": repo.get('lastCommit'),
+            "changed": changed,
+            "deployment_id": deployment.id if deployment else None,
+            "changes": changes,
+            "synced_at": current_time
+        }
+
+    async def record_push(self, repo_id: str, push: Dict[str, Any]) -> Optional[GitOpsDeployment]:
+        """Record the newest commit of a (coalesced) webhook push and auto-deploy it.
+
+        Diffing is best effort here: pushes usually come from remote
+        repositories the reader cannot open, and those are deployed without
+        a change summary.
+        """
+        async with self._repository_lock(repo_id):
+            return await self._record_push(repo_id, push)
+
+    async def _record_push(self, repo_id: str, push: Dict[str, Any]) -> Optional[GitOpsDeployment]:
+        repo = self.repositories.get(repo_id)
+        if repo is None or push["commit"] == repo.get('lastCommit'):
+            return None
+        current_time = datetime.now().isoformat()
+        previous = repo.get('lastCommit')
+        changes = None
+        if previous and self.differ is not None:
+            try:
+                changes = change_summary(await self.differ.diff_commits(repo, previous, push["commit"]))
+            except Exception:
+                changes = None
+        repo['lastCommit'] = push["commit"]
+        repo['commitCount'] = repo.get('commitCount', 0) + push.get("commits", 1)
+        deployment = None
+        if repo.get('autoDeploy') and self._has_changes(changes):
+            description = push.get("message") or f"Webhook push of {push['branch']} at {push['commit'][:7]}"
+            if push.get("pushes", 1) > 1:
+                description += f" ({push['pushes']} pushes coalesced)"
+            deployment = await self.create_gitops_deployment(GitOpsDeploymentCreate(
+                repository_id=repo_id,
+                commit_hash=push["commit"],
+                branch=push["branch"],
+                environment=repo['environment'],
+                description=description,
+                triggered_by="webhook",
+                author=push.get("author") or "",
+                changes=changes
+            ))
+            repo['lastDeployed'] = current_time
+        self._save_repositories()
+        return deployment
+
+    @staticmethod
+    def _has_changes(changes: Optional[Dict[str, Any]]) -> bool:
+        """Whether a change summary calls for a deployment; an unknown change always does"""
+        return changes is None or any(changes[kind] for kind in ("added", "modified", "removed"))
+
+    @staticmethod
+    def _count_key(deployment: Optional[Dict[str, Any]]) -> CountKey:
+        if not deployment or not deployment.get("repository_id"):
+            return None
+        return deployment["repository_id"], deployment.get("status")
+
+    def _record_count_change(self, before: CountKey, after: CountKey):
+        """Keep the owning repository's deployment counters in step with this write"""
+        if apply_count_change(self.repositories, before, after, "deploymentCount", "deploymentStatusCounts"):
+            self._save_repositories()
+
+    def verify_deployment_counts(self, repair: bool = False) -> List[Dict[str, Any]]:
+        """Check repository deployment counters against the GitOps deployments, optionally repairing them"""
+        mismatches = verify_counts(
+            self.repositories,
+            tally(self.deployments.values(), "repository_id"),
+            "deploymentCount",
+            "deploymentStatusCounts",
+            repair
+        )
+        if repair and mismatches:
+            self._save_repositories()
+        return mismatches
+
     # GitOps Deployment methods
     async def get_all_gitops_deployments(self) -> List[GitOpsDeployment]:
         """Get all GitOps deployments"""
@@ -149,6 +379,47 @@ class GitOpsService:
             print(f"Error fetching GitOps deployments: {e}")
             return []
 
+    async def get_deployment_history(self, deployment_filter: DeploymentFilter) -> Tuple[List[GitOpsDeployment], int, Optional[str]]:
+        """Newest-first page of GitOps deployments matching the filter, with the match count and next cursor.
+
+        Filters on a repository are served by a single composite posting
+        list (repository with status, environment or both), the date range
+        is found by bisecting it and the page is read by keyset position, so
+        a page costs its own size plus O(log n) whatever the history length.
+        """
+        filters = {"status": deployment_filter.status, "environment": deployment_filter.environment}
+        repo_id = deployment_filter.repository_id
+        if repo_id is not None:
+            if filters["status"] is not None and filters["environment"] is not None:
+                filters = {"repository_status_environment": (repo_id, filters["status"], filters["environment"])}
+            elif filters["status"] is not None:
+                filters["repository_status"] = (repo_id, filters.pop("status"))
+            elif filters["environment"] is not None:
+                filters["repository_environment"] = (repo_id, filters.pop("environment"))
+            else:
+                filters["repository_id"] = repo_id
+        keyed = self._deployment_index.query({field: [value] for field, value in filters.items() if value is not None})
+
+        lo = bisect_left(keyed, (deployment_filter.start_date,)) if deployment_filter.start_date else 0
+        # Date-only bounds include the whole end day
+        hi = bisect_right(keyed, (deployment_filter.end_date + "\uffff",)) if deployment_filter.end_date else len(keyed)
+        hi = max(hi, lo)
+        position = decode_cursor(deployment_filter.cursor) if deployment_filter.cursor else None
+        page_ids, next_position = paginate_sorted(keyed, True, 0, deployment_filter.limit, position, lo, hi)
+
+        page = [GitOpsDeployment(**self.deployments[deployment_id]) for deployment_id in page_ids]
+        next_cursor = encode_cursor(*next_position) if next_position else None
+        return page, hi - lo, next_cursor
+
+    async def get_repository_deployments(
+        self,
+        repository_id: str,
+        limit: Optional[int] = 50,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[GitOpsDeployment], int, Optional[str]]:
+        """Newest-first page of one repository's GitOps deployments"""
+        return await self.get_deployment_history(DeploymentFilter(repository_id=repository_id, limit=limit, cursor=cursor))
+
     async def get_gitops_deployment_by_id(self, deployment_id: str) -> Optional[GitOpsDeployment]:
         """Get a specific GitOps deployment by ID"""
         try:
@@ -174,51 +445,74 @@ class GitOpsService:
                 "status": "Pending",
                 "description": deployment_data.description,
                 "triggered_by": deployment_data.triggered_by,
+                "author": deployment_data.author,
                 "created": current_time,
                 "updated": current_time,
                 "deployed_at": None,
                 "duration": 0,
-                "logs_url": f"https://logs.example.com/gitops-deployment-{deployment_id}"
+                "logs_url": f"https://logs.example.com/gitops-deployment-{deployment_id}",
+                "changes": deployment_data.changes,
+                "revision": 1
             }
             
             self.deployments[deployment_id] = deployment_doc
+            self._deployment_index.add(deployment_id, self._index_fields(deployment_doc))
             self._save_deployments()
+            self._record_count_change(None, self._count_key(deployment_doc))
             
             return GitOpsDeployment(**deployment_doc)
         except Exception as e:
             print(f"Error creating GitOps deployment: {e}")
             return None
 
-    async def update_gitops_deployment(self, deployment_id: str, deployment_data: GitOpsDeploymentUpdate) -> Optional[GitOpsDeployment]:
+    async def update_gitops_deployment(
+        self,
+        deployment_id: str,
+        deployment_data: GitOpsDeploymentUpdate,
+        expected_revision: Optional[int] = None
+    ) -> Optional[GitOpsDeployment]:
         """Update an existing GitOps deployment"""
         try:
             if deployment_id not in self.deployments:
                 return None
             
             current_deployment = self.deployments[deployment_id]
+            check_revision(current_deployment, expected_revision)
             current_time = datetime.now().isoformat()
             
             update_data = deployment_data.dict(exclude_unset=True)
+            before = self._count_key(current_deployment)
+            self._deployment_index.remove(deployment_id, self._index_fields(current_deployment))
             for key, value in update_data.items():
                 current_deployment[key] = value
+            self._deployment_index.add(deployment_id, self._index_fields(current_deployment))
             
             current_deployment['updated'] = current_time
+            bump_revision(current_deployment)
             
             self._save_deployments()
+            self._record_count_change(before, self._count_key(current_deployment))
             
             return GitOpsDeployment(**current_deployment)
+        except RevisionConflictError:
+            raise
         except Exception as e:
             print(f"Error updating GitOps deployment {deployment_id}: {e}")
             return None
 
-    async def delete_gitops_deployment(self, deployment_id: str) -> bool:
+    async def delete_gitops_deployment(self, deployment_id: str, expected_revision: Optional[int] = None) -> bool:
         """Delete a GitOps deployment"""
         try:
             if deployment_id in self.deployments:
-                del self.deployments[deployment_id]
+                check_revision(self.deployments[deployment_id], expected_revision)
+                deployment = self.deployments.pop(deployment_id)
+                self._deployment_index.remove(deployment_id, self._index_fields(deployment))
                 self._save_deployments()
+                self._record_count_change(self._count_key(deployment), None)
                 return True
             return False
+        except RevisionConflictError:
+            raise
         except Exception as e:
             print(f"Error deleting GitOps deployment {deployment_id}: {e}")
             return False 
\ No newline at end of file
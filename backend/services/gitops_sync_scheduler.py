@@ -0,0 +1,215 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set, Tuple
+import asyncio
+import heapq
+import random
+import time
+
+
+class SyncScheduler:
+    """Runs every repository's sync on its syncInterval from a single timer heap.
+
+    One dispatcher task sleeps until the earliest due time, then starts the
+    due syncs while fewer than ``max_concurrent`` are running; each sync is
+    a short-lived task. Intervals are jittered by ``jitter`` (a fraction)
+    so repositories created together do not stay in lockstep, and failures
+    back off exponentially from ``base_backoff`` up to ``max_backoff``.
+    Rescheduling a repository bumps its generation, which turns its old
+    heap entry into a no-op instead of searching the heap for it.
+    """
+
+    def __init__(
+        self,
+        gitops_service,
+        max_concurrent: int = 4,
+        jitter: float = 0.1,
+        base_backoff: float = 30.0,
+        max_backoff: float = 3600.0,
+        min_interval: float = 10.0,
+        flush_interval: float = 5.0
+    ):
+        self.gitops_service = gitops_service
+        self.max_concurrent = max_concurrent
+        self.jitter = jitter
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.min_interval = min_interval
+        self.flush_interval = flush_interval
+        self._heap: List[Tuple[float, int, str]] = []
+        self._generation: Dict[str, int] = {}
+        self._due: Dict[str, float] = {}
+        self._failures: Dict[str, int] = {}
+        self._in_flight: Set[str] = set()
+        self._tasks: Set[asyncio.Task] = set()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._dirty = False
+        self._last_flush = 0.0
+        self._random = random.Random()
+
+    def _interval(self, repo: Dict[str, Any]) -> float:
+        return max(float(repo.get("syncInterval") or 300), self.min_interval)
+
+    def _jittered(self, seconds: float) -> float:
+        return seconds * (1 + self._random.uniform(-self.jitter, self.jitter))
+
+    def schedule(self, repo_id: str, delay: float):
+        """(Re)schedule a repository's next sync ``delay`` seconds from now"""
+        generation = self._generation.get(repo_id, 0) + 1
+        self._generation[repo_id] = generation
+        due = time.monotonic() + max(delay, 0.0)
+        self._due[repo_id] = due
+        heapq.heappush(self._heap, (due, generation, repo_id))
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def unschedule(self, repo_id: str):
+        self._generation[repo_id] = self._generation.get(repo_id, 0) + 1
+        self._due.pop(repo_id, None)
+        self._failures.pop(repo_id, None)
+
+    def repository_changed(self, repo_id: str):
+        """Pick up a created, edited or deleted repository"""
+        repo = self.gitops_service.repositories.get(repo_id)
+        if repo is None:
+            self.unschedule(repo_id)
+        else:
+            self.schedule(repo_id, self._initial_delay(repo))
+
+    def _initial_delay(self, repo: Dict[str, Any]) -> float:
+        """Time left of the current interval since lastSync; overdue repositories are spread over one jitter window"""
+        interval = self._interval(repo)
+        try:
+            elapsed = (datetime.now() - datetime.fromisoformat(repo["lastSync"])).total_seconds()
+        except (KeyError, TypeError, ValueError):
+            elapsed = interval
+        remaining = interval - elapsed
+        if remaining <= 0:
+            return self._random.uniform(0, interval * self.jitter)
+        return self._jittered(remaining)
+
+    def _pop_due(self, now: float) -> Optional[str]:
+        while self._heap:
+            due, generation, repo_id = self._heap[0]
+            if self._generation.get(repo_id) != generation:
+                heapq.heappop(self._heap)
+                continue
+            if due > now:
+                return None
+            heapq.heappop(self._heap)
+            return repo_id
+        return None
+
+    async def _sync(self, repo_id: str) -> Dict[str, Any]:
+        self._in_flight.add(repo_id)
+        try:
+            result = await self.gitops_service.sync_repository(repo_id, save=False)
+            self._failures.pop(repo_id, None)
+            return result
+        except Exception:
+            self._failures[repo_id] = self._failures.get(repo_id, 0) + 1
+            raise
+        finally:
+            self._in_flight.discard(repo_id)
+            self._dirty = True
+            repo = self.gitops_service.repositories.get(repo_id)
+            if repo is not None:
+                failures = self._failures.get(repo_id, 0)
+                if failures:
+                    delay = min(self.base_backoff * 2 ** (failures - 1), self.max_backoff)
+                else:
+                    delay = self._interval(repo)
+                self.schedule(repo_id, self._jittered(delay))
+
+    async def _run_scheduled(self, repo_id: str):
+        try:
+            await self._sync(repo_id)
+        except Exception as e:
+            print(f"Error syncing repository {repo_id}: {e}")
+
+    def _start(self, repo_id: str):
+        task = asyncio.create_task(self._run_scheduled(repo_id))
+        self._tasks.add(task)
+
+        def finished(done: asyncio.Task):
+            self._tasks.discard(done)
+            if self._wakeup is not None:
+                self._wakeup.set()
+
+        task.add_done_callback(finished)
+
+    def flush(self):
+        if self._dirty:
+            self._dirty = False
+            self._last_flush = time.monotonic()
+            self.gitops_service.save_repositories()
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            now = time.monotonic()
+            while len(self._tasks) < self.max_concurrent:
+                repo_id = self._pop_due(now)
+                if repo_id is None:
+                    break
+                repo = self.gitops_service.repositories.get(repo_id)
+                if repo is None or repo_id in self._in_flight:
+                    continue
+                if repo.get("status", "Active") != "Active":
+                    # Paused repositories are checked again after one interval
+                    self.schedule(repo_id, self._interval(repo))
+                    continue
+                self._start(repo_id)
+            if self._dirty and now - self._last_flush >= self.flush_interval:
+                self.flush()
+            timeout = None
+            if len(self._tasks) < self.max_concurrent:
+                self._pop_due(-1.0)  # drop stale entries so the head is live
+                if self._heap:
+                    timeout = max(self._heap[0][0] - now, 0.0)
+            if self._dirty:
+                timeout = min(timeout, self.flush_interval) if timeout is not None else self.flush_interval
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def sync_now(self, repo_id: str) -> Optional[Dict[str, Any]]:
+        """Sync a repository immediately, outside its schedule; raises ValueError if one is already running"""
+        if repo_id not in self.gitops_service.repositories:
+            return None
+        if repo_id in self._in_flight:
+            raise ValueError("A sync of this repository is already in progress")
+        self._generation[repo_id] = self._generation.get(repo_id, 0) + 1
+        result = await self._sync(repo_id)
+        self.flush()
+        return result
+
+    def get_status(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        upcoming = heapq.nsmallest(10, self._due.items(), key=lambda item: item[1])
+        return {
+            "scheduled": len(self._due),
+            "running": sorted(self._in_flight),
+            "max_concurrent": self.max_concurrent,
+            "next_due": [{"repository_id": repo_id, "in_seconds": round(max(due - now, 0.0), 1)} for repo_id, due in upcoming],
+            "backing_off": {repo_id: failures for repo_id, failures in self._failures.items()}
+        }
+
+    async def start(self):
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            for repo_id, repo in self.gitops_service.repositories.items():
+                self.schedule(repo_id, self._initial_delay(repo))
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(self._task, *tasks, return_exceptions=True)
+        self._task = None
+        self.flush()
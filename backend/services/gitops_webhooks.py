@@ -0,0 +1,149 @@
+from typing import Any, Dict, List, Optional, Tuple
+import asyncio
+import heapq
+import time
+
+
+def _get(payload: Dict[str, Any], *keys: str) -> Any:
+    value: Any = payload
+    for key in keys:
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+
+def parse_push(payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Repository names/urls, branch and head commit of a GitHub or GitLab push; None for other events"""
+    ref = payload.get("ref") or ""
+    commit = _get(payload, "head_commit", "id") or payload.get("checkout_sha") or payload.get("after")
+    if not ref.startswith("refs/heads/") or payload.get("deleted") or not commit or not commit.strip("0"):
+        return None
+    commits = payload.get("commits") if isinstance(payload.get("commits"), list) else []
+    head = payload.get("head_commit") or (commits[-1] if commits else {}) or {}
+    names = [
+        _get(payload, "repository", "name"), _get(payload, "repository", "full_name"),
+        _get(payload, "project", "name"), _get(payload, "project", "path_with_namespace")
+    ]
+    urls = [
+        _get(payload, "repository", field) for field in ("clone_url", "ssh_url", "git_url", "html_url", "url", "git_http_url", "git_ssh_url")
+    ] + [_get(payload, "project", field) for field in ("git_http_url", "git_ssh_url", "web_url")]
+    return {
+        "names": [name for name in names if isinstance(name, str)],
+        "urls": [url for url in urls if isinstance(url, str)],
+        "branch": ref[len("refs/heads/"):],
+        "commit": commit,
+        "author": _get(head, "author", "name") or _get(payload, "pusher", "name") or payload.get("user_name") or "",
+        "message": (head.get("message") or "").split("\n", 1)[0],
+        "commits": max(len(commits), 1)
+    }
+
+
+class WebhookIntake:
+    """Accepts push webhooks immediately and deploys each burst of pushes once.
+
+    A push is matched to repositories through the GitOps service's
+    name/url index and parked under (repository, branch). Further pushes
+    to the same key within ``debounce_seconds`` of the first replace the
+    parked commit with the newest one, and when the window closes a single
+    deployment of that commit is recorded. One task delivers every window
+    in deadline order.
+    """
+
+    def __init__(self, gitops_service, debounce_seconds: float = 5.0):
+        self.gitops_service = gitops_service
+        self.debounce_seconds = debounce_seconds
+        self._pending: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._deadlines: List[Tuple[float, Tuple[str, str]]] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stats = {"received": 0, "ignored": 0, "unmatched": 0, "coalesced": 0, "delivered": 0, "deployed": 0, "failed": 0}
+
+    def submit(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Queue a webhook payload and report which repositories it was queued for"""
+        self._stats["received"] += 1
+        push = parse_push(payload)
+        if push is None:
+            self._stats["ignored"] += 1
+            return {"queued": False, "reason": "Not a branch push", "repositories": []}
+        repo_ids = [
+            repo_id for repo_id in self.gitops_service.find_repositories(push["names"], push["urls"])
+            if self.gitops_service.repositories[repo_id].get("branch") == push["branch"]
+        ]
+        if not repo_ids:
+            self._stats["unmatched"] += 1
+            return {"queued": False, "reason": "No repository tracks this branch", "repositories": [], "branch": push["branch"]}
+        for repo_id in repo_ids:
+            self._enqueue(repo_id, push)
+        return {"queued": True, "repositories": repo_ids, "branch": push["branch"], "commit": push["commit"]}
+
+    def _enqueue(self, repo_id: str, push: Dict[str, Any]):
+        key = (repo_id, push["branch"])
+        parked = self._pending.get(key)
+        if parked is not None:
+            self._stats["coalesced"] += 1
+            parked.update(
+                commit=push["commit"],
+                author=push["author"],
+                message=push["message"],
+                commits=parked["commits"] + push["commits"],
+                pushes=parked["pushes"] + 1
+            )
+            return
+        self._pending[key] = {"branch": push["branch"], "commit": push["commit"], "author": push["author"],
+                              "message": push["message"], "commits": push["commits"], "pushes": 1}
+        heapq.heappush(self._deadlines, (time.monotonic() + self.debounce_seconds, key))
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _deliver(self, key: Tuple[str, str]):
+        push = self._pending.pop(key)
+        self._stats["delivered"] += 1
+        try:
+            deployment = await self.gitops_service.record_push(key[0], push)
+            if deployment is not None:
+                self._stats["deployed"] += 1
+        except Exception as e:
+            self._stats["failed"] += 1
+            print(f"Error delivering push to repository {key[0]}: {e}")
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            now = time.monotonic()
+            while self._deadlines and self._deadlines[0][0] <= now:
+                _, key = heapq.heappop(self._deadlines)
+                await self._deliver(key)
+            timeout = max(self._deadlines[0][0] - time.monotonic(), 0.0) if self._deadlines else None
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def get_status(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            **self._stats,
+            "debounce_seconds": self.debounce_seconds,
+            "pending": [
+                {"repository_id": key[0], "branch": key[1], "commit": self._pending[key]["commit"],
+                 "pushes": self._pending[key]["pushes"], "in_seconds": round(max(deadline - now, 0.0), 1)}
+                for deadline, key in sorted(self._deadlines)
+            ]
+        }
+
+    async def start(self):
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the dispatcher and deliver the pushes still waiting out their window"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        while self._deadlines:
+            _, key = heapq.heappop(self._deadlines)
+            await self._deliver(key)
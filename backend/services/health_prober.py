@@ -0,0 +1,247 @@
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+from urllib.parse import urlsplit
+import asyncio
+import heapq
+import itertools
+import random
+import ssl
+import time
+
+
+class ProbeTarget:
+    """A configured health-check endpoint and its rolling probe results"""
+
+    def __init__(self, app_id: str, config: Dict[str, Any], window: int):
+        self.app_id = app_id
+        self.config = config
+        self.kind = (config.get("type") or "http").lower()
+        self.interval = max(float(config.get("interval") or 30), 1.0)
+        self.timeout = max(float(config.get("timeout") or 5.0), 0.1)
+        self.use_tls = False
+        self.path = "/"
+        if self.kind == "http":
+            url = urlsplit(config.get("url") or "")
+            self.use_tls = url.scheme == "https"
+            self.host = url.hostname or config.get("host")
+            self.port = url.port or config.get("port") or (443 if self.use_tls else 80)
+            self.path = (url.path or "/") + (f"?{url.query}" if url.query else "")
+        else:
+            self.host = config.get("host")
+            self.port = config.get("port")
+        self.results: Deque[Tuple[bool, float]] = deque(maxlen=window)
+        self.up_since: Optional[float] = None
+
+    @property
+    def valid(self) -> bool:
+        return self.kind in ("http", "tcp") and bool(self.host) and bool(self.port)
+
+    def record(self, ok: bool, elapsed_ms: float, now: float) -> Dict[str, Any]:
+        """Add a probe result and return the rolling HealthStatus document"""
+        self.results.append((ok, elapsed_ms))
+        if ok and self.up_since is None:
+            self.up_since = now
+        elif not ok:
+            self.up_since = None
+
+        failures = sum(1 for success, _ in self.results if not success)
+        latencies = [ms for success, ms in self.results if success]
+        error_rate = failures / len(self.results) * 100
+        if not ok:
+            status = "Critical"
+        elif failures:
+            status = "Warning"
+        else:
+            status = "Healthy"
+        return {
+            "status": status,
+            "lastCheck": datetime.now().isoformat(),
+            "responseTime": int(round(sum(latencies) / len(latencies))) if latencies else 0,
+            "uptime": int(now - self.up_since) if self.up_since is not None else 0,
+            "errorRate": round(error_rate, 2),
+        }
+
+
+class HealthProber:
+    """Asyncio scheduler that probes application health-check endpoints.
+
+    A single task keeps a heap of due probes, runs at most
+    ``max_concurrency`` of them at a time and periodically flushes the
+    accumulated HealthStatus documents through the batch update path.
+    Flushed results are applied in memory; the applications file is only
+    rewritten every ``save_interval`` seconds and when the prober stops.
+    """
+
+    def __init__(
+        self,
+        application_service,
+        max_concurrency: int = 100,
+        window: int = 20,
+        jitter: float = 0.1,
+        flush_interval: float = 1.0,
+        refresh_interval: float = 10.0,
+        save_interval: float = 30.0
+    ):
+        self.application_service = application_service
+        self.max_concurrency = max_concurrency
+        self.window = window
+        self.jitter = jitter
+        self.flush_interval = flush_interval
+        self.refresh_interval = refresh_interval
+        self.save_interval = save_interval
+        self.targets: Dict[str, ProbeTarget] = {}
+        self.probes_run = 0
+        self._heap: List[Tuple[float, int, str, ProbeTarget]] = []
+        self._counter = itertools.count()
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._in_flight: Set[asyncio.Task] = set()
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._ssl_context: Optional[ssl.SSLContext] = None
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def _jittered(self, interval: float) -> float:
+        return interval * (1 + random.uniform(-self.jitter, self.jitter))
+
+    def _schedule(self, target: ProbeTarget, due: float):
+        heapq.heappush(self._heap, (due, next(self._counter), target.app_id, target))
+
+    def refresh_targets(self):
+        """Pick up added, changed and removed healthCheck configurations"""
+        now = time.monotonic()
+        configured = {
+            app_id: app.get("healthCheck")
+            for app_id, app in self.application_service.applications.items()
+            if app.get("healthCheck")
+        }
+        for app_id in list(self.targets):
+            if app_id not in configured:
+                del self.targets[app_id]
+        for app_id, config in configured.items():
+            current = self.targets.get(app_id)
+            if current is not None and current.config == config:
+                continue
+            target = ProbeTarget(app_id, config, self.window)
+            if not target.valid:
+                self.targets.pop(app_id, None)
+                continue
+            self.targets[app_id] = target
+            # Spread first probes across the interval instead of bursting
+            self._schedule(target, now + random.uniform(0, target.interval))
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _probe(self, target: ProbeTarget) -> Tuple[bool, float]:
+        started = time.perf_counter()
+        writer = None
+        try:
+            ssl_context = None
+            if target.use_tls:
+                if self._ssl_context is None:
+                    self._ssl_context = ssl.create_default_context()
+                ssl_context = self._ssl_context
+
+            async def exchange() -> bool:
+                nonlocal writer
+                reader, writer = await asyncio.open_connection(target.host, target.port, ssl=ssl_context)
+                if target.kind == "tcp":
+                    return True
+                request = (
+                    f"GET {target.path} HTTP/1.1\r\n"
+                    f"Host: {target.host}\r\n"
+                    "User-Agent: cloud-orchestrator-health\r\n"
+                    "Connection: close\r\n\r\n"
+                )
+                writer.write(request.encode())
+                await writer.drain()
+                status_line = await reader.readline()
+                parts = status_line.split()
+                return len(parts) >= 2 and parts[1].isdigit() and 200 <= int(parts[1]) < 400
+
+            ok = await asyncio.wait_for(exchange(), timeout=target.timeout)
+        except Exception:
+            ok = False
+        finally:
+            if writer is not None:
+                writer.close()
+        return ok, (time.perf_counter() - started) * 1000
+
+    async def _probe_and_record(self, target: ProbeTarget):
+        try:
+            ok, elapsed_ms = await self._probe(target)
+            self.probes_run += 1
+            if self.targets.get(target.app_id) is target:
+                self._pending[target.app_id] = target.record(ok, elapsed_ms, time.monotonic())
+                if ok:
+                    self.application_service.latency_store.record(target.app_id, elapsed_ms)
+        finally:
+            self._semaphore.release()
+
+    async def flush(self) -> Dict[str, str]:
+        """Write accumulated health results with one batch update"""
+        if not self._pending:
+            return {}
+        updates, self._pending = self._pending, {}
+        return await self.application_service.update_health_batch(updates, record_latency=False, save=False)
+
+    async def _run(self):
+        next_flush = time.monotonic() + self.flush_interval
+        next_refresh = time.monotonic()
+        next_save = time.monotonic() + self.save_interval
+        while True:
+            now = time.monotonic()
+            if now >= next_refresh:
+                self.refresh_targets()
+                next_refresh = now + self.refresh_interval
+
+            while self._heap and self._heap[0][0] <= now:
+                _, _, app_id, target = heapq.heappop(self._heap)
+                if self.targets.get(app_id) is not target:
+                    continue
+                await self._semaphore.acquire()
+                task = asyncio.create_task(self._probe_and_record(target))
+                self._in_flight.add(task)
+                task.add_done_callback(self._in_flight.discard)
+                self._schedule(target, now + self._jittered(target.interval))
+                now = time.monotonic()
+
+            if now >= next_flush:
+                try:
+                    await self.flush()
+                except Exception as e:
+                    print(f"Error flushing health probe results: {e}")
+                next_flush = now + self.flush_interval
+
+            if now >= next_save:
+                self.application_service.flush()
+                next_save = now + self.save_interval
+
+            deadline = min(next_flush, next_refresh, next_save)
+            if self._heap:
+                deadline = min(deadline, self._heap[0][0])
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=max(deadline - time.monotonic(), 0))
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self):
+        if self._task is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        if self._in_flight:
+            await asyncio.gather(*self._in_flight, return_exceptions=True)
+        await self.flush()
+        self.application_service.flush()
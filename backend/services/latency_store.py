@@ -0,0 +1,73 @@
+from typing import Any, Dict, List, Optional
+import time
+
+from utils.sketch import DDSketch
+
+MINUTE = 60
+HOUR = 3600
+
+
+class BucketedSketch:
+    """Fixed ring of time-bucketed sketches that merge into larger windows"""
+
+    def __init__(self, resolution: int, buckets: int):
+        self.resolution = resolution
+        self.starts: List[Optional[int]] = [None] * buckets
+        self.sketches: List[Optional[DDSketch]] = [None] * buckets
+
+    def add(self, value: float, ts: float):
+        start = int(ts // self.resolution) * self.resolution
+        slot = (start // self.resolution) % len(self.starts)
+        if self.starts[slot] != start:
+            if self.starts[slot] is not None and self.starts[slot] > start:
+                return
+            self.starts[slot] = start
+            self.sketches[slot] = DDSketch()
+        self.sketches[slot].add(value)
+
+    def merged(self, since: float) -> DDSketch:
+        result = DDSketch()
+        for start, sketch in zip(self.starts, self.sketches):
+            if start is not None and start + self.resolution > since:
+                result.merge(sketch)
+        return result
+
+
+class LatencyStore:
+    """Per-application response-time sketches by minute (last hour) and hour (last day)"""
+
+    def __init__(self):
+        self._apps: Dict[str, Dict[int, BucketedSketch]] = {}
+
+    def record(self, app_id: str, response_time_ms: float, timestamp: Optional[float] = None):
+        ts = timestamp if timestamp is not None else time.time()
+        buckets = self._apps.get(app_id)
+        if buckets is None:
+            buckets = self._apps[app_id] = {MINUTE: BucketedSketch(MINUTE, 60), HOUR: BucketedSketch(HOUR, 24)}
+        for bucketed in buckets.values():
+            bucketed.add(response_time_ms, ts)
+
+    def summary(
+        self,
+        app_id: str,
+        window: int = HOUR,
+        quantiles: List[float] = (0.5, 0.9, 0.99),
+        now: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """Merge the buckets covering the last ``window`` seconds and read quantiles"""
+        now = now if now is not None else time.time()
+        buckets = self._apps.get(app_id)
+        resolution = MINUTE if window <= HOUR else HOUR
+        sketch = buckets[resolution].merged(now - window) if buckets else DDSketch()
+        values = sketch.quantiles(quantiles)
+        return {
+            "window": window,
+            "count": sketch.count,
+            "mean": sketch.mean,
+            "min": sketch.min if sketch.count else None,
+            "max": sketch.max if sketch.count else None,
+            "quantiles": {f"p{round(q * 100, 3):g}": value for q, value in zip(quantiles, values)},
+        }
+
+    def drop(self, app_id: str):
+        self._apps.pop(app_id, None)
@@ -4,6 +4,7 @@ import uuid
 import json
 import os
 from models.logs import LogEntry, LogEntryCreate, LogFilter
+from utils.revisions import RevisionConflictError, check_revision
 
 class LogsService:
     def __init__(self):
@@ -93,7 +94,8 @@ class LogsService:
                 "source": log_data.source,
                 "details": log_data.details,
                 "application_id": log_data.application_id,
-                "deployment_id": log_data.deployment_id
+                "deployment_id": log_data.deployment_id,
+                "revision": 1
             }
             
             self.logs.append(log_entry)
@@ -109,15 +111,18 @@ class LogsService:
             print(f"Error creating log: {e}")
             return None
 
-    async def delete_log(self, log_id: str) -> bool:
+    async def delete_log(self, log_id: str, expected_revision: Optional[int] = None) -> bool:
         """Delete a log entry"""
         try:
             for i, log_data in enumerate(self.logs):
                 if log_data.get('id') == log_id:
+                    check_revision(log_data, expected_revision)
                     del self.logs[i]
                     self._save_data()
                     return True
             return False
+        except RevisionConflictError:
+            raise
         except Exception as e:
             print(f"Error deleting log {log_id}: {e}")
             return False
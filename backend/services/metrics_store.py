@@ -0,0 +1,183 @@
+from array import array
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import time
+
+# Numeric leaves of the Metrics model that are sampled over time
+METRIC_SERIES = {
+    "cpu": ("cpu", "current"),
+    "memory": ("memory", "current"),
+    "network.bytesIn": ("network", "bytesIn"),
+    "network.bytesOut": ("network", "bytesOut"),
+    "requests.total": ("requests", "total"),
+    "requests.perSecond": ("requests", "perSecond"),
+    "requests.errors": ("requests", "errors"),
+}
+
+RAW_CAPACITY = 512
+
+# Rollup resolution in seconds -> number of buckets retained
+ROLLUP_RETENTION = {
+    60: 240,      # 4 hours of 1m buckets
+    300: 288,     # 24 hours of 5m buckets
+    3600: 168,    # 7 days of 1h buckets
+}
+
+
+class RingBuffer:
+    """Fixed-capacity columnar ring buffer backed by typed arrays.
+
+    Columns grow until the capacity is reached and are then overwritten
+    oldest-first, so memory is proportional to the samples actually seen.
+    """
+
+    def __init__(self, capacity: int, columns: Tuple[str, ...]):
+        self.capacity = capacity
+        self.columns = {name: array("d") for name in columns}
+        self.start = 0
+        self.size = 0
+
+    def _slot(self, index: int) -> int:
+        return (self.start + index) % self.capacity
+
+    def append(self, **values: float):
+        if self.size < self.capacity:
+            for name, column in self.columns.items():
+                column.append(values[name])
+            self.size += 1
+        else:
+            for name, column in self.columns.items():
+                column[self.start] = values[name]
+            self.start = (self.start + 1) % self.capacity
+
+    def get(self, index: int, column: str) -> float:
+        return self.columns[column][self._slot(index)]
+
+    def set_last(self, column: str, value: float):
+        self.columns[column][self._slot(self.size - 1)] = value
+
+    def bisect_left(self, column: str, value: float) -> int:
+        """First logical index whose column value is >= value (column must be ascending)"""
+        lo, hi = 0, self.size
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.get(mid, column) < value:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def rows(self, start_index: int = 0) -> Iterator[Dict[str, float]]:
+        for index in range(start_index, self.size):
+            slot = self._slot(index)
+            yield {name: column[slot] for name, column in self.columns.items()}
+
+
+class Series:
+    """Raw samples for one metric plus its automatic min/max/avg/last rollups"""
+
+    def __init__(self):
+        self.raw = RingBuffer(RAW_CAPACITY, ("ts", "value"))
+        self.rollups = {
+            resolution: RingBuffer(retention, ("ts", "min", "max", "sum", "count", "last"))
+            for resolution, retention in ROLLUP_RETENTION.items()
+        }
+
+    def add(self, ts: float, value: float):
+        if self.raw.size and ts < self.raw.get(self.raw.size - 1, "ts"):
+            # Late samples would break the ordering bisect relies on
+            return
+        self.raw.append(ts=ts, value=value)
+        for resolution, buckets in self.rollups.items():
+            bucket_ts = ts - ts % resolution
+            if buckets.size and buckets.get(buckets.size - 1, "ts") == bucket_ts:
+                buckets.set_last("min", min(buckets.get(buckets.size - 1, "min"), value))
+                buckets.set_last("max", max(buckets.get(buckets.size - 1, "max"), value))
+                buckets.set_last("sum", buckets.get(buckets.size - 1, "sum") + value)
+                buckets.set_last("count", buckets.get(buckets.size - 1, "count") + 1)
+                buckets.set_last("last", value)
+            else:
+                buckets.append(ts=bucket_ts, min=value, max=value, sum=value, count=1, last=value)
+
+    def _source(self, start: float, step: int) -> Iterator[Dict[str, float]]:
+        """Pick the coarsest store that is no coarser than step and still covers start"""
+        for resolution in sorted(self.rollups, reverse=True):
+            buckets = self.rollups[resolution]
+            if resolution > step or step % resolution or not buckets.size:
+                continue
+            covers_start = buckets.size < buckets.capacity or buckets.get(0, "ts") <= start
+            if covers_start or resolution == min(self.rollups):
+                return buckets.rows(buckets.bisect_left("ts", start - start % resolution))
+        raw = self.raw
+        return (
+            {"ts": row["ts"], "min": row["value"], "max": row["value"], "sum": row["value"], "count": 1, "last": row["value"]}
+            for row in raw.rows(raw.bisect_left("ts", start))
+        )
+
+    def query(self, start: float, end: float, step: int) -> List[Dict[str, Any]]:
+        points: List[Dict[str, Any]] = []
+        current = None
+        for row in self._source(start, step):
+            if row["ts"] > end:
+                break
+            bucket_ts = row["ts"] - row["ts"] % step
+            if current is None or current["ts"] != bucket_ts:
+                current = {"ts": bucket_ts, "min": row["min"], "max": row["max"], "sum": 0.0, "count": 0, "last": row["last"]}
+                points.append(current)
+            current["min"] = min(current["min"], row["min"])
+            current["max"] = max(current["max"], row["max"])
+            current["sum"] += row["sum"]
+            current["count"] += row["count"]
+            current["last"] = row["last"]
+        return [
+            {
+                "timestamp": datetime.fromtimestamp(point["ts"]).isoformat(),
+                "min": point["min"],
+                "max": point["max"],
+                "avg": point["sum"] / point["count"] if point["count"] else 0.0,
+                "last": point["last"],
+                "samples": int(point["count"]),
+            }
+            for point in points
+        ]
+
+
+class MetricsStore:
+    """In-process per-application metrics time-series store"""
+
+    def __init__(self):
+        self._series: Dict[str, Dict[str, Series]] = {}
+
+    def record(self, app_id: str, metrics: Dict[str, Any], timestamp: Optional[float] = None):
+        """Append one sample per known metric present in a Metrics-shaped dict"""
+        ts = timestamp if timestamp is not None else time.time()
+        app_series = self._series.setdefault(app_id, {})
+        for name, (group, field) in METRIC_SERIES.items():
+            values = metrics.get(group)
+            value = values.get(field) if isinstance(values, dict) else None
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                series = app_series.get(name)
+                if series is None:
+                    series = app_series[name] = Series()
+                series.add(ts, float(value))
+
+    def query(
+        self,
+        app_id: str,
+        series: Optional[List[str]],
+        start: float,
+        end: float,
+        step: int
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        names = series or list(METRIC_SERIES)
+        unknown = [name for name in names if name not in METRIC_SERIES]
+        if unknown:
+            raise ValueError(f"Unknown metric series: {', '.join(unknown)}")
+        app_series = self._series.get(app_id, {})
+        return {
+            name: app_series[name].query(start, end, step) if name in app_series else []
+            for name in names
+        }
+
+    def drop(self, app_id: str):
+        self._series.pop(app_id, None)
@@ -0,0 +1,356 @@
+from typing import List, Optional, Dict, Any
+from datetime import datetime
+import asyncio
+import uuid
+import json
+import os
+from models.deployment import DeploymentCreate
+from models.release import Release, ReleaseCreate
+from services.deployment_service import SUCCESSFUL_STATUSES, TERMINAL_STATUSES
+from utils.revisions import bump_revision
+
+FINISHED_STEP_STATUSES = {"Succeeded", "Failed", "Cancelled"}
+
+
+def plan_waves(steps: List[Dict[str, Any]]) -> List[List[str]]:
+    """Group release steps into topological waves with Kahn's algorithm.
+
+    Wave n holds the steps whose longest dependency chain has n links.
+    Raises ValueError on duplicate names, unknown dependencies or cycles.
+    """
+    names = [step["name"] for step in steps]
+    if len(set(names)) != len(names):
+        duplicates = sorted({name for name in names if names.count(name) > 1})
+        raise ValueError(f"Duplicate release step names: {', '.join(duplicates)}")
+    dependents: Dict[str, List[str]] = {name: [] for name in names}
+    in_degree: Dict[str, int] = {}
+    for step in steps:
+        depends_on = list(dict.fromkeys(step.get("depends_on") or []))
+        for dependency in depends_on:
+            if dependency not in dependents:
+                raise ValueError(f"Step {step['name']} depends on unknown step {dependency}")
+            if dependency == step["name"]:
+                raise ValueError(f"Step {step['name']} depends on itself")
+            dependents[dependency].append(step["name"])
+        in_degree[step["name"]] = len(depends_on)
+
+    waves = []
+    wave = [name for name in names if in_degree[name] == 0]
+    placed = 0
+    while wave:
+        waves.append(wave)
+        placed += len(wave)
+        next_wave = []
+        for name in wave:
+            for dependent in dependents[name]:
+                in_degree[dependent] -= 1
+                if in_degree[dependent] == 0:
+                    next_wave.append(dependent)
+        wave = next_wave
+    if placed != len(names):
+        cyclic = [name for name in names if in_degree[name] > 0]
+        raise ValueError(f"Release steps contain a dependency cycle among: {', '.join(cyclic)}")
+    return waves
+
+
+def critical_path(steps: List[Dict[str, Any]], waves: List[List[str]], weights: Optional[Dict[str, float]] = None) -> List[str]:
+    """Longest chain of dependent steps, weighted by duration when given, otherwise by step count"""
+    by_name = {step["name"]: step for step in steps}
+    length: Dict[str, float] = {}
+    previous: Dict[str, Optional[str]] = {}
+    for wave in waves:
+        for name in wave:
+            best, best_length = None, 0.0
+            for dependency in by_name[name].get("depends_on") or []:
+                if length[dependency] > best_length:
+                    best, best_length = dependency, length[dependency]
+            weight = weights.get(name, 0.0) if weights is not None else 1.0
+            length[name] = best_length + (weight or 0.0)
+            previous[name] = best
+    if not length:
+        return []
+    node: Optional[str] = max(length, key=lambda name: length[name])
+    path = []
+    while node is not None:
+        path.append(node)
+        node = previous[node]
+    return list(reversed(path))
+
+
+def _seconds_between(start: Optional[str], end: Optional[str]) -> Optional[float]:
+    if not start or not end:
+        return None
+    return round((datetime.fromisoformat(end) - datetime.fromisoformat(start)).total_seconds(), 3)
+
+
+class ReleaseService:
+    """Releases group dependent deployments and run them as a DAG.
+
+    A step starts as soon as all of its dependencies have succeeded, not
+    when its whole wave is done, so independent branches never wait for
+    each other and the release takes as long as its critical path. When a
+    step fails or is cancelled every step that depends on it, directly or
+    transitively, is cancelled without being deployed.
+    """
+
+    def __init__(self, deployment_service, deployment_executor, releases_file: str = "data/releases.json"):
+        self.releases = {}
+        self.deployment_service = deployment_service
+        self.deployment_executor = deployment_executor
+        self.data_file = releases_file
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._waiters: Dict[str, List[asyncio.Future]] = {}
+        self._cancel_requested = set()
+        deployment_service.add_status_listener(self._on_deployment_status)
+        self._load_data()
+
+    def _load_data(self):
+        """Load releases from JSON file"""
+        try:
+            if os.path.exists(self.data_file):
+                with open(self.data_file, 'r') as f:
+                    data = json.load(f)
+                    if isinstance(data, list):
+                        self.releases = {item['id']: item for item in data}
+                    else:
+                        self.releases = data
+        except Exception as e:
+            print(f"Error loading release data: {e}")
+            self.releases = {}
+
+    def _save_data(self):
+        """Save releases to JSON file"""
+        try:
+            os.makedirs(os.path.dirname(self.data_file), exist_ok=True)
+            with open(self.data_file, 'w') as f:
+                json.dump(self.releases, f, indent=2)
+        except Exception as e:
+            print(f"Error saving release data: {e}")
+
+    def _touch(self, release: Dict[str, Any]):
+        release['updated'] = datetime.now().isoformat()
+        bump_revision(release)
+        self._save_data()
+
+    def plan_release(self, release_data: ReleaseCreate) -> Dict[str, Any]:
+        """Validate a release and return its waves and critical path without running it"""
+        steps = [step.dict() for step in release_data.steps]
+        if not steps:
+            raise ValueError("A release needs at least one step")
+        waves = plan_waves(steps)
+        return {"waves": waves, "critical_path": critical_path(steps, waves)}
+
+    async def get_all_releases(self) -> List[Release]:
+        """Get all releases, newest first"""
+        try:
+            releases = sorted(self.releases.values(), key=lambda release: release.get('created') or "", reverse=True)
+            return [Release(**release) for release in releases]
+        except Exception as e:
+            print(f"Error fetching releases: {e}")
+            return []
+
+    async def get_release_by_id(self, release_id: str) -> Optional[Release]:
+        """Get a specific release by ID"""
+        try:
+            if release_id in self.releases:
+                return Release(**self.releases[release_id])
+            return None
+        except Exception as e:
+            print(f"Error fetching release {release_id}: {e}")
+            return None
+
+    async def create_release(self, release_data: ReleaseCreate) -> Release:
+        """Validate and start a release, raising ValueError if its steps are not a DAG"""
+        plan = self.plan_release(release_data)
+        wave_of = {name: index for index, wave in enumerate(plan["waves"]) for name in wave}
+        release_id = str(uuid.uuid4())
+        current_time = datetime.now().isoformat()
+        release = {
+            "id": release_id,
+            "name": release_data.name,
+            "description": release_data.description or "",
+            "triggered_by": release_data.triggered_by or "",
+            "status": "Pending",
+            "steps": [
+                {**step.dict(), "wave": wave_of[step.name], "status": "Waiting"}
+                for step in release_data.steps
+            ],
+            "waves": plan["waves"],
+            "critical_path": plan["critical_path"],
+            "created": current_time,
+            "updated": current_time,
+            "revision": 1
+        }
+        self.releases[release_id] = release
+        self._save_data()
+        self._launch(release_id)
+        return Release(**release)
+
+    async def cancel_release(self, release_id: str) -> Optional[Release]:
+        """Cancel the running steps of a release and every step that has not started"""
+        release = self.releases.get(release_id)
+        if release is None:
+            return None
+        if release['status'] in FINISHED_STEP_STATUSES:
+            raise ValueError(f"Release already finished with status {release['status']}")
+        self._cancel_requested.add(release_id)
+        for step in release['steps']:
+            if step['status'] == "Waiting":
+                self._finish_step(step, "Cancelled", "Release cancelled")
+        self._touch(release)
+        for step in release['steps']:
+            if step['status'] == "Running" and step.get('deployment_id'):
+                await self.deployment_executor.cancel(step['deployment_id'])
+        task = self._tasks.get(release_id)
+        if task is not None:
+            await asyncio.gather(task, return_exceptions=True)
+        else:
+            self._cancel_requested.discard(release_id)
+            release['status'] = "Cancelled"
+            release['finished_at'] = datetime.now().isoformat()
+            self._touch(release)
+        return Release(**self.releases[release_id])
+
+    def _on_deployment_status(self, deployment_id: str, status: Optional[str]):
+        if status is not None and status not in TERMINAL_STATUSES:
+            return
+        for future in self._waiters.pop(deployment_id, []):
+            if not future.done():
+                future.set_result(status or "Cancelled")
+
+    async def _wait_for_deployment(self, deployment_id: str) -> str:
+        deployment = self.deployment_service.deployments.get(deployment_id)
+        if deployment is None:
+            return "Cancelled"
+        if deployment.get('status') in TERMINAL_STATUSES:
+            return deployment['status']
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(deployment_id, []).append(future)
+        return await future
+
+    def _finish_step(self, step: Dict[str, Any], status: str, reason: Optional[str] = None):
+        step['status'] = status
+        step['finished_at'] = datetime.now().isoformat()
+        step['duration'] = _seconds_between(step.get('started_at'), step['finished_at'])
+        if reason:
+            step['reason'] = reason
+
+    async def _start_step(self, release: Dict[str, Any], step: Dict[str, Any]) -> asyncio.Task:
+        try:
+            deployment = await self.deployment_service.create_deployment(DeploymentCreate(**step['deployment']))
+            if deployment is None:
+                raise RuntimeError(f"Could not create deployment for step {step['name']}")
+        except Exception as e:
+            self._finish_step(step, "Failed", str(e))
+            raise
+        step['deployment_id'] = deployment.id
+        step['status'] = "Running"
+        step['started_at'] = datetime.now().isoformat()
+        self._touch(release)
+        self.deployment_executor.submit(deployment.id)
+        return asyncio.create_task(self._wait_for_deployment(deployment.id))
+
+    def _launch(self, release_id: str):
+        self._tasks[release_id] = asyncio.create_task(self._execute(release_id))
+
+    async def _execute(self, release_id: str):
+        release = self.releases[release_id]
+        steps = {step['name']: step for step in release['steps']}
+        dependents: Dict[str, List[str]] = {name: [] for name in steps}
+        for step in release['steps']:
+            for dependency in step.get('depends_on') or []:
+                dependents[dependency].append(step['name'])
+        running: Dict[asyncio.Task, str] = {}
+
+        def cancel_dependents(name: str, reason: str):
+            stack = list(dependents[name])
+            while stack:
+                dependent = steps[stack.pop()]
+                if dependent['status'] == "Waiting":
+                    self._finish_step(dependent, "Cancelled", reason)
+                    stack.extend(dependents[dependent['name']])
+
+        def is_ready(step: Dict[str, Any]) -> bool:
+            return step['status'] == "Waiting" and all(
+                steps[dependency]['status'] == "Succeeded" for dependency in step.get('depends_on') or []
+            )
+
+        try:
+            if release['status'] == "Pending":
+                release['status'] = "InProgress"
+                release['started_at'] = datetime.now().isoformat()
+                self._touch(release)
+            # Resume steps whose deployment was already submitted before a restart
+            for step in release['steps']:
+                if step['status'] == "Running" and step.get('deployment_id'):
+                    running[asyncio.create_task(self._wait_for_deployment(step['deployment_id']))] = step['name']
+            for step in release['steps']:
+                if step['status'] in ("Failed", "Cancelled"):
+                    cancel_dependents(step['name'], f"Dependency {step['name']} {step['status'].lower()}")
+            for step in release['steps']:
+                if is_ready(step) and release_id not in self._cancel_requested:
+                    running[await self._start_step(release, step)] = step['name']
+
+            while running:
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    name = running.pop(task)
+                    step = steps[name]
+                    status = task.result()
+                    if status in SUCCESSFUL_STATUSES:
+                        self._finish_step(step, "Succeeded")
+                        for dependent in dependents[name]:
+                            if is_ready(steps[dependent]) and release_id not in self._cancel_requested:
+                                running[await self._start_step(release, steps[dependent])] = dependent
+                    else:
+                        self._finish_step(step, "Failed" if status == "Failed" else "Cancelled")
+                        cancel_dependents(name, f"Dependency {name} {step['status'].lower()}")
+                    self._touch(release)
+
+            statuses = {step['status'] for step in release['steps']}
+            if release_id in self._cancel_requested:
+                release['status'] = "Cancelled"
+            elif statuses == {"Succeeded"}:
+                release['status'] = "Succeeded"
+            else:
+                release['status'] = "Failed"
+            release['finished_at'] = datetime.now().isoformat()
+            release['duration'] = _seconds_between(release.get('started_at'), release['finished_at'])
+            durations = {step['name']: step.get('duration') or 0.0 for step in release['steps']}
+            release['critical_path'] = critical_path(release['steps'], release['waves'], durations)
+            self._touch(release)
+        except asyncio.CancelledError:
+            # Shutdown: leave the release InProgress so start() resumes it
+            for task in running:
+                task.cancel()
+            raise
+        except Exception as e:
+            print(f"Error executing release {release_id}: {e}")
+            # Steps already started would otherwise keep deploying with nothing waiting on them
+            for task in running:
+                task.cancel()
+            await asyncio.gather(*running, return_exceptions=True)
+            for step in release['steps']:
+                if step['status'] == "Running" and step.get('deployment_id'):
+                    await self.deployment_executor.cancel(step['deployment_id'])
+                    self._finish_step(step, "Cancelled", str(e))
+                elif step['status'] == "Waiting":
+                    self._finish_step(step, "Cancelled", str(e))
+            release['status'] = "Failed"
+            release['finished_at'] = datetime.now().isoformat()
+            self._touch(release)
+        finally:
+            self._cancel_requested.discard(release_id)
+            self._tasks.pop(release_id, None)
+
+    async def start(self):
+        """Resume releases interrupted by a restart"""
+        for release_id, release in self.releases.items():
+            if release['status'] in ("Pending", "InProgress") and release_id not in self._tasks:
+                self._launch(release_id)
+
+    async def stop(self):
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
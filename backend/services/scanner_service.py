@@ -0,0 +1,458 @@
+from bisect import bisect_right
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import json
+import os
+import re
+import time
+
+_VERSION_SPLIT_RE = re.compile(r"[._]")
+_VERSION_ITEM_RE = re.compile(r"\d+|[a-zA-Z]+")
+
+# Sorts after every real version key, used for open-ended ranges
+VERSION_INFINITY = (((2, ""),), (1,))
+
+OSV_SEVERITY = {"critical": "critical", "high": "high", "moderate": "medium", "medium": "medium", "low": "low"}
+
+
+def _version_items(text: str) -> List[Tuple[int, Any]]:
+    items: List[Tuple[int, Any]] = []
+    for part in _VERSION_SPLIT_RE.split(text):
+        for token in _VERSION_ITEM_RE.findall(part):
+            items.append((0, int(token)) if token.isdigit() else (1, token.lower()))
+    return items
+
+
+@lru_cache(maxsize=65536)
+def parse_version(version: str) -> Tuple:
+    """Turn a version string into a comparable key.
+
+    Numeric components compare numerically, trailing zero components are
+    ignored (1.2 == 1.2.0) and a pre-release (1.2.0-rc1) sorts before its
+    release.
+    """
+    text = (version or "").strip()
+    text = text.split("+", 1)[0]
+    if ":" in text:
+        text = text.split(":", 1)[1]
+    if text[:1] in ("v", "V"):
+        text = text[1:]
+    release, _, pre_release = text.partition("-")
+    release_items = _version_items(release)
+    while release_items and release_items[-1] == (0, 0):
+        release_items.pop()
+    pre = (0, tuple(_version_items(pre_release))) if pre_release else (1,)
+    return (tuple(release_items), pre)
+
+
+class PackageAdvisories:
+    """Affected version ranges for one package, sorted for bisect matching"""
+
+    def __init__(self):
+        self._pending: List[Tuple[Tuple, Tuple, bool, int]] = []
+        self.starts: List[Tuple] = []
+        self.ends: List[Tuple] = []
+        self.end_inclusive: List[bool] = []
+        self.advisories: List[int] = []
+        self.max_end: List[Tuple] = []
+        self.exact: Dict[Tuple, List[int]] = {}
+
+    def add_range(self, start: Tuple, end: Tuple, inclusive: bool, advisory: int):
+        self._pending.append((start, end, inclusive, advisory))
+
+    def add_version(self, version: Tuple, advisory: int):
+        self.exact.setdefault(version, []).append(advisory)
+
+    def finalize(self):
+        """Sort ranges by start and precompute running maxima of their ends"""
+        if not self._pending:
+            return
+        ranges = sorted(list(zip(self.starts, self.ends, self.end_inclusive, self.advisories)) + self._pending)
+        self._pending = []
+        self.starts = [r[0] for r in ranges]
+        self.ends = [r[1] for r in ranges]
+        self.end_inclusive = [r[2] for r in ranges]
+        self.advisories = [r[3] for r in ranges]
+        self.max_end = []
+        running = None
+        for end in self.ends:
+            running = end if running is None or end > running else running
+            self.max_end.append(running)
+
+    def match(self, version: Tuple) -> List[int]:
+        matched = list(self.exact.get(version, ()))
+        index = bisect_right(self.starts, version) - 1
+        while index >= 0 and self.max_end[index] >= version:
+            end = self.ends[index]
+            if version < end or (self.end_inclusive[index] and version == end):
+                matched.append(self.advisories[index])
+            index -= 1
+        return matched
+
+
+def image_package(image: str, version: str = "") -> Optional[Tuple[str, str]]:
+    """Derive a (name, version) pair from an image reference such as registry/nginx:1.25"""
+    reference = (image or "").split("@", 1)[0]
+    repository, _, tag = reference.rpartition(":")
+    if not repository or "/" in tag:
+        repository, tag = reference, ""
+    name = repository.rsplit("/", 1)[-1]
+    if not tag or tag == "latest":
+        tag = version
+    return (name, tag) if name and tag else None
+
+
+def parse_sbom(sbom: Any) -> List[Tuple[str, str]]:
+    """Extract (name, version) pairs from a package list, CycloneDX or SPDX document"""
+    if isinstance(sbom, dict):
+        entries = sbom.get("components") or sbom.get("packages") or []
+    else:
+        entries = sbom or []
+    packages = []
+    for entry in entries:
+        if not isinstance(entry, dict):
+            continue
+        name = entry.get("name")
+        version = entry.get("version") or entry.get("versionInfo")
+        if name and version:
+            packages.append((str(name), str(version)))
+    return packages
+
+
+class ScannerService:
+    """Offline vulnerability matching against a local OSV-style advisory database"""
+
+    def __init__(
+        self,
+        application_service,
+        advisories_file: str = "data/advisories.ndjson",
+        inventory_file: str = "data/sboms.json"
+    ):
+        self.application_service = application_service
+        self.advisories_file = advisories_file
+        self.inventory_file = inventory_file
+        self.advisories: List[Dict[str, Any]] = []
+        self.packages: Dict[str, PackageAdvisories] = {}
+        self.loaded_at: Optional[str] = None
+        self.db_version = 0
+        self.inventories: Dict[str, Dict[str, Any]] = {}
+        # package name -> version -> {application id: name as listed}, for incremental re-evaluation
+        self.package_apps: Dict[str, Dict[str, Dict[str, str]]] = {}
+        self._load_data()
+        self._load_inventories()
+
+    def _read_records(self) -> Iterable[Dict[str, Any]]:
+        with open(self.advisories_file, 'r') as f:
+            if self.advisories_file.endswith(".ndjson"):
+                for line in f:
+                    line = line.strip()
+                    if line:
+                        yield json.loads(line)
+            else:
+                data = json.load(f)
+                yield from (data if isinstance(data, list) else data.get("vulns", []))
+
+    def _load_data(self):
+        """Load advisories from the OSV JSON/NDJSON file"""
+        try:
+            self.advisories = []
+            self.packages = {}
+            if os.path.exists(self.advisories_file):
+                self._ingest(self._read_records())
+            self.loaded_at = datetime.now().isoformat()
+            self.db_version += 1
+        except Exception as e:
+            print(f"Error loading advisories: {e}")
+            self.advisories = []
+            self.packages = {}
+
+    def _advisories_signature(self) -> Optional[List[int]]:
+        if not os.path.exists(self.advisories_file):
+            return None
+        stat = os.stat(self.advisories_file)
+        return [stat.st_size, stat.st_mtime_ns]
+
+    def _load_inventories(self):
+        """Load per-application package inventories and the advisory db stamp they were scanned at"""
+        try:
+            if os.path.exists(self.inventory_file):
+                with open(self.inventory_file, 'r') as f:
+                    data = json.load(f)
+                self.inventories = data.get("applications", {})
+                # Carry the stamp forward unless the advisory file changed while we were down
+                stored = data.get("db_version", 0)
+                if data.get("advisories") == self._advisories_signature():
+                    self.db_version = stored
+                else:
+                    self.db_version = stored + 1
+        except Exception as e:
+            print(f"Error loading inventories: {e}")
+            self.inventories = {}
+        self.package_apps = {}
+        for app_id, inventory in self.inventories.items():
+            self._index_inventory(app_id, inventory)
+
+    def _save_inventories(self):
+        try:
+            os.makedirs(os.path.dirname(self.inventory_file) or ".", exist_ok=True)
+            with open(self.inventory_file, 'w') as f:
+                json.dump({
+                    "db_version": self.db_version,
+                    "advisories": self._advisories_signature(),
+                    "applications": self.inventories
+                }, f, indent=2)
+        except Exception as e:
+            print(f"Error saving inventories: {e}")
+
+    def _inventory_packages(self, inventory: Dict[str, Any]) -> List[Tuple[str, str]]:
+        packages = [(name, version) for name, version in inventory.get("packages", [])]
+        image = image_package(inventory.get("image", ""), inventory.get("version", ""))
+        if image:
+            packages.append(image)
+        return packages
+
+    def _index_inventory(self, app_id: str, inventory: Dict[str, Any]):
+        for name, version in self._inventory_packages(inventory):
+            self.package_apps.setdefault(name.lower(), {}).setdefault(version, {})[app_id] = name
+
+    def _unindex_inventory(self, app_id: str, inventory: Dict[str, Any]):
+        for name, version in self._inventory_packages(inventory):
+            versions = self.package_apps.get(name.lower(), {})
+            apps = versions.get(version)
+            if apps is None:
+                continue
+            apps.pop(app_id, None)
+            if not apps:
+                del versions[version]
+                if not versions:
+                    del self.package_apps[name.lower()]
+
+    def _set_inventory(self, app_id: str, inventory: Dict[str, Any]):
+        current = self.inventories.get(app_id)
+        if current is not None:
+            self._unindex_inventory(app_id, current)
+        self.inventories[app_id] = inventory
+        self._index_inventory(app_id, inventory)
+
+    def _ingest(self, records: Iterable[Dict[str, Any]]) -> List[str]:
+        """Index OSV records and return the names of the packages they touch"""
+        touched = set()
+        for record in records:
+            advisory = len(self.advisories)
+            self.advisories.append(self._summarize(record))
+            for affected in record.get("affected", []):
+                name = (affected.get("package") or {}).get("name")
+                if not name:
+                    continue
+                key = name.lower()
+                package = self.packages.get(key)
+                if package is None:
+                    package = self.packages[key] = PackageAdvisories()
+                touched.add(key)
+                for version in affected.get("versions", []):
+                    package.add_version(parse_version(version), advisory)
+                for version_range in affected.get("ranges", []):
+                    if version_range.get("type") == "GIT":
+                        continue
+                    self._add_events(package, version_range.get("events", []), advisory)
+        for key in touched:
+            self.packages[key].finalize()
+        return sorted(touched)
+
+    def _add_events(self, package: PackageAdvisories, events: List[Dict[str, str]], advisory: int):
+        start = None
+        for event in events:
+            if "introduced" in event:
+                start = parse_version(event["introduced"])
+            elif start is not None and "fixed" in event:
+                package.add_range(start, parse_version(event["fixed"]), False, advisory)
+                start = None
+            elif start is not None and "last_affected" in event:
+                package.add_range(start, parse_version(event["last_affected"]), True, advisory)
+                start = None
+        if start is not None:
+            package.add_range(start, VERSION_INFINITY, False, advisory)
+
+    def _summarize(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        ids = [record.get("id", "")] + list(record.get("aliases", []))
+        cve = next((value for value in ids if value.upper().startswith("CVE-")), record.get("id", ""))
+        severity = (record.get("database_specific") or {}).get("severity", "")
+        cvss = 0.0
+        for entry in record.get("severity", []):
+            try:
+                cvss = max(cvss, float(entry.get("score")))
+            except (TypeError, ValueError):
+                continue
+        fixed = {}
+        for affected in record.get("affected", []):
+            name = (affected.get("package") or {}).get("name")
+            for version_range in affected.get("ranges", []):
+                for event in version_range.get("events", []):
+                    if name and "fixed" in event:
+                        fixed[name.lower()] = event["fixed"]
+        return {
+            "id": record.get("id", ""),
+            "cve": cve,
+            "title": record.get("summary") or record.get("id", ""),
+            "description": (record.get("details") or "")[:500],
+            "severity": OSV_SEVERITY.get(str(severity).lower(), "medium"),
+            "cvss": cvss,
+            "fixed": fixed,
+        }
+
+    def _finding(self, advisory: int, name: str, version: str) -> Dict[str, Any]:
+        summary = self.advisories[advisory]
+        return {
+            "cve": summary["cve"],
+            "severity": summary["severity"],
+            "cvss": summary["cvss"],
+            "title": summary["title"],
+            "description": summary["description"],
+            "package": name,
+            "version": version,
+            "fixedIn": summary["fixed"].get(name.lower(), ""),
+            "status": "open"
+        }
+
+    def match_packages(self, packages: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+        """Match (name, version) pairs against the advisory index"""
+        findings = []
+        for name, version in sorted(set(packages)):
+            package = self.packages.get(name.lower())
+            if package is None:
+                continue
+            for advisory in sorted(set(package.match(parse_version(version)))):
+                findings.append(self._finding(advisory, name, version))
+        return findings
+
+    async def _evaluate(self, app_id: str) -> Tuple[List[Dict[str, Any]], Optional[Dict[str, int]]]:
+        """Re-match an application's full inventory and replace its scanner findings"""
+        inventory = self.inventories[app_id]
+        findings = self.match_packages(self._inventory_packages(inventory))
+        result = await self.application_service.replace_application_vulnerabilities(app_id, findings, "scanner")
+        inventory["db_version"] = self.db_version
+        inventory["scanned"] = datetime.now().isoformat()
+        return findings, result
+
+    async def scan_application(self, app_id: str, sbom: Any) -> Optional[Dict[str, Any]]:
+        """Store an application's SBOM, match it and record the findings on the application"""
+        app = self.application_service.applications.get(app_id)
+        if app is None:
+            return None
+        started = time.perf_counter()
+        packages = parse_sbom(sbom)
+        self._set_inventory(app_id, {
+            "packages": [list(pair) for pair in packages],
+            "image": app.get("image", ""),
+            "version": app.get("version", "")
+        })
+        findings, result = await self._evaluate(app_id)
+        matched_ms = (time.perf_counter() - started) * 1000
+        self._save_inventories()
+        return {
+            "application_id": app_id,
+            "packages": len(packages),
+            "findings": len(findings),
+            "recorded": result["added"] if result else None,
+            "resolved": result["removed"] if result else None,
+            "match_ms": round(matched_ms, 3),
+            "db_version": self.db_version,
+            "vulnerabilities": findings
+        }
+
+    async def sync_application(self, app_id: str) -> Optional[Dict[str, int]]:
+        """Rescan one application if its image or version moved since its last scan"""
+        app = self.application_service.applications.get(app_id)
+        if app is None:
+            return None
+        current = self.inventories.get(app_id)
+        image, version = app.get("image", ""), app.get("version", "")
+        if current is not None and current.get("image") == image and current.get("version") == version:
+            return None
+        packages = current.get("packages", []) if current else []
+        self._set_inventory(app_id, {"packages": packages, "image": image, "version": version})
+        _, result = await self._evaluate(app_id)
+        self._save_inventories()
+        return result
+
+    def forget_application(self, app_id: str):
+        inventory = self.inventories.pop(app_id, None)
+        if inventory is not None:
+            self._unindex_inventory(app_id, inventory)
+            self._save_inventories()
+
+    def _append_records(self, records: List[Dict[str, Any]]):
+        os.makedirs(os.path.dirname(self.advisories_file) or ".", exist_ok=True)
+        with open(self.advisories_file, 'a') as f:
+            for record in records:
+                f.write(json.dumps(record) + "\n")
+
+    async def ingest_advisories(self, records: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Add advisories and re-evaluate only the inventory entries of the packages they touch"""
+        first_new = len(self.advisories)
+        touched = self._ingest(records)
+        self.db_version += 1
+        if self.advisories_file.endswith(".ndjson"):
+            self._append_records(records)
+
+        findings: Dict[str, List[Dict[str, Any]]] = {}
+        evaluated = 0
+        for key in touched:
+            package = self.packages[key]
+            for version, app_ids in self.package_apps.get(key, {}).items():
+                evaluated += 1
+                matched = [a for a in set(package.match(parse_version(version))) if a >= first_new]
+                if not matched:
+                    continue
+                for app_id, name in app_ids.items():
+                    findings.setdefault(app_id, []).extend(self._finding(a, name, version) for a in sorted(matched))
+
+        recorded = 0
+        for app_id, app_findings in findings.items():
+            added = await self.application_service.add_application_vulnerabilities(
+                app_id, [{**finding, "source": "scanner"} for finding in app_findings]
+            )
+            recorded += added or 0
+        for inventory in self.inventories.values():
+            if inventory.get("db_version") == self.db_version - 1:
+                inventory["db_version"] = self.db_version
+        self._save_inventories()
+        return {
+            "advisories": len(records),
+            "packages": len(touched),
+            "versions_evaluated": evaluated,
+            "applications": sorted(findings),
+            "recorded": recorded,
+            "db_version": self.db_version
+        }
+
+    async def rescan_stale(self) -> Dict[str, Any]:
+        """Fully re-evaluate inventories scanned against an older advisory database"""
+        rescanned = []
+        for app_id in list(self.inventories):
+            if app_id not in self.application_service.applications:
+                self.forget_application(app_id)
+                continue
+            if self.inventories[app_id].get("db_version") != self.db_version:
+                await self._evaluate(app_id)
+                rescanned.append(app_id)
+        self._save_inventories()
+        return {"rescanned": rescanned, "db_version": self.db_version}
+
+    async def reload_advisories(self) -> Dict[str, Any]:
+        self._load_data()
+        # A full reload may drop advisories too, so stale inventories are re-matched in full
+        await self.rescan_stale()
+        return self.get_status()
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "advisories_file": self.advisories_file,
+            "advisories": len(self.advisories),
+            "packages": len(self.packages),
+            "loaded_at": self.loaded_at,
+            "db_version": self.db_version,
+            "inventories": len(self.inventories),
+            "stale_inventories": sum(1 for i in self.inventories.values() if i.get("db_version") != self.db_version)
+        }
@@ -0,0 +1,171 @@
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+SEVERITY_ORDER = ["critical", "high", "medium", "low", "info", "unknown"]
+
+
+def normalize_severity(severity: Optional[str]) -> str:
+    value = (severity or "").strip().lower()
+    return value if value in SEVERITY_ORDER else "unknown"
+
+
+class VulnerabilityIndex:
+    """Fleet-wide index of application vulnerabilities.
+
+    Findings are deduplicated by CVE (or by title when no CVE is given) so a
+    CVE affecting many applications is one entry mapping to the set of
+    affected application ids. Severity totals and per-team severity counts
+    are kept incrementally as findings are added and removed.
+    """
+
+    def __init__(self):
+        self._findings: Dict[str, Tuple[str, str, str, str]] = {}
+        self._by_key: Dict[str, Dict[str, Set[str]]] = {}
+        self._by_package: Dict[str, Set[str]] = {}
+        self._by_severity: Dict[str, Set[str]] = {}
+        self._details: Dict[str, Dict[str, Any]] = {}
+        self._app_team: Dict[str, str] = {}
+        self._app_findings: Dict[str, Set[str]] = {}
+        self.severity_counts: Dict[str, int] = {}
+        self.team_counts: Dict[str, Dict[str, int]] = {}
+
+    @staticmethod
+    def finding_key(vulnerability: Dict[str, Any]) -> str:
+        cve = (vulnerability.get("cve") or "").strip().upper()
+        return cve or f"TITLE:{(vulnerability.get('title') or '').strip().lower()}"
+
+    def _count(self, team: str, severity: str, delta: int):
+        self.severity_counts[severity] = self.severity_counts.get(severity, 0) + delta
+        team_counts = self.team_counts.setdefault(team, {})
+        team_counts[severity] = team_counts.get(severity, 0) + delta
+        if not team_counts[severity]:
+            del team_counts[severity]
+            if not team_counts:
+                del self.team_counts[team]
+        if not self.severity_counts[severity]:
+            del self.severity_counts[severity]
+
+    def add(self, app_id: str, team: str, vulnerability: Dict[str, Any]):
+        finding_id = vulnerability["id"]
+        if finding_id in self._findings:
+            return
+        key = self.finding_key(vulnerability)
+        package = vulnerability.get("package") or ""
+        severity = normalize_severity(vulnerability.get("severity"))
+        self._findings[finding_id] = (app_id, key, package, severity)
+
+        self._by_key.setdefault(key, {}).setdefault(app_id, set()).add(finding_id)
+        if package:
+            self._by_package.setdefault(package, set()).add(key)
+        self._app_findings.setdefault(app_id, set()).add(finding_id)
+        details = self._details.setdefault(key, {"title": vulnerability.get("title", ""), "severity": severity, "packages": {}})
+        if SEVERITY_ORDER.index(severity) < SEVERITY_ORDER.index(details["severity"]):
+            # Keep the CVE's severity at the worst seen so it stays in one bucket
+            self._by_severity[details["severity"]].discard(key)
+            details["severity"] = severity
+        self._by_severity.setdefault(details["severity"], set()).add(key)
+        if package:
+            details["packages"][package] = details["packages"].get(package, 0) + 1
+
+        self._app_team.setdefault(app_id, team or "")
+        self._count(self._app_team[app_id], severity, 1)
+
+    def remove(self, finding_id: str):
+        entry = self._findings.pop(finding_id, None)
+        if entry is None:
+            return
+        app_id, key, package, severity = entry
+        apps = self._by_key[key]
+        apps[app_id].discard(finding_id)
+        if not apps[app_id]:
+            del apps[app_id]
+        details = self._details[key]
+        if package:
+            details["packages"][package] -= 1
+            if not details["packages"][package]:
+                del details["packages"][package]
+                self._by_package[package].discard(key)
+                if not self._by_package[package]:
+                    del self._by_package[package]
+        if not apps:
+            del self._by_key[key]
+            self._by_severity[details["severity"]].discard(key)
+            del self._details[key]
+        self._app_findings[app_id].discard(finding_id)
+        self._count(self._app_team.get(app_id, ""), severity, -1)
+
+    def remove_application(self, app_id: str):
+        for finding_id in list(self._app_findings.get(app_id, set())):
+            self.remove(finding_id)
+        self._app_findings.pop(app_id, None)
+        self._app_team.pop(app_id, None)
+
+    def set_team(self, app_id: str, team: str):
+        """Move an application's severity counts to a new team"""
+        old_team = self._app_team.get(app_id)
+        if old_team is None or old_team == (team or ""):
+            self._app_team[app_id] = team or ""
+            return
+        for finding_id in self._app_findings.get(app_id, set()):
+            severity = self._findings[finding_id][3]
+            self._count(old_team, severity, -1)
+            self._count(team or "", severity, 1)
+        self._app_team[app_id] = team or ""
+
+    def _describe(self, key: str) -> Dict[str, Any]:
+        details = self._details[key]
+        apps = self._by_key[key]
+        return {
+            "cve": "" if key.startswith("TITLE:") else key,
+            "title": details["title"],
+            "severity": details["severity"],
+            "packages": sorted(details["packages"]),
+            "affected_applications": sorted(apps),
+            "affected_count": len(apps),
+            "findings": sum(len(ids) for ids in apps.values()),
+        }
+
+    def get_cve(self, cve: str) -> Optional[Dict[str, Any]]:
+        key = cve.strip().upper()
+        return self._describe(key) if key in self._by_key else None
+
+    def query(
+        self,
+        severity: Optional[List[str]] = None,
+        package: Optional[str] = None,
+        team: Optional[str] = None,
+        application_id: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Deduplicated findings, worst severity first then most affected applications"""
+        candidates: Optional[Set[str]] = None
+        if severity:
+            candidates = set()
+            for value in severity:
+                candidates |= self._by_severity.get(normalize_severity(value), set())
+        if package:
+            keys = self._by_package.get(package, set())
+            candidates = set(keys) if candidates is None else candidates & keys
+        if application_id:
+            keys = {self._findings[finding_id][1] for finding_id in self._app_findings.get(application_id, set())}
+            candidates = keys if candidates is None else candidates & keys
+        if candidates is None:
+            candidates = set(self._by_key)
+
+        results = [self._describe(key) for key in candidates]
+        if team is not None:
+            for result in results:
+                result["affected_applications"] = [
+                    app_id for app_id in result["affected_applications"] if self._app_team.get(app_id) == team
+                ]
+                result["affected_count"] = len(result["affected_applications"])
+            results = [result for result in results if result["affected_count"]]
+        results.sort(key=lambda r: (SEVERITY_ORDER.index(r["severity"]), -r["affected_count"], r["cve"] or r["title"]))
+        return results
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "by_severity": {severity: self.severity_counts[severity] for severity in SEVERITY_ORDER if severity in self.severity_counts},
+            "by_team": {team: dict(counts) for team, counts in sorted(self.team_counts.items())},
+            "unique_vulnerabilities": len(self._by_key),
+            "affected_applications": sum(1 for findings in self._app_findings.values() if findings),
+            "total_findings": len(self._findings),
+        }
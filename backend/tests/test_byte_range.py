@@ -0,0 +1,29 @@
+import pytest
+
+from utils.byte_range import parse_byte_range
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-9", (0, 9)),
+    ("bytes=10-", (10, 99)),
+    ("bytes=-10", (90, 99)),
+    ("bytes=-500", (0, 99)),
+    ("bytes=50-500", (50, 99)),
+    (" bytes= 5 - 6 ", (5, 6)),
+])
+def test_satisfiable_ranges(header, expected):
+    assert parse_byte_range(header, 100) == expected
+
+
+@pytest.mark.parametrize("header", [
+    None, "", "items=0-9", "bytes=0-9,20-29", "bytes=5", "bytes=-", "bytes=abc-", "bytes=0-abc",
+    "bytes=-5-", "bytes=+1-2", "bytes=9-3", "bytes=²-",
+])
+def test_absent_multiple_or_malformed_ranges_serve_everything(header):
+    assert parse_byte_range(header, 100) is None
+
+
+@pytest.mark.parametrize("header, size", [("bytes=100-", 100), ("bytes=100-200", 100), ("bytes=-0", 100), ("bytes=-5", 0), ("bytes=0-", 0)])
+def test_unsatisfiable_ranges_raise(header, size):
+    with pytest.raises(ValueError):
+        parse_byte_range(header, size)
@@ -0,0 +1,92 @@
+import asyncio
+
+import pytest
+
+from models.deployment import DeploymentCreate
+from services.deployment_executor import DeploymentExecutor, SimulatedDriver
+from services.deployment_service import TERMINAL_STATUSES, DeploymentService
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    # Services keep their data files under data/ relative to the working directory
+    monkeypatch.chdir(tmp_path)
+    return DeploymentService()
+
+
+async def create(service, environment="staging", cluster_id=None, replicas=1):
+    deployment = await service.create_deployment(DeploymentCreate(
+        application_id="app", cluster_id=cluster_id, version="v1",
+        environment=environment, commit_hash="abc", replicas=replicas
+    ))
+    return deployment.id
+
+
+async def wait_until_finished(service, deployment_ids, on_tick=None):
+    while any(service.deployments[deployment_id]["status"] not in TERMINAL_STATUSES for deployment_id in deployment_ids):
+        if on_tick is not None:
+            on_tick()
+        await asyncio.sleep(0.01)
+
+
+def test_cancel_before_the_rollout_starts_releases_its_slot(service):
+    async def scenario():
+        executor = DeploymentExecutor(service, SimulatedDriver(replica_seconds=0.01, jitter=0))
+        deployment_id = await create(service, "production", "c1")
+        executor._start(deployment_id)
+        status = await executor.cancel(deployment_id)
+        return executor, deployment_id, status
+
+    executor, deployment_id, status = asyncio.run(scenario())
+    assert status == "Cancelled"
+    assert executor.running == {}
+    assert executor._running_by_cluster == {} and executor._running_by_environment == {}
+    assert not executor.is_active(deployment_id)
+
+
+def test_cluster_and_environment_limits_hold(service):
+    peaks = {"cluster": 0, "production": 0}
+
+    def sample(executor):
+        peaks["cluster"] = max(peaks["cluster"], executor._running_by_cluster.get("c1", 0))
+        peaks["production"] = max(peaks["production"], executor._running_by_environment.get("production", 0))
+
+    async def scenario():
+        executor = DeploymentExecutor(
+            service, SimulatedDriver(replica_seconds=0.05, jitter=0),
+            cluster_limit=2, environment_limits={"production": 1}
+        )
+        ids = [await create(service, "staging", "c1") for _ in range(5)]
+        ids += [await create(service, "production") for _ in range(3)]
+        await executor.start()
+        try:
+            for deployment_id in ids:
+                executor.submit(deployment_id)
+            await wait_until_finished(service, ids, lambda: sample(executor))
+        finally:
+            await executor.stop()
+        return ids, executor
+
+    ids, executor = asyncio.run(scenario())
+    assert {service.deployments[deployment_id]["status"] for deployment_id in ids} == {"Succeeded"}
+    assert peaks == {"cluster": 2, "production": 1}
+    assert executor._running_by_cluster == {} and executor._running_by_environment == {}
+
+
+def test_duration_covers_the_rollout(service):
+    async def scenario():
+        executor = DeploymentExecutor(service, SimulatedDriver(replica_seconds=0.6, jitter=0))
+        deployment_id = await create(service, replicas=2)
+        await executor.start()
+        try:
+            executor.submit(deployment_id)
+            await wait_until_finished(service, [deployment_id])
+        finally:
+            await executor.stop()
+        return service.deployments[deployment_id]
+
+    deployment = asyncio.run(scenario())
+    # Two batches of one replica each at 0.6s per replica
+    assert deployment["status"] == "Succeeded"
+    assert deployment["duration"] == 1
+    assert deployment["finished_at"]
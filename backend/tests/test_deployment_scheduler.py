@@ -0,0 +1,77 @@
+from services.deployment_scheduler import PriorityFairQueue
+
+
+def deployment(deployment_id, environment="staging", team="a", cluster_id=None, **fields):
+    return {"id": deployment_id, "environment": environment, "team": team, "cluster_id": cluster_id, **fields}
+
+
+def queue_of(deployments, **kwargs):
+    queue = PriorityFairQueue(team_of=lambda d: d["team"], **kwargs)
+    for d in deployments:
+        queue.push(d)
+    return queue
+
+
+def drain(queue, eligible=lambda deployment_id: True, slot_of=None):
+    order = []
+    while True:
+        deployment_id = queue.pop_eligible(eligible, slot_of)
+        if deployment_id is None:
+            return order
+        order.append(deployment_id)
+
+
+def test_priority_levels_come_first():
+    queue = queue_of([
+        deployment("dev", "dev"), deployment("stage"), deployment("prod", "production"),
+        deployment("rollback", "production", rollback_of="prod-0")
+    ])
+    assert drain(queue) == ["rollback", "prod", "stage", "dev"]
+
+
+def test_teams_share_starts_by_weight():
+    queue = queue_of(
+        [deployment(f"a{i}", team="a") for i in range(20)] + [deployment(f"b{i}", team="b") for i in range(20)],
+        team_weights={"a": 2.0}
+    )
+    first = drain(queue)[:15]
+    assert sum(deployment_id.startswith("a") for deployment_id in first) == 10
+
+
+def test_blocked_slot_is_parked_until_released():
+    deployments = {d["id"]: d for d in
+                   [deployment(f"full{i}", cluster_id="c1") for i in range(500)] + [deployment("free", cluster_id="c2")]}
+    queue = queue_of(deployments.values())
+    full = {"c1"}
+    checked = []
+
+    def eligible(deployment_id):
+        checked.append(deployment_id)
+        return deployments[deployment_id]["cluster_id"] not in full
+
+    def slot_of(deployment_id):
+        return deployments[deployment_id]["cluster_id"], deployments[deployment_id]["environment"]
+
+    assert queue.pop_eligible(eligible, slot_of) == "free"
+    # Only the first deployment of the full cluster was checked; the rest were parked behind it
+    assert checked == ["full0", "free"]
+    checked.clear()
+    assert queue.pop_eligible(eligible, slot_of) is None
+    assert checked == [] and len(queue) == 500
+
+    queue.release("c2", "production")
+    assert queue.pop_eligible(eligible, slot_of) is None
+    assert checked == []
+
+    full.clear()
+    queue.release("c1", "staging")
+    assert drain(queue, eligible, slot_of) == [f"full{i}" for i in range(500)]
+
+
+def test_removed_deployments_are_dropped_while_parked():
+    queue = queue_of([deployment("a"), deployment("b")])
+    assert queue.pop_eligible(lambda deployment_id: False) is None
+    assert queue.remove("a") and "a" not in queue
+    queue.release(None, "staging")
+    assert drain(queue) == ["b"]
+    assert len(queue) == 0
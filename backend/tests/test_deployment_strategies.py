@@ -0,0 +1,54 @@
+import pytest
+
+from services.deployment_strategies import RolloutEngine, plan_rolling, resolve_replica_count
+
+
+def replay(replicas, batches):
+    """Replica counts after each batch, checking the old/new totals it reports"""
+    old, new, states = replicas, 0, []
+    for batch in batches:
+        old -= batch["stop"]
+        new += batch["start"]
+        assert (batch["old_replicas"], batch["new_replicas"]) == (old, new)
+        states.append((old, new))
+    return states
+
+
+@pytest.mark.parametrize("replicas", [1, 2, 3, 4, 7, 10])
+@pytest.mark.parametrize("max_surge, max_unavailable", [(1, 0), (0, 1), (1, 1), (2, 1), (3, 3)])
+def test_rolling_batches_respect_surge_and_availability(replicas, max_surge, max_unavailable):
+    max_unavailable = min(max_unavailable, replicas)
+    states = replay(replicas, plan_rolling(replicas, max_surge, max_unavailable))
+    assert states[-1] == (0, replicas)
+    for old, new in states:
+        assert old + new <= replicas + max_surge
+        assert old + new >= replicas - max_unavailable
+
+
+def test_rolling_batch_count_follows_batch_size():
+    assert len(plan_rolling(10, 5, 0)) == 3
+    assert len(plan_rolling(10, 10, 0)) == 2
+    assert [batch["start"] for batch in plan_rolling(4, 1, 0)] == [1, 1, 1, 1, 0]
+
+
+def test_percentages_round_towards_availability():
+    assert resolve_replica_count("25%", 10, round_up=True) == 3
+    assert resolve_replica_count("25%", 10, round_up=False) == 2
+    with pytest.raises(ValueError):
+        resolve_replica_count("-1", 10, round_up=True)
+
+
+def test_plan_rejects_zero_replicas_and_defaults_missing_ones():
+    engine = RolloutEngine()
+    with pytest.raises(ValueError, match="at least 1"):
+        engine.plan({"replicas": 0})
+    assert engine.plan({"replicas": None})["replicas"] == 1
+    assert engine.plan({})["replicas"] == 1
+
+
+@pytest.mark.parametrize("strategy", ["rolling", "blue-green", "canary"])
+def test_every_strategy_ends_fully_on_the_new_version(strategy):
+    plan = RolloutEngine(replica_seconds=2.0).plan({"deployment_strategy": strategy, "replicas": 5})
+    old, new = replay(5, plan["batches"])[-1]
+    assert (old, new) == (0, 5)
+    assert plan["estimated_seconds"] >= 2.0
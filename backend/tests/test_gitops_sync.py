@@ -0,0 +1,61 @@
+import asyncio
+import json
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from models.gitops import RepositoryCreate
+from services.git_reader import GitRepositoryReader
+from services.gitops_service import GitOpsService
+from services.manifest_diff import ManifestDiffer
+
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    if shutil.which("git") is None:
+        pytest.skip("git is not installed")
+    # The service keeps its data files under data/ relative to the working directory
+    monkeypatch.chdir(tmp_path)
+    source = tmp_path / "repo"
+    os.makedirs(source / "k8s")
+
+    def git(*args):
+        return subprocess.run(["git", "-C", str(source), *args], check=True, capture_output=True, text=True).stdout.strip()
+
+    def commit(document, message):
+        (source / "k8s" / "config.json").write_text(json.dumps(document))
+        git("add", "-A")
+        git("commit", "-qm", message)
+        return git("rev-parse", "HEAD")
+
+    git("init", "-q", "-b", "main")
+    git("config", "user.email", "dev@example.com")
+    git("config", "user.name", "Dev")
+    commit({"kind": "ConfigMap", "metadata": {"name": "app"}}, "first")
+    return str(source), commit
+
+
+def test_sync_and_webhook_for_the_same_commit_deploy_once(workspace):
+    url, commit = workspace
+
+    async def scenario():
+        reader = GitRepositoryReader()
+        service = GitOpsService(source=reader, differ=ManifestDiffer(reader))
+        repo = await service.create_repository(RepositoryCreate(
+            name="app", url=url, branch="main", environment="staging",
+            namespace="default", path="k8s", autoDeploy=True, syncInterval=300
+        ))
+        await service.sync_repository(repo.id)
+        head = commit({"kind": "ConfigMap", "metadata": {"name": "app"}, "data": {"key": "value"}}, "second")
+        await asyncio.gather(
+            service.sync_repository(repo.id),
+            service.record_push(repo.id, {"commit": head, "branch": "main", "commits": 1})
+        )
+        return service, repo.id, head
+
+    service, repo_id, head = asyncio.run(scenario())
+    deployments = [d for d in service.deployments.values() if d["repository_id"] == repo_id]
+    assert [d["commit_hash"] for d in deployments] == [head]
+    assert service.repositories[repo_id]["lastCommit"] == head
@@ -0,0 +1,79 @@
+import random
+
+import pytest
+
+from utils.indexing import SortedSecondaryIndex, decode_cursor, encode_cursor, paginate_sorted
+
+KEYED = [(1, "a"), (2, "b"), (2, "c"), (3, "d"), (5, "e")]
+
+
+def test_offset_pages_ascending_and_descending():
+    assert paginate_sorted(KEYED, offset=1, limit=2) == (["b", "c"], (2, "c"))
+    assert paginate_sorted(KEYED, descending=True, limit=2) == (["e", "d"], (3, "d"))
+    assert paginate_sorted(KEYED, offset=4, limit=2) == (["e"], None)
+    assert paginate_sorted(KEYED, offset=10) == ([], None)
+
+
+def test_cursor_walks_every_item_once():
+    for descending in (False, True):
+        seen, cursor = [], None
+        while True:
+            page, cursor = paginate_sorted(KEYED, descending, limit=2, cursor=cursor)
+            seen += page
+            if cursor is None:
+                break
+        assert seen == [entity_id for _, entity_id in (KEYED[::-1] if descending else KEYED)]
+
+
+def test_bounds_restrict_the_window():
+    assert paginate_sorted(KEYED, lo=1, hi=4) == (["b", "c", "d"], None)
+    assert paginate_sorted(KEYED, descending=True, limit=1, lo=1, hi=4) == (["d"], (3, "d"))
+    assert paginate_sorted(KEYED, descending=True, cursor=(2, "c"), lo=1, hi=4) == (["b"], None)
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor("2024-01-01T00:00:00", "abc")) == ("2024-01-01T00:00:00", "abc")
+
+
+@pytest.mark.parametrize("cursor", ["!!", "bm90IGpzb24", encode_cursor("x", "y")[:-3]])
+def test_malformed_cursor_is_rejected(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+def test_cursor_from_another_sort_is_rejected():
+    with pytest.raises(ValueError):
+        paginate_sorted(KEYED, cursor=("name", "a"))
+
+
+def _index(docs):
+    index = SortedSecondaryIndex(["app", "env", "status"], sort_key=lambda doc: doc["created"])
+    for entity_id, doc in docs.items():
+        index.add(entity_id, doc)
+    return index
+
+
+def test_sorted_index_query_matches_brute_force():
+    rng = random.Random(11)
+    docs = {
+        f"d{i}": {"app": rng.choice("abc"), "env": rng.choice(["dev", "prod"]), "status": rng.choice(["ok", "failed", None]), "created": rng.randint(0, 50)}
+        for i in range(300)
+    }
+    index = _index(docs)
+    for filters in ({"app": ["a"]}, {"app": ["a", "b"], "env": ["prod"]}, {"env": ["dev"], "status": ["failed", None]}, {"app": ["c"], "env": ["prod"], "status": ["ok"]}):
+        expected = sorted(
+            (doc["created"], entity_id) for entity_id, doc in docs.items()
+            if all(doc[field] in values for field, values in filters.items())
+        )
+        assert index.query(filters) == expected
+
+
+def test_sorted_index_tracks_updates_and_removals():
+    docs = {"x": {"app": "a", "env": "dev", "status": "ok", "created": 1}, "y": {"app": "a", "env": "prod", "status": "ok", "created": 2}}
+    index = _index(docs)
+    index.remove("x", docs["x"])
+    index.add("x", {**docs["x"], "env": "prod"})
+    assert index.query({"app": ["a"], "env": ["prod"]}) == [(1, "x"), (2, "y")]
+    index.remove("y", docs["y"])
+    assert index.query({"env": ["prod"], "status": ["ok"]}) == [(1, "x")]
+    assert index.values("app") == {"a": 1}
@@ -0,0 +1,80 @@
+import asyncio
+import json
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from services.git_reader import GitRepositoryReader
+from services.manifest_diff import ManifestDiffer, changed_fields, resource_key
+
+
+def test_resource_key_falls_back_to_file_position():
+    assert resource_key({"kind": "Service", "metadata": {"name": "web", "namespace": "prod"}}, "a.yaml", 0) == "Service/prod/web"
+    assert resource_key({"kind": "Service", "metadata": {"name": "web"}}, "a.yaml", 0) == "Service//web"
+    assert resource_key({"kind": "Service"}, "a.yaml", 2) == "a.yaml#2"
+    assert resource_key({"kind": "Service", "metadata": "bad"}, "a.yaml", 1) == "a.yaml#1"
+
+
+def test_changed_fields_reports_leaf_paths():
+    old = {"spec": {"replicas": 1, "containers": [{"image": "a:1"}], "paused": False}, "kind": "Deployment"}
+    new = {"spec": {"replicas": 3, "containers": [{"image": "a:2"}], "labels": {}}, "kind": "Deployment"}
+    assert changed_fields(old, new) == ["spec.containers[0].image", "spec.labels", "spec.paused", "spec.replicas"]
+    assert changed_fields({"ports": [1]}, {"ports": [1, 2]}) == ["ports"]
+    assert changed_fields(old, old) == []
+
+
+@pytest.fixture
+def repository(tmp_path):
+    if shutil.which("git") is None:
+        pytest.skip("git is not installed")
+
+    def git(*args):
+        return subprocess.run(["git", "-C", str(tmp_path), *args], check=True, capture_output=True, text=True).stdout.strip()
+
+    def write(name, document):
+        path = tmp_path / name
+        os.makedirs(path.parent, exist_ok=True)
+        path.write_text(json.dumps(document))
+
+    git("init", "-q", "-b", "main")
+    git("config", "user.email", "dev@example.com")
+    git("config", "user.name", "Dev")
+    return git, write, {"url": str(tmp_path), "branch": "main", "path": "k8s"}
+
+
+def test_diff_commits_matches_resources_across_files(repository):
+    git, write, repo = repository
+    for service in ("api", "web"):
+        write(f"k8s/{service}/deployment.json", {"kind": "Deployment", "metadata": {"name": service}, "spec": {"replicas": 1}})
+    write("k8s/shared/config.json", {"kind": "ConfigMap", "metadata": {"name": "shared"}})
+    git("add", "-A")
+    git("commit", "-qm", "first")
+    first = git("rev-parse", "HEAD")
+
+    write("k8s/api/deployment.json", {"kind": "Deployment", "metadata": {"name": "api"}, "spec": {"replicas": 2}})
+    write("k8s/api/service.json", {"kind": "Service", "metadata": {"name": "api"}})
+    git("mv", "k8s/shared/config.json", "k8s/web/config.json")
+    write("README.md", {"docs": True})
+    git("add", "-A")
+    git("commit", "-qm", "second")
+
+    diff = asyncio.run(ManifestDiffer(GitRepositoryReader()).diff_commits(repo, first))
+    assert diff["from"] == first and diff["to"] == git("rev-parse", "HEAD")
+    assert diff["summary"] == {"added": 1, "modified": 1, "removed": 0}
+    assert diff["added"] == [{"resource": "Service//api", "file": "api/service.json"}]
+    assert diff["modified"] == [{"resource": "Deployment//api", "file": "api/deployment.json", "fields": ["spec.replicas"]}]
+
+    unchanged = asyncio.run(ManifestDiffer(GitRepositoryReader()).diff_commits(repo, "HEAD", "HEAD"))
+    assert unchanged["summary"] == {"added": 0, "modified": 0, "removed": 0}
+    assert unchanged["files_compared"] == 0
+
+
+def test_diff_commits_rejects_unknown_revisions(repository):
+    git, write, repo = repository
+    write("k8s/a.json", {"kind": "ConfigMap", "metadata": {"name": "a"}})
+    git("add", "-A")
+    git("commit", "-qm", "first")
+    with pytest.raises(ValueError, match="Unknown revision"):
+        asyncio.run(ManifestDiffer(GitRepositoryReader()).diff_commits(repo, "f" * 40))
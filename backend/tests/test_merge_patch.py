@@ -0,0 +1,41 @@
+import pytest
+
+from models.application import Application, ApplicationUpdate
+from utils.merge_patch import apply_model_patch, merge_patch, value_at
+
+
+def test_rfc7386_examples():
+    target = {"title": "Goodbye!", "author": {"givenName": "John", "familyName": "Doe"}, "tags": ["example", "sample"], "content": "x"}
+    patch = {"title": "Hello!", "phoneNumber": "+01-123-456-7890", "author": {"familyName": None}, "tags": ["example"]}
+    result, changed = merge_patch(target, patch)
+    assert result == {"title": "Hello!", "author": {"givenName": "John"}, "tags": ["example"], "content": "x", "phoneNumber": "+01-123-456-7890"}
+    assert sorted(changed) == ["author.familyName", "phoneNumber", "tags", "title"]
+
+
+def test_target_is_not_mutated_and_untouched_subtrees_are_shared():
+    target = {"a": {"b": 1}, "c": {"d": 2}}
+    result, _ = merge_patch(target, {"a": {"b": 3}})
+    assert target == {"a": {"b": 1}, "c": {"d": 2}}
+    assert result["c"] is target["c"]
+
+
+def test_no_op_patch_reports_no_changes():
+    target = {"a": {"b": 1}, "c": 2}
+    assert merge_patch(target, {"a": {"b": 1}, "c": 2, "missing": None})[1] == []
+
+
+def test_value_at():
+    assert value_at({"a": {"b": {"c": 1}}}, "a.b.c") == 1
+    assert value_at({"a": 1}, "a.b") is None
+
+
+def test_model_patch_rejects_unknown_and_invalid_fields():
+    document = {"name": "app", "replicas": 2}
+    with pytest.raises(ValueError):
+        apply_model_patch(document, {"id": "other"}, ApplicationUpdate, Application)
+    with pytest.raises(ValueError):
+        apply_model_patch(document, {"name": None}, ApplicationUpdate, Application)
+    with pytest.raises(ValueError):
+        apply_model_patch(document, ["replicas", 3], ApplicationUpdate, Application)
+    merged, changed = apply_model_patch(document, {"replicas": 3}, ApplicationUpdate, Application)
+    assert merged["replicas"] == 3 and changed == ["replicas"]
@@ -0,0 +1,35 @@
+import pytest
+
+from services.release_service import critical_path, plan_waves
+
+
+def step(name, *depends_on):
+    return {"name": name, "depends_on": list(depends_on)}
+
+
+def test_waves_follow_the_longest_dependency_chain():
+    steps = [step("db"), step("cache"), step("api", "db", "cache"), step("web", "api"), step("jobs", "db")]
+    assert plan_waves(steps) == [["db", "cache"], ["jobs", "api"], ["web"]]
+
+
+def test_repeated_dependencies_count_once():
+    assert plan_waves([step("a"), step("b", "a", "a")]) == [["a"], ["b"]]
+
+
+@pytest.mark.parametrize("steps, message", [
+    ([step("a"), step("a")], "Duplicate release step names: a"),
+    ([step("a", "missing")], "depends on unknown step missing"),
+    ([step("a", "a")], "depends on itself"),
+    ([step("a"), step("b", "a", "c"), step("c", "b")], "cycle among: b, c"),
+])
+def test_invalid_graphs_are_rejected(steps, message):
+    with pytest.raises(ValueError, match=message):
+        plan_waves(steps)
+
+
+def test_critical_path_by_step_count_and_by_duration():
+    steps = [step("a"), step("b"), step("c", "a"), step("d", "c"), step("e", "b")]
+    waves = plan_waves(steps)
+    assert critical_path(steps, waves) == ["a", "c", "d"]
+    assert critical_path(steps, waves, {"a": 1, "b": 10, "c": 1, "d": 1, "e": 1}) == ["b", "e"]
+    assert critical_path([], []) == []
@@ -0,0 +1,59 @@
+import random
+
+import pytest
+
+from utils.sketch import DDSketch
+
+
+def exact_quantile(values, q):
+    ordered = sorted(values)
+    return ordered[int(q * (len(ordered) - 1))]
+
+
+@pytest.mark.parametrize("q", [0.1, 0.5, 0.9, 0.95, 0.99])
+def test_quantiles_within_relative_accuracy(q):
+    rng = random.Random(7)
+    values = [rng.lognormvariate(3, 1.5) for _ in range(20000)]
+    sketch = DDSketch(relative_accuracy=0.02, max_bins=2048)
+    for value in values:
+        sketch.add(value)
+    expected = exact_quantile(values, q)
+    assert abs(sketch.quantile(q) - expected) <= 0.02 * expected + 1e-9
+
+
+def test_merge_matches_a_single_sketch():
+    rng = random.Random(3)
+    values = [rng.uniform(1, 1000) for _ in range(5000)]
+    whole, left, right = DDSketch(), DDSketch(), DDSketch()
+    for index, value in enumerate(values):
+        whole.add(value)
+        (left if index % 2 else right).add(value)
+    left.merge(right)
+    assert left.count == whole.count
+    assert left.sum == pytest.approx(whole.sum)
+    assert left.quantiles([0.5, 0.99]) == whole.quantiles([0.5, 0.99])
+
+
+def test_bins_are_capped_and_extremes_kept():
+    sketch = DDSketch(max_bins=16)
+    for exponent in range(-2, 8):
+        sketch.add(10.0 ** exponent)
+    assert len(sketch.bins) <= 16
+    assert sketch.quantile(0) == 0.01
+    assert sketch.quantile(1) == 10.0 ** 7
+    assert sketch.quantile(0.99) <= sketch.max
+
+
+def test_empty_and_ignored_values():
+    sketch = DDSketch()
+    assert sketch.quantile(0.5) is None and sketch.mean is None
+    sketch.add(-1)
+    sketch.add(5, count=0)
+    assert sketch.count == 0
+    sketch.add(0)
+    assert sketch.quantile(0.5) == 0.0
+
+
+def test_merge_rejects_different_accuracy():
+    with pytest.raises(ValueError):
+        DDSketch(relative_accuracy=0.01).merge(DDSketch(relative_accuracy=0.05))
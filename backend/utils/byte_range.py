@@ -0,0 +1,30 @@
+from typing import Optional, Tuple
+
+
+def parse_byte_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """Resolve a single-range ``Range: bytes=...`` header to an inclusive (start, end).
+
+    Returns None when the header is absent, not a bytes range, malformed
+    or asks for several ranges, in which case the whole resource is served.
+    Raises ValueError when a well-formed range cannot be satisfied.
+    """
+    if not header or not header.strip().startswith("bytes="):
+        return None
+    spec = header.strip()[len("bytes="):].strip()
+    if "," in spec or "-" not in spec:
+        return None
+    first, last = (part.strip() for part in spec.split("-", 1))
+    if not (first or last) or any(part and not (part.isascii() and part.isdigit()) for part in (first, last)):
+        return None
+    if not first:
+        suffix = int(last)
+        if suffix == 0 or size == 0:
+            raise ValueError("Range not satisfiable")
+        return max(size - suffix, 0), size - 1
+    start = int(first)
+    end = int(last) if last else size - 1
+    if last and end < start:
+        return None
+    if start >= size:
+        raise ValueError("Range not satisfiable")
+    return start, min(end, size - 1)
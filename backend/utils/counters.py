@@ -0,0 +1,71 @@
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# (owner id, status) of a deployment, or None when it does not count towards any owner
+CountKey = Optional[Tuple[Any, Any]]
+
+
+def adjust_counts(owner: Dict[str, Any], status: Any, delta: int, total_field: str, status_field: str):
+    """Add delta to an owner's deployment total and to its per-status breakdown"""
+    owner[total_field] = owner.get(total_field, 0) + delta
+    by_status = owner.setdefault(status_field, {})
+    key = str(status)
+    by_status[key] = by_status.get(key, 0) + delta
+    if not by_status[key]:
+        del by_status[key]
+
+
+def apply_count_change(
+    owners: Dict[str, Dict[str, Any]],
+    before: CountKey,
+    after: CountKey,
+    total_field: str,
+    status_field: str
+) -> bool:
+    """Move one deployment's contribution from ``before`` to ``after``, returning whether an owner changed"""
+    if before == after:
+        return False
+    changed = False
+    for key, delta in ((before, -1), (after, 1)):
+        if key is None or key[0] not in owners:
+            continue
+        adjust_counts(owners[key[0]], key[1], delta, total_field, status_field)
+        changed = True
+    return changed
+
+
+def tally(deployments: Iterable[Dict[str, Any]], owner_field: str) -> Dict[Any, Dict[str, int]]:
+    """Count deployments per owner and status in a single pass"""
+    counts: Dict[Any, Dict[str, int]] = {}
+    for deployment in deployments:
+        owner_id = deployment.get(owner_field)
+        if owner_id is None:
+            continue
+        by_status = counts.setdefault(owner_id, {})
+        status = str(deployment.get("status"))
+        by_status[status] = by_status.get(status, 0) + 1
+    return counts
+
+
+def verify_counts(
+    owners: Dict[str, Dict[str, Any]],
+    actual: Dict[Any, Dict[str, int]],
+    total_field: str,
+    status_field: str,
+    repair: bool = False
+) -> List[Dict[str, Any]]:
+    """Compare stored counters with a fresh tally, optionally overwriting the drifted ones"""
+    mismatches = []
+    for owner_id, owner in owners.items():
+        by_status = actual.get(owner_id, {})
+        total = sum(by_status.values())
+        if owner.get(total_field, 0) == total and (owner.get(status_field) or {}) == by_status:
+            continue
+        mismatches.append({
+            "id": owner_id,
+            "stored": {"total": owner.get(total_field, 0), "by_status": dict(owner.get(status_field) or {})},
+            "actual": {"total": total, "by_status": dict(by_status)}
+        })
+        if repair:
+            owner[total_field] = total
+            owner[status_field] = dict(by_status)
+    return mismatches
@@ -0,0 +1,69 @@
+from collections import OrderedDict
+from typing import Any, Optional, Set, Tuple
+import hashlib
+import json
+import time
+
+
+def request_fingerprint(payload: Any) -> str:
+    """Stable hash of a request body, used to detect a key reused for a different request"""
+    raw = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+class IdempotencyConflict(Exception):
+    """Raised when an Idempotency-Key is in flight or was used with a different body"""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+class IdempotencyCache:
+    """Bounded TTL cache of recent write responses keyed by Idempotency-Key.
+
+    Entries expire after ``ttl`` seconds and the least recently stored entry
+    is evicted once ``max_entries`` is reached, so memory stays bounded no
+    matter how many keys clients send.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl: float = 24 * 3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, str, int, Any]]" = OrderedDict()
+        self._in_flight: Set[str] = set()
+
+    def _expire(self, now: float):
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if entry[0] > now:
+                break
+            del self._entries[key]
+
+    def begin(self, key: str, fingerprint: str) -> Optional[Tuple[int, Any]]:
+        """Return a stored (status_code, body) to replay, or claim the key for a new request"""
+        self._expire(time.monotonic())
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[1] != fingerprint:
+                raise IdempotencyConflict(422, "Idempotency-Key was already used with a different request")
+            return entry[2], entry[3]
+        if key in self._in_flight:
+            raise IdempotencyConflict(409, "A request with this Idempotency-Key is still in progress")
+        self._in_flight.add(key)
+        return None
+
+    def complete(self, key: str, fingerprint: str, status_code: int, body: Any):
+        self._in_flight.discard(key)
+        self._entries.pop(key, None)
+        self._entries[key] = (time.monotonic() + self.ttl, fingerprint, status_code, body)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def release(self, key: str):
+        """Forget a claimed key whose request failed, so a retry is processed again"""
+        self._in_flight.discard(key)
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,269 @@
+import base64
+import json
+import re
+from bisect import bisect_left, bisect_right, insort
+from heapq import merge
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def encode_cursor(sort_value: Any, entity_id: str) -> str:
+    """Encode a keyset pagination position as an opaque URL-safe token"""
+    raw = json.dumps([sort_value, entity_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Any, str]:
+    """Decode a token produced by encode_cursor; raises ValueError if it is malformed"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_value, entity_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return sort_value, str(entity_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Split free text into lowercase alphanumeric tokens"""
+    return _TOKEN_RE.findall((text or "").lower())
+
+
+class SecondaryIndex:
+    """Maps document field values to the set of entity ids holding them.
+
+    Fields listed in ``multi_valued`` hold lists (e.g. tags) and every
+    element is indexed separately.
+    """
+
+    def __init__(self, fields: Iterable[str], multi_valued: Iterable[str] = ()):
+        self.fields = list(fields)
+        self.multi_valued = set(multi_valued)
+        self._postings: Dict[str, Dict[Any, Set[str]]] = {field: {} for field in self.fields}
+
+    def _values(self, field: str, doc: Dict[str, Any]) -> List[Any]:
+        value = doc.get(field)
+        if field in self.multi_valued:
+            return list(value or [])
+        return [value]
+
+    def add(self, entity_id: str, doc: Dict[str, Any]):
+        for field in self.fields:
+            postings = self._postings[field]
+            for value in self._values(field, doc):
+                postings.setdefault(value, set()).add(entity_id)
+
+    def remove(self, entity_id: str, doc: Dict[str, Any]):
+        for field in self.fields:
+            postings = self._postings[field]
+            for value in self._values(field, doc):
+                ids = postings.get(value)
+                if ids is None:
+                    continue
+                ids.discard(entity_id)
+                if not ids:
+                    del postings[value]
+
+    def clear(self):
+        self._postings = {field: {} for field in self.fields}
+
+    def lookup(self, field: str, value: Any) -> Set[str]:
+        return self._postings[field].get(value, set())
+
+    def lookup_any(self, field: str, values: Iterable[Any]) -> Set[str]:
+        """Union of the postings for each value"""
+        result: Set[str] = set()
+        for value in values:
+            result |= self.lookup(field, value)
+        return result
+
+    def lookup_all(self, field: str, values: Iterable[Any]) -> Set[str]:
+        """Intersection of the postings for each value, smallest set first"""
+        postings = sorted((self.lookup(field, value) for value in values), key=len)
+        if not postings:
+            return set()
+        result = set(postings[0])
+        for ids in postings[1:]:
+            if not result:
+                break
+            result &= ids
+        return result
+
+    def values(self, field: str) -> Dict[Any, int]:
+        """Distinct values of a field with the number of entities holding each"""
+        return {value: len(ids) for value, ids in self._postings[field].items()}
+
+
+class SortedSecondaryIndex:
+    """Secondary index whose postings are kept sorted by a document key.
+
+    Each posting is a list of (sort_key, id) pairs in ascending order, so a
+    filtered query returns results already ordered for paginate_sorted
+    without sorting the matches. Fields are single-valued.
+    """
+
+    def __init__(self, fields: Iterable[str], sort_key: Callable[[Dict[str, Any]], Any]):
+        self.fields = list(fields)
+        self.sort_key = sort_key
+        self._postings: Dict[str, Dict[Any, List[Tuple[Any, str]]]] = {field: {} for field in self.fields}
+        self._all: List[Tuple[Any, str]] = []
+        # entity id -> its indexed field values, for checking candidates against the other filters
+        self._values: Dict[str, Dict[str, Any]] = {}
+
+    @staticmethod
+    def _discard(entries: List[Tuple[Any, str]], entry: Tuple[Any, str]) -> bool:
+        position = bisect_left(entries, entry)
+        if position < len(entries) and entries[position] == entry:
+            del entries[position]
+            return True
+        return False
+
+    def add(self, entity_id: str, doc: Dict[str, Any]):
+        entry = (self.sort_key(doc), entity_id)
+        insort(self._all, entry)
+        self._values[entity_id] = {field: doc.get(field) for field in self.fields}
+        for field in self.fields:
+            insort(self._postings[field].setdefault(doc.get(field), []), entry)
+
+    def remove(self, entity_id: str, doc: Dict[str, Any]):
+        """Remove an entity using the document as it was when it was added"""
+        entry = (self.sort_key(doc), entity_id)
+        if self._discard(self._all, entry):
+            self._values.pop(entity_id, None)
+        for field in self.fields:
+            postings = self._postings[field]
+            entries = postings.get(doc.get(field))
+            if entries is not None and self._discard(entries, entry) and not entries:
+                del postings[doc.get(field)]
+
+    def clear(self):
+        self._postings = {field: {} for field in self.fields}
+        self._all = []
+        self._values = {}
+
+    def lookup_any(self, field: str, values: Iterable[Any]) -> List[Tuple[Any, str]]:
+        """Sorted union of the postings for each value"""
+        postings = [self._postings[field].get(value, []) for value in set(values)]
+        if len(postings) == 1:
+            return postings[0]
+        return list(merge(*postings))
+
+    def query(self, filters: Dict[str, Optional[Iterable[Any]]]) -> List[Tuple[Any, str]]:
+        """Sorted (sort_key, id) pairs matching every filtered field.
+
+        Only the postings of the most selective field are read; each of
+        them is checked against the other filters through the entity's
+        indexed values, so the cost is bounded by that field's matches. A
+        single-value filter returns the posting list itself, uncopied.
+        """
+        active = {field: set(values) for field, values in filters.items() if values}
+        if not active:
+            return self._all
+        sizes = {
+            field: sum(len(self._postings[field].get(value, ())) for value in values)
+            for field, values in active.items()
+        }
+        driver = min(sizes, key=sizes.get)
+        entries = self.lookup_any(driver, active.pop(driver))
+        if not active:
+            return entries
+        indexed = self._values
+        return [
+            entry for entry in entries
+            if all(indexed[entry[1]][field] in values for field, values in active.items())
+        ]
+
+    def values(self, field: str) -> Dict[Any, int]:
+        """Distinct values of a field with the number of entities holding each"""
+        return {value: len(entries) for value, entries in self._postings[field].items()}
+
+    def __len__(self) -> int:
+        return len(self._all)
+
+
+class TextIndex:
+    """Token prefix index for free-text search over a single field"""
+
+    def __init__(self):
+        self._postings: Dict[str, Set[str]] = {}
+        self._tokens: List[str] = []
+
+    def add(self, entity_id: str, text: Optional[str]):
+        for token in set(tokenize(text)):
+            ids = self._postings.get(token)
+            if ids is None:
+                ids = self._postings[token] = set()
+                self._tokens.insert(bisect_left(self._tokens, token), token)
+            ids.add(entity_id)
+
+    def remove(self, entity_id: str, text: Optional[str]):
+        for token in set(tokenize(text)):
+            ids = self._postings.get(token)
+            if ids is None:
+                continue
+            ids.discard(entity_id)
+            if not ids:
+                del self._postings[token]
+                del self._tokens[bisect_left(self._tokens, token)]
+
+    def clear(self):
+        self._postings = {}
+        self._tokens = []
+
+    def _prefix_matches(self, prefix: str) -> Set[str]:
+        result: Set[str] = set()
+        start = bisect_left(self._tokens, prefix)
+        end = bisect_right(self._tokens, prefix + "￿", lo=start)
+        for token in self._tokens[start:end]:
+            result |= self._postings[token]
+        return result
+
+    def search(self, query: str) -> Set[str]:
+        """Ids whose text contains a token starting with every query token"""
+        result: Optional[Set[str]] = None
+        for token in tokenize(query):
+            matches = self._prefix_matches(token)
+            result = matches if result is None else result & matches
+            if not result:
+                return set()
+        return result or set()
+
+
+def paginate_sorted(
+    keyed: List[Tuple[Any, str]],
+    descending: bool = False,
+    offset: int = 0,
+    limit: Optional[int] = None,
+    cursor: Optional[Tuple[Any, str]] = None,
+    lo: int = 0,
+    hi: Optional[int] = None,
+) -> Tuple[List[str], Optional[Tuple[Any, str]]]:
+    """Page through (sort_key, id) pairs already sorted ascending.
+
+    A cursor is the (sort_key, id) of the last item of the previous page and
+    takes precedence over offset; one whose sort key cannot be compared with
+    the keys (a cursor from another sort) raises ValueError. ``lo``/``hi`` restrict paging to a slice of
+    ``keyed``, e.g. a sort key range found by bisecting. Only the page itself
+    is copied. Returns the page ids and the cursor for the next page, or None
+    when this is the last page.
+    """
+    hi = len(keyed) if hi is None else hi
+    start, end = lo, hi
+    if cursor is not None:
+        try:
+            if descending:
+                end = bisect_left(keyed, cursor, lo, hi)
+            else:
+                start = bisect_right(keyed, cursor, lo, hi)
+        except TypeError:
+            raise ValueError("Cursor does not match the requested sort")
+    elif descending:
+        end = max(hi - max(offset, 0), lo)
+    else:
+        start = min(lo + max(offset, 0), hi)
+
+    available = max(end - start, 0)
+    count = available if limit is None else min(max(limit, 0), available)
+    page = keyed[end - count:end][::-1] if descending else keyed[start:start + count]
+    next_cursor = page[-1] if page and available > count else None
+    return [entity_id for _, entity_id in page], next_cursor
@@ -0,0 +1,70 @@
+from typing import Any, Dict, List, Tuple, Type
+
+from pydantic import BaseModel
+
+_MISSING = object()
+
+
+def merge_patch(target: Any, patch: Any, path: str = "") -> Tuple[Any, List[str]]:
+    """Apply an RFC 7386 JSON merge patch, returning the result and the changed paths.
+
+    Only objects along patched paths are copied; untouched subtrees are
+    shared with ``target``. Paths are dotted, e.g. ``resources.cpu.limit``.
+    """
+    if not isinstance(patch, dict):
+        return patch, ([path] if target != patch else [])
+    result = dict(target) if isinstance(target, dict) else {}
+    changed: List[str] = []
+    for key, value in patch.items():
+        child = f"{path}.{key}" if path else key
+        if value is None:
+            if key in result:
+                del result[key]
+                changed.append(child)
+            continue
+        current = result.get(key, _MISSING)
+        if isinstance(value, dict):
+            merged, child_changed = merge_patch(None if current is _MISSING else current, value, child)
+            if current is _MISSING or not isinstance(current, dict) or child_changed:
+                result[key] = merged
+                changed.extend(child_changed or [child])
+        elif current is _MISSING or current != value:
+            result[key] = value
+            changed.append(child)
+    return result, changed
+
+
+def value_at(document: Dict[str, Any], path: str) -> Any:
+    """Read a dotted path from a document, returning None where it no longer exists"""
+    value: Any = document
+    for key in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+
+def apply_model_patch(
+    document: Dict[str, Any],
+    patch: Any,
+    update_model: Type[BaseModel],
+    document_model: Type[BaseModel]
+) -> Tuple[Dict[str, Any], List[str]]:
+    """Merge a patch into a stored document and validate the touched fields.
+
+    Top-level keys must be fields of ``update_model``; the merged values of
+    those fields are validated with it, and removing a field the stored
+    document requires is rejected. Raises ValueError on an invalid patch.
+    """
+    if not isinstance(patch, dict):
+        raise ValueError("Merge patch must be a JSON object")
+    unknown = sorted(set(patch) - set(update_model.model_fields))
+    if unknown:
+        raise ValueError(f"Fields cannot be patched: {', '.join(unknown)}")
+    merged, changed = merge_patch(document, patch)
+    for key in patch:
+        field = document_model.model_fields.get(key)
+        if key not in merged and field is not None and field.is_required():
+            raise ValueError(f"Field cannot be removed: {key}")
+    update_model(**{key: merged[key] for key in patch if key in merged})
+    return merged, changed
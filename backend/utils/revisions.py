@@ -0,0 +1,38 @@
+from typing import Any, Dict, Optional
+
+
+class RevisionConflictError(Exception):
+    """Raised when a write names a revision other than the stored one"""
+
+    def __init__(self, expected: int, current: int):
+        super().__init__(f"Revision mismatch: expected {expected}, current is {current}")
+        self.expected = expected
+        self.current = current
+
+
+def parse_if_match(value: Optional[str]) -> Optional[int]:
+    """Read the revision from an If-Match header ("3", 3 or W/"3"); None or * means unconditional"""
+    if value is None or value.strip() in ("", "*"):
+        return None
+    tag = value.strip()
+    if tag.startswith("W/"):
+        tag = tag[2:]
+    tag = tag.strip('"')
+    if not tag.isdigit():
+        raise ValueError(f"If-Match must carry an entity revision, got {value!r}")
+    return int(tag)
+
+
+def etag(revision: int) -> str:
+    """Strong ETag header value for an entity revision"""
+    return f'"{revision}"'
+
+
+def check_revision(document: Dict[str, Any], expected: Optional[int]):
+    current = document.get("revision", 0)
+    if expected is not None and current != expected:
+        raise RevisionConflictError(expected, current)
+
+
+def bump_revision(document: Dict[str, Any]):
+    document["revision"] = document.get("revision", 0) + 1
@@ -41,6 +41,42 @@ export interface UpdateApplicationData {
   team?: string;
 }
 
+export interface ApplicationQuery {
+  environment?: string[];
+  status?: string[];
+  team?: string[];
+  tags?: string[];
+  search?: string;
+  sort?: string;
+  offset?: number;
+  limit?: number;
+  cursor?: string;
+}
+
+export interface ApplicationPage {
+  items: Application[];
+  total: number;
+  nextCursor: string | null;
+}
+
+export interface FleetVulnerability {
+  cve: string;
+  title: string;
+  severity: string;
+  packages: string[];
+  affected_applications: string[];
+  affected_count: number;
+  findings: number;
+}
+
+export interface VulnerabilitySummary {
+  by_severity: Record<string, number>;
+  by_team: Record<string, Record<string, number>>;
+  unique_vulnerabilities: number;
+  affected_applications: number;
+  total_findings: number;
+}
+
 class ApiService {
   private async request<T>(
     endpoint: string,
@@ -75,6 +111,30 @@ class ApiService {
     return this.request<Application[]>('/applications');
   }
 
+  async queryApplications(query: ApplicationQuery = {}): Promise<ApplicationPage> {
+    const params = new URLSearchParams();
+    Object.entries(query).forEach(([key, value]) => {
+      if (value === undefined || value === '') return;
+      if (Array.isArray(value)) {
+        value.forEach(item => params.append(key, item));
+      } else {
+        params.append(key, String(value));
+      }
+    });
+
+    const response = await fetch(`${API_BASE_URL}/applications?${params.toString()}`);
+    if (!response.ok) {
+      const errorData = await response.json().catch(() => ({}));
+      throw new Error(errorData.detail || `HTTP error! status: ${response.status}`);
+    }
+
+    return {
+      items: await response.json(),
+      total: Number(response.headers.get('X-Total-Count') ?? 0),
+      nextCursor: response.headers.get('X-Next-Cursor'),
+    };
+  }
+
   async getApplication(id: string): Promise<Application> {
     return this.request<Application>(`/applications/${id}`);
   }
@@ -146,6 +206,19 @@ class ApiService {
     });
   }
 
+  async getVulnerabilities(filters: { severity?: string[]; package?: string; team?: string; application_id?: string } = {}): Promise<FleetVulnerability[]> {
+    const params = new URLSearchParams();
+    filters.severity?.forEach(severity => params.append('severity', severity));
+    if (filters.package) params.append('package', filters.package);
+    if (filters.team) params.append('team', filters.team);
+    if (filters.application_id) params.append('application_id', filters.application_id);
+    return this.request<FleetVulnerability[]>(`/vulnerabilities?${params.toString()}`);
+  }
+
+  async getVulnerabilitySummary(): Promise<VulnerabilitySummary> {
+    return this.request<VulnerabilitySummary>('/vulnerabilities/summary');
+  }
+
   // Health check
   async healthCheck(): Promise<{ status: string; service: string }> {
     return this.request<{ status: string; service: string }>('/health');